@@ -0,0 +1,57 @@
+"""Measures the time for loading an EOL trait CSV file with different numbers of
+worker processes.
+
+Usage: python benchmarks/csv_loading.py [/path/to/eol/trait.csv] [--workers 1 2 4]
+
+Without a CSV file, a synthetic file of `--rows` copies of the test data is used.
+"""
+
+import argparse
+import os
+import pathlib
+import tempfile
+import time
+
+from eol.handlers import EolTraitCsvHandler
+
+TEST_CSV_FILE_PATH = (
+    pathlib.Path(__file__).parent.parent / "tests" / "data" / "test_eol_traits.csv"
+)
+
+
+def create_synthetic_csv_file(directory: pathlib.Path, rows: int) -> pathlib.Path:
+    header, *records = TEST_CSV_FILE_PATH.read_text().splitlines(keepends=True)
+    csv_file_path = directory / "traits.csv"
+    with open(csv_file_path, "w") as csv_file:
+        csv_file.write(header)
+        for _ in range(rows // len(records)):
+            csv_file.writelines(records)
+    return csv_file_path
+
+
+def measure_load_time(csv_file_path: pathlib.Path, workers: int) -> float:
+    start = time.perf_counter()
+    EolTraitCsvHandler(csv_file_path, workers=workers).get_data()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_file_path", nargs="?", type=pathlib.Path)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1]
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file_path = args.csv_file_path or create_synthetic_csv_file(
+            pathlib.Path(directory), args.rows
+        )
+        for workers in args.workers:
+            load_time = measure_load_time(csv_file_path, workers)
+            print(f"{workers:3d} workers: {load_time:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Measures the time for importing the eol package in a fresh interpreter.
+
+Usage: python benchmarks/import_time.py [--repetitions 10]
+
+The import of `eol` is compared with importing `eol` together with its heavy
+dependencies (pandas, numpy and requests), i.e. the import time before these were
+imported lazily.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+STATEMENTS = {
+    "import eol": "import eol",
+    "import eol.triple_generator": "import eol.triple_generator",
+    "import eol + heavy dependencies": "import eol, numpy, pandas, requests",
+}
+
+
+def measure_import_time(statement: str, repetitions: int) -> float:
+    """Returns the median wall time of running the statement in a new interpreter,
+    minus the startup time of the interpreter.
+    """
+    return _median_run_time(statement, repetitions) - _median_run_time(
+        "pass", repetitions
+    )
+
+
+def _median_run_time(statement: str, repetitions: int) -> float:
+    run_times = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        run_times.append(time.perf_counter() - start)
+    return statistics.median(run_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repetitions", type=int, default=10)
+    args = parser.parse_args()
+
+    for name, statement in STATEMENTS.items():
+        import_time = measure_import_time(statement, args.repetitions)
+        print(f"{name:<35} {import_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
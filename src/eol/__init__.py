@@ -4,15 +4,41 @@ Created on Mon Jul 18 10:54:49 2022
 
 @author: AHMAD
 """
+import itertools
 import logging
 import pathlib
-from typing import List, Optional, Set, Union
+import threading
+from collections import defaultdict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Union,
+)
 
-from eol.conversions import IdentifierConverter
+import eol.variables as variables
+from eol.cache import MemoizationCache, TripleCache
+from eol.conversions import IdentifierConverter, create_identifier_converter
 from eol.data import DataProvider
+from eol.delta import TraitSnapshot, TripleDelta, compute_triple_delta
 from eol.handlers import DataHandler
 from eol.normalization import Normalizer
-from eol.triple_generator import Triple, TripleGenerator, deduplicate_triples
+from eol.pipeline import Stage, StagedPipeline
+from eol.trait_index import Trait
+from eol.triple_generator import (
+    Triple,
+    TripleGenerator,
+    deduplicate_triples,
+    iterate_unique_triples,
+)
+from eol.triple_store import TripleStore
+from eol.warm_up import WarmUp
 
 
 class EncyclopediaOfLifeProcessing:
@@ -25,18 +51,74 @@ class EncyclopediaOfLifeProcessing:
         data_handler: DataHandler,
         data_normalizer: Normalizer,
         data_provider_mapping_csv_file_path: Optional[pathlib.Path] = None,
+        triple_cache: Optional[TripleCache] = None,
+        memoization_cache: Optional[MemoizationCache] = None,
+        triple_store: Optional[TripleStore] = None,
     ):
         self.data_handler = data_handler
         self.data_normalizer = data_normalizer
-        self.identifier_converter = None
+        self.triple_cache = triple_cache
+        self.memoization_cache = memoization_cache
+        self.triple_store = triple_store
+        self.identifier_converter: Optional[IdentifierConverter] = None
+        self._warm_up: Optional[WarmUp] = None
+        self._warm_up_lock = threading.Lock()
 
         if data_provider_mapping_csv_file_path is not None:
-            self.identifier_converter = IdentifierConverter(
+            self.identifier_converter = create_identifier_converter(
                 data_provider_mapping_csv_file_path, self.RELEVANT_DATA_PROVIDERS
             )
 
         self.logger = logging.getLogger(__name__)
 
+        if (
+            triple_store is not None
+            and triple_store.source_version != data_handler.get_source_version()
+        ):
+            self.logger.warning(
+                "The triple store was not compiled from the data of the data handler"
+            )
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether a warm-up loaded all data (see `warm_up`), so no request has
+        to wait for loading data anymore.
+        """
+        return self._warm_up is not None and self._warm_up.is_ready
+
+    def warm_up(self, background: bool = True) -> WarmUp:
+        """Loads the trait data, its indexes and the identifier map concurrently,
+        which otherwise happens on the first requests needing them.
+
+        If `background` is True, the loading runs in background threads and the
+        returned WarmUp reports the progress (see `eol.warm_up.WarmUp`). Requests
+        arriving meanwhile wait only for the data they need. Otherwise, this
+        method returns when all data is loaded and raises the error of a failed
+        task. Calling it again returns the running or finished warm-up, unless it
+        finished with a failed task.
+        """
+        with self._warm_up_lock:
+            if self._warm_up is None or (
+                self._warm_up.is_finished and self._warm_up.has_failed
+            ):
+                self._warm_up = WarmUp(self._get_preload_tasks()).start()
+            warm_up = self._warm_up
+
+        if not background:
+            warm_up.wait()
+        return warm_up
+
+    def preload(self) -> WarmUp:
+        """Loads all data before returning. See `warm_up`."""
+        return self.warm_up(background=False)
+
+    def _get_preload_tasks(self) -> Dict[str, Callable[[], Any]]:
+        get_preload_tasks = getattr(self.data_handler, "get_preload_tasks", None)
+        tasks = {} if get_preload_tasks is None else dict(get_preload_tasks())
+        if self.identifier_converter is not None:
+            tasks["identifier_map"] = self.identifier_converter.preload
+        return tasks
+
     def get_gbif_id_for_eol_page_id(
         self, eol_page_id: Union[str, int]
     ) -> Optional[str]:
@@ -87,19 +169,462 @@ class EncyclopediaOfLifeProcessing:
         to the given predicate URIs. (e.g.
         {"http://rs.tdwg.org/dwc/terms/habitat", "http://eol.org/schema/terms/Present"}
         ).
+
+        If a `memoization_cache` was given, the result is memoized in the current
+        process. If a `triple_cache` was given, the triples of the page are served
+        from and stored in the (shared) cache. If a `triple_store` was given, the
+        triples are read from the store instead and the `triple_cache` is not used.
         """
+        if self.memoization_cache is None:
+            return self._load_trait_data_for_eol_page_id(
+                eol_page_id, filter_for_predicates
+            )
 
-        triples = set()
-        triple_generator = TripleGenerator()
-        for non_normalized_data in self.data_handler.iterate_data_by_key(
-            key="page_id", value=int(eol_page_id)
+        triples = self.memoization_cache.get(eol_page_id, filter_for_predicates)
+        if triples is None:
+            triples = self._load_trait_data_for_eol_page_id(
+                eol_page_id, filter_for_predicates
+            )
+            self.memoization_cache.set(eol_page_id, filter_for_predicates, triples)
+        return triples
+
+    def invalidate_trait_data(
+        self, eol_page_id: Optional[Union[str, int]] = None
+    ) -> None:
+        """Removes the memoized trait data of the given page from the
+        `memoization_cache`, or all memoized trait data if no page ID is given.
+        """
+        if self.memoization_cache is not None:
+            self.memoization_cache.invalidate(eol_page_id)
+
+    def _load_trait_data_for_eol_page_id(
+        self,
+        eol_page_id: Union[str, int],
+        filter_for_predicates: Optional[Set[str]],
+    ) -> List[Triple]:
+        stored_trait_data = self._get_stored_trait_data(
+            [eol_page_id], filter_for_predicates
+        )
+        if stored_trait_data is not None:
+            return stored_trait_data[eol_page_id]
+
+        if self.triple_cache is None:
+            triples = self.iter_trait_data_for_eol_page_id(
+                eol_page_id, filter_for_predicates=filter_for_predicates
+            )
+            return deduplicate_triples(triples)
+
+        # The cache holds all triples of a page, regardless of the filter
+        source_version = self.data_handler.get_source_version()
+        triples = self.triple_cache.get(eol_page_id, source_version)
+        if triples is None:
+            triples = deduplicate_triples(
+                self.iter_trait_data_for_eol_page_id(eol_page_id)
+            )
+            self.triple_cache.set(eol_page_id, source_version, triples)
+
+        return _filter_sorted_triples(triples, filter_for_predicates)
+
+    def get_trait_data_for_eol_page_ids(
+        self,
+        eol_page_ids: Iterable[Union[str, int]],
+        filter_for_predicates: Optional[Set[str]] = None,
+    ) -> Dict[Union[str, int], List[Triple]]:
+        """Returns a dictionary mapping each given EOL page ID to its trait data, as
+        returned by `get_trait_data_for_eol_page_id`.
+
+        The data of all pages that are not cached is retrieved at once. With the
+        API handler, many pages are queried per request, so the number of
+        requests depends on the number of traits rather than on the number of pages.
+        """
+        eol_page_ids = list(dict.fromkeys(eol_page_ids))
+
+        trait_data = {}
+        if self.memoization_cache is not None:
+            for eol_page_id in eol_page_ids:
+                triples = self.memoization_cache.get(eol_page_id, filter_for_predicates)
+                if triples is not None:
+                    trait_data[eol_page_id] = triples
+
+        loaded_trait_data = self._load_trait_data_for_eol_page_ids(
+            [page_id for page_id in eol_page_ids if page_id not in trait_data],
+            filter_for_predicates,
+        )
+        if self.memoization_cache is not None:
+            for eol_page_id, triples in loaded_trait_data.items():
+                self.memoization_cache.set(eol_page_id, filter_for_predicates, triples)
+        trait_data.update(loaded_trait_data)
+
+        return {eol_page_id: trait_data[eol_page_id] for eol_page_id in eol_page_ids}
+
+    def _load_trait_data_for_eol_page_ids(
+        self,
+        eol_page_ids: List[Union[str, int]],
+        filter_for_predicates: Optional[Set[str]],
+    ) -> Dict[Union[str, int], List[Triple]]:
+        stored_trait_data = self._get_stored_trait_data(
+            eol_page_ids, filter_for_predicates
+        )
+        if stored_trait_data is not None:
+            return stored_trait_data
+
+        if self.triple_cache is None:
+            return self._generate_trait_data_for_eol_page_ids(
+                eol_page_ids, filter_for_predicates
+            )
+
+        # The cache holds all triples of a page, regardless of the filter
+        source_version = self.data_handler.get_source_version()
+        trait_data = {}
+        for eol_page_id in eol_page_ids:
+            triples = self.triple_cache.get(eol_page_id, source_version)
+            if triples is not None:
+                trait_data[eol_page_id] = triples
+
+        generated_trait_data = self._generate_trait_data_for_eol_page_ids(
+            [page_id for page_id in eol_page_ids if page_id not in trait_data]
+        )
+        for eol_page_id, triples in generated_trait_data.items():
+            self.triple_cache.set(eol_page_id, source_version, triples)
+        trait_data.update(generated_trait_data)
+
+        return {
+            eol_page_id: _filter_sorted_triples(triples, filter_for_predicates)
+            for eol_page_id, triples in trait_data.items()
+        }
+
+    def _get_stored_trait_data(
+        self,
+        eol_page_ids: List[Union[str, int]],
+        filter_for_predicates: Optional[Set[str]],
+    ) -> Optional[Dict[Union[str, int], List[Triple]]]:
+        """Returns the trait data of the pages from the `triple_store`, or None if
+        no store was given.
+        """
+        if self.triple_store is None:
+            return None
+
+        trait_data = self.triple_store.get_many(eol_page_ids)
+        return {
+            eol_page_id: _filter_sorted_triples(
+                trait_data[int(eol_page_id)], filter_for_predicates
+            )
+            for eol_page_id in eol_page_ids
+        }
+
+    def _generate_trait_data_for_eol_page_ids(
+        self,
+        eol_page_ids: List[Union[str, int]],
+        filter_for_predicates: Optional[Set[str]] = None,
+    ) -> Dict[Union[str, int], List[Triple]]:
+        if not eol_page_ids:
+            return {}
+
+        triples_by_subject = defaultdict(list)
+        for triples in self.iter_trait_data_batches(
+            eol_page_ids, filter_for_predicates
         ):
+            for triple in triples:
+                triples_by_subject[triple.subject].append(triple)
+
+        return {
+            eol_page_id: deduplicate_triples(
+                triples_by_subject.get(str(int(eol_page_id)), [])
+            )
+            for eol_page_id in eol_page_ids
+        }
+
+    def iter_trait_data_for_eol_page_id(
+        self,
+        eol_page_id: Union[str, int],
+        filter_for_predicates: Optional[Set[str]] = None,
+        sort: bool = False,
+    ) -> Iterator[Triple]:
+        """Yields the Triple objects containing trait data for the given EOL page ID
+        as soon as the data handler provides the corresponding data.
+
+        The yielded triples are unique, but in the order of the data source. If
+        `sort` is True, all triples are gathered first and yielded in the same
+        order as returned by `get_trait_data_for_eol_page_id`.
+        `filter_for_predicates` works as in `get_trait_data_for_eol_page_id`.
+        """
+        stored_trait_data = self._get_stored_trait_data(
+            [eol_page_id], filter_for_predicates
+        )
+        if stored_trait_data is not None:
+            return iter(stored_trait_data[eol_page_id])
+
+        non_normalized_records = self.data_handler.iterate_data_by_key(
+            key="page_id", value=int(eol_page_id)
+        )
+        triples = self._generate_triples(non_normalized_records, filter_for_predicates)
+        if sort:
+            return iter(deduplicate_triples(triples))
+        return iterate_unique_triples(triples)
+
+    def iter_trait_data_batches(
+        self,
+        eol_page_ids: Iterable[Union[str, int]],
+        filter_for_predicates: Optional[Set[str]] = None,
+        batch_size: int = 10_000,
+    ) -> Iterator[List[Triple]]:
+        """Yields the Triple objects containing trait data for all given EOL page
+        IDs, in lists generated from batches of at most `batch_size` records.
+
+        The records are normalized and converted to triples column-wise, which is
+        much faster than record by record for many pages. The triples are unique
+        within each record. `filter_for_predicates` works as in
+        `get_trait_data_for_eol_page_id`.
+        """
+        batches = self.data_handler.iterate_batches(
+            "page_id", [int(page_id) for page_id in eol_page_ids], batch_size
+        )
+        for batch in batches:
+            yield self._create_triples_from_batch(batch, filter_for_predicates)
+
+    def iter_trait_data_batches_pipelined(  # pylint: disable=too-many-arguments
+        self,
+        eol_page_ids: Iterable[Union[str, int]],
+        filter_for_predicates: Optional[Set[str]] = None,
+        batch_size: int = 10_000,
+        page_ids_per_fetch: int = 100,
+        fetch_workers: int = 4,
+        parse_workers: int = 1,
+        generate_workers: int = 1,
+        queue_size: int = 4,
+    ) -> Iterator[List[Triple]]:
+        """Yields the same lists of Triple objects as `iter_trait_data_batches`,
+        but fetches, parses and converts the data concurrently in a pipeline (see
+        `create_trait_data_pipeline`). The order of the lists is not preserved.
+        """
+        pipeline = self.create_trait_data_pipeline(
+            filter_for_predicates=filter_for_predicates,
+            batch_size=batch_size,
+            fetch_workers=fetch_workers,
+            parse_workers=parse_workers,
+            generate_workers=generate_workers,
+            queue_size=queue_size,
+        )
+        page_ids = iter(int(page_id) for page_id in eol_page_ids)
+        page_id_groups = iter(
+            lambda: list(itertools.islice(page_ids, page_ids_per_fetch)), []
+        )
+        return pipeline.process(page_id_groups)
+
+    def create_trait_data_pipeline(  # pylint: disable=too-many-arguments
+        self,
+        filter_for_predicates: Optional[Set[str]] = None,
+        batch_size: int = 10_000,
+        fetch_workers: int = 4,
+        parse_workers: int = 1,
+        generate_workers: int = 1,
+        queue_size: int = 4,
+        sink: Optional[Callable[[List[Triple]], None]] = None,
+    ) -> StagedPipeline:
+        """Returns a pipeline, which processes lists of EOL page IDs to lists of
+        Triple objects, generated from batches of at most `batch_size` records.
+
+        The stages fetch the data from the data handler, parse it into batches,
+        normalize and convert the batches and (if given) pass the triples to the
+        `sink`, each with the given number of worker threads. The EOL API is
+        requested while the previous responses are processed.
+        """
+        stages = [
+            Stage(
+                "fetch",
+                lambda page_ids: self.data_handler.fetch_raw_batches(
+                    "page_id", page_ids
+                ),
+                workers=fetch_workers,
+            ),
+            Stage(
+                "parse",
+                lambda raw_batch: self.data_handler.parse_raw_batch(
+                    raw_batch, batch_size
+                ),
+                workers=parse_workers,
+            ),
+            Stage(
+                "generate",
+                lambda batch: [
+                    self._create_triples_from_batch(batch, filter_for_predicates)
+                ],
+                workers=generate_workers,
+            ),
+        ]
+        if sink is not None:
+            stages.append(Stage("sink", lambda triples: [sink(triples)]))
+        return StagedPipeline(stages, queue_size=queue_size)
+
+    def _create_triples_from_batch(
+        self, batch, filter_for_predicates: Optional[Set[str]]
+    ) -> List[Triple]:
+        normalized_batch = self.data_normalizer.normalize_batch(batch)
+        if filter_for_predicates:
+            normalized_batch = normalized_batch[
+                normalized_batch[variables.PREDICATE_STRING].isin(filter_for_predicates)
+            ]
+        return TripleGenerator().create_triples_from_batch(normalized_batch)
+
+    def get_eol_page_ids_with_trait(
+        self, predicate: str, value_uri: Optional[str] = None
+    ) -> List[int]:
+        """Returns the sorted IDs of all EOL pages having a trait with the given
+        predicate URI and, if given, value URI (e.g. all pages with a specific
+        habitat).
+
+        The lookup uses the trait index of the data handler, which is built on the
+        first call. This requires a data handler providing a trait index, e.g. the
+        EolTraitCsvHandler.
+        """
+        trait_index = self._get_data_handler_index("get_trait_index")
+        return trait_index.get_page_ids(predicate, value_uri).tolist()
+
+    def get_eol_page_ids_with_all_traits(self, traits: Iterable[Trait]) -> List[int]:
+        """Returns the sorted IDs of all EOL pages having all given traits. A trait
+        is either a predicate URI or a tuple of a predicate URI and a value URI. See
+        `get_eol_page_ids_with_trait`.
+        """
+        trait_index = self._get_data_handler_index("get_trait_index")
+        return trait_index.find_page_ids(traits).tolist()
+
+    def get_eol_page_ids_for_scientific_name(self, scientific_name: str) -> List[int]:
+        """Returns the sorted IDs of all EOL pages with the given scientific name.
+
+        HTML markup, the authorship and the case are ignored, so e.g.
+        "Tamias dorsalis", "tamias dorsalis" and "<i>Tamias dorsalis</i> Baird 1855"
+        are the same name. The lookup uses the name index of the data handler, which
+        is built on the first call. This requires a data handler providing a name
+        index, e.g. the EolTraitCsvHandler.
+        """
+        name_index = self._get_data_handler_index("get_name_index")
+        return name_index.get_page_ids(scientific_name).tolist()
+
+    def find_scientific_names(
+        self, prefix: str, limit: Optional[int] = None
+    ) -> Dict[str, List[int]]:
+        """Returns the canonical scientific names starting with the given prefix
+        (ignoring the case) and the IDs of their EOL pages, e.g. all species of a
+        genus for the prefix "Tamias ". See `get_eol_page_ids_for_scientific_name`.
+        """
+        name_index = self._get_data_handler_index("get_name_index")
+        return name_index.find_names(prefix, limit)
+
+    def get_trait_data_for_scientific_name(
+        self,
+        scientific_name: str,
+        filter_for_predicates: Optional[Set[str]] = None,
+    ) -> List[Triple]:
+        """Returns a list of Triple objects containing trait data for all EOL pages
+        with the given scientific name, in the order of their page IDs. See
+        `get_eol_page_ids_for_scientific_name` and `get_trait_data_for_eol_page_id`.
+        """
+        page_ids = self.get_eol_page_ids_for_scientific_name(scientific_name)
+        trait_data = self.get_trait_data_for_eol_page_ids(
+            page_ids, filter_for_predicates=filter_for_predicates
+        )
+        return [triple for triples in trait_data.values() for triple in triples]
+
+    def _get_data_handler_index(self, getter_name: str):
+        get_index = getattr(self.data_handler, getter_name, None)
+        if get_index is None:
+            raise ValueError(
+                f"The data handler {type(self.data_handler).__name__} does not "
+                f"provide '{getter_name}'! Use e.g. the EolTraitCsvHandler."
+            )
+        return get_index()
+
+    def get_trait_data_for_taxon_subtree(
+        self,
+        eol_page_id: Union[str, int],
+        filter_for_predicates: Optional[Set[str]] = None,
+        max_depth: Optional[int] = None,
+    ) -> List[Triple]:
+        """Returns a list of Triple objects containing trait data for the taxon of
+        the given EOL page ID and all taxa below it (e.g. all species of a genus).
+
+        If given `max_depth`, only taxa up to this number of levels below the given
+        taxon are considered. `filter_for_predicates` works as in
+        `get_trait_data_for_eol_page_id`.
+        """
+        triples = self.iter_trait_data_for_taxon_subtree(
+            eol_page_id,
+            filter_for_predicates=filter_for_predicates,
+            max_depth=max_depth,
+        )
+        return deduplicate_triples(triples)
+
+    def iter_trait_data_for_taxon_subtree(
+        self,
+        eol_page_id: Union[str, int],
+        filter_for_predicates: Optional[Set[str]] = None,
+        max_depth: Optional[int] = None,
+    ) -> Iterator[Triple]:
+        """Yields unique Triple objects containing trait data for the taxon of the
+        given EOL page ID and all taxa below it, as soon as they are available.
+        """
+        non_normalized_records = self.data_handler.iterate_subtree_data_by_page_id(
+            eol_page_id, max_depth=max_depth
+        )
+        triples = self._generate_triples(non_normalized_records, filter_for_predicates)
+        return iterate_unique_triples(triples)
+
+    def _generate_triples(
+        self,
+        non_normalized_records: Iterable[dict],
+        filter_for_predicates: Optional[Set[str]],
+    ) -> Generator[Triple, None, None]:
+        triple_generator = TripleGenerator()
+        for non_normalized_data in non_normalized_records:
             normalized_data = self.data_normalizer.normalize(non_normalized_data)
-            generated_triples = triple_generator.create_triples(normalized_data)
-            triples.update(generated_triples)
+            for triple in triple_generator.create_triples(normalized_data):
+                if filter_for_predicates and (
+                    triple.predicate not in filter_for_predicates
+                ):
+                    continue
+                yield triple
+
+    def get_trait_data_delta(
+        self,
+        snapshot_file_path: Union[str, pathlib.Path],
+        eol_page_ids: Optional[Iterable[Union[str, int]]] = None,
+        update_snapshot: bool = True,
+    ) -> TripleDelta:
+        """Returns only the triples that were added or removed since the harvest
+        stored in the given snapshot file.
+
+        If no `eol_page_ids` are given, the complete data source is compared (this
+        is only sensible for the CSV source). Otherwise, only the data of the given
+        EOL page IDs is compared.
+        If the snapshot file does not exist yet, all triples are reported as added.
+        The snapshot is updated to the current state, if `update_snapshot` is True.
+        """
+        page_ids = None
+        if eol_page_ids is None:
+            non_normalized_records = self.data_handler.iterate()
+        else:
+            page_ids = [str(int(eol_page_id)) for eol_page_id in eol_page_ids]
+            non_normalized_records = itertools.chain.from_iterable(
+                self.data_handler.iterate_data_by_key(key="page_id", value=int(page_id))
+                for page_id in page_ids
+            )
 
-        filtered_triples = filter_triples_for_predicates(triples, filter_for_predicates)
-        return deduplicate_triples(filtered_triples)
+        with TraitSnapshot(snapshot_file_path) as snapshot:
+            delta = compute_triple_delta(
+                non_normalized_records,
+                self.data_normalizer,
+                snapshot,
+                page_ids=page_ids,
+                update_snapshot=update_snapshot,
+            )
+
+        self.logger.info(
+            "Delta harvest: %d added, %d changed, %d removed records.",
+            len(delta.added_record_ids),
+            len(delta.changed_record_ids),
+            len(delta.removed_record_ids),
+        )
+        return delta
 
 
 def filter_triples_for_predicates(
@@ -118,5 +643,14 @@ def filter_triples_for_predicates(
     return filtered_triples
 
 
+def _filter_sorted_triples(
+    triples: List[Triple], filter_for_predicates: Optional[Set[str]]
+) -> List[Triple]:
+    """Like `filter_triples_for_predicates`, but keeps the order of the triples."""
+    if not filter_for_predicates:
+        return triples
+    return [t for t in triples if t.predicate in filter_for_predicates]
+
+
 class IdentifierConverterNotSetError(Exception):
     """Should be raised when the IdentifierConverter is called but is set to None."""
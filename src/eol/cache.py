@@ -0,0 +1,398 @@
+"""Module for caching the generated triples of EOL pages within and across processes.
+
+A `MemoizationCache` keeps the results of the most recently requested pages in the
+memory of the current process.
+
+
+A `TripleCache` stores the triples per EOL page ID in a pluggable storage backend:
+    * `SqliteCacheBackend` stores the entries in a local SQLite file, which can be
+      shared by all worker processes on the same machine.
+    * `RedisCacheBackend` stores the entries on a Redis-compatible server, which can
+      be shared by workers on different machines. Any client object offering the
+      used subset of the redis-py API works, so the server can be replaced by a
+      local stand-in.
+
+Both backends evict the least recently used entries, if they hold more than
+`max_entries` entries. Each entry is tied to the version of the source data (see
+`DataHandler.get_source_version`), so a changed source never serves stale data.
+"""
+
+import hashlib
+import pathlib
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import (
+    Callable,
+    FrozenSet,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+    Union,
+)
+
+from eol.delta import deserialize_triples, serialize_triples
+from eol.metrics import metrics_registry
+from eol.triple_generator import Triple
+
+
+class CacheBackend(Protocol):
+    """An interface class for the storages of a TripleCache."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the value stored for the key, or None."""
+
+    def set(self, key: str, value: bytes) -> None:
+        """Stores the value for the key and evicts old entries, if necessary."""
+
+    def delete(self, key: str) -> None:
+        """Removes the entry for the key, if it exists."""
+
+    def clear(self) -> None:
+        """Removes all entries."""
+
+
+class SqliteCacheBackend:
+    """Stores cache entries in a local SQLite file.
+    This is a CacheBackend class and obeys the CacheBackend interface.
+    """
+
+    def __init__(
+        self, cache_file_path: Union[str, pathlib.Path], max_entries: int = 100_000
+    ):
+        self.cache_file_path = pathlib.Path(cache_file_path)
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(self.cache_file_path), timeout=30, check_same_thread=False
+        )
+        # Allows concurrent readers while a single process writes
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._connection.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the value stored for the key, or None."""
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._connection.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            return row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        """Stores the value for the key and evicts the least recently used entries,
+        if there are more than `max_entries` entries.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            (number_of_entries,) = self._connection.execute(
+                "SELECT COUNT(*) FROM entries"
+            ).fetchone()
+            if number_of_entries > self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    "SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+                    (number_of_entries - self.max_entries,),
+                )
+
+    def delete(self, key: str) -> None:
+        """Removes the entry for the key, if it exists."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        self._connection.close()
+
+
+class RedisCacheBackend:
+    """Stores cache entries on a Redis-compatible server.
+    This is a CacheBackend class and obeys the CacheBackend interface.
+
+    The recency of the entries is tracked in a sorted set, so the eviction does not
+    depend on the memory policy of the server.
+    """
+
+    def __init__(self, client, max_entries: int = 100_000, prefix: str = "eol"):
+        self.client = client
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._recency_key = f"{prefix}:recency"
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCacheBackend":
+        """Connects to the Redis server with the given URL. Requires the `redis`
+        package.
+        """
+        import redis  # pylint: disable=import-outside-toplevel
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the value stored for the key, or None."""
+        value = self.client.get(self._value_key(key))
+        if value is not None:
+            self.client.zadd(self._recency_key, {key: time.time()})
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """Stores the value for the key and evicts the least recently used entries,
+        if there are more than `max_entries` entries.
+        """
+        self.client.set(self._value_key(key), value)
+        self.client.zadd(self._recency_key, {key: time.time()})
+
+        number_of_entries = self.client.zcard(self._recency_key)
+        if number_of_entries > self.max_entries:
+            evicted_keys = self.client.zrange(
+                self._recency_key, 0, number_of_entries - self.max_entries - 1
+            )
+            for evicted_key in evicted_keys:
+                if isinstance(evicted_key, bytes):
+                    evicted_key = evicted_key.decode("utf-8")
+                self.delete(evicted_key)
+
+    def delete(self, key: str) -> None:
+        """Removes the entry for the key, if it exists."""
+        self.client.delete(self._value_key(key))
+        self.client.zrem(self._recency_key, key)
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        for key in self.client.zrange(self._recency_key, 0, -1):
+            if isinstance(key, bytes):
+                key = key.decode("utf-8")
+            self.client.delete(self._value_key(key))
+        self.client.delete(self._recency_key)
+
+    def _value_key(self, key: str) -> str:
+        return f"{self.prefix}:value:{key}"
+
+
+class TripleCache:
+    """Caches the triples of EOL pages in a CacheBackend.
+    The entries are compressed and keyed by the version of the source data.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    def get(
+        self, eol_page_id: Union[str, int], source_version: str
+    ) -> Optional[List[Triple]]:
+        """Returns the cached triples of the page, or None on a cache miss."""
+        value = self.backend.get(self.create_key(eol_page_id, source_version))
+        if value is None:
+            metrics_registry.increment("eol_triple_cache_misses_total")
+            return None
+
+        metrics_registry.increment("eol_triple_cache_hits_total")
+        return deserialize_triples(zlib.decompress(value).decode("utf-8"))
+
+    def set(
+        self, eol_page_id: Union[str, int], source_version: str, triples: List[Triple]
+    ) -> None:
+        """Stores the triples of the page."""
+        value = zlib.compress(serialize_triples(triples).encode("utf-8"))
+        self.backend.set(self.create_key(eol_page_id, source_version), value)
+
+    def invalidate(self, eol_page_id: Union[str, int], source_version: str) -> None:
+        """Removes the cached triples of the page."""
+        self.backend.delete(self.create_key(eol_page_id, source_version))
+
+    @staticmethod
+    def create_key(eol_page_id: Union[str, int], source_version: str) -> str:
+        """Returns the cache key of a page for the given source version."""
+        version_hash = hashlib.blake2b(
+            source_version.encode("utf-8"), digest_size=8
+        ).hexdigest()
+        return f"triples:{version_hash}:{int(eol_page_id)}"
+
+
+@dataclass
+class CacheStatistics:
+    """Holds the usage counts of a MemoizationCache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+# The page ID and the predicate filter
+MemoizationKey = Tuple[int, Optional[FrozenSet[str]]]
+# The triples, their size in bytes and their expiry time
+_MemoizationEntry = Tuple[List[Triple], int, float]
+
+
+class MemoizationCache:
+    """An in-process LRU cache for the triples of EOL pages.
+
+    The entries are keyed by the page ID and the predicate filter. The cache is
+    bounded by the number of entries (`max_entries`) and, optionally, by the
+    estimated memory size of the cached triples (`max_bytes`). If `ttl_seconds` is
+    given, entries older than this are not served anymore.
+
+    The cached lists are returned as shallow copies, so changing a returned list
+    does not change the cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.statistics = CacheStatistics()
+
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[MemoizationKey, _MemoizationEntry]" = OrderedDict()
+        self._size_in_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_in_bytes(self) -> int:
+        """The estimated memory size of all cached triples."""
+        return self._size_in_bytes
+
+    def get(
+        self,
+        eol_page_id: Union[str, int],
+        filter_for_predicates: Optional[Set[str]] = None,
+    ) -> Optional[List[Triple]]:
+        """Returns the cached triples, or None if there are none or they expired."""
+        key = self.create_key(eol_page_id, filter_for_predicates)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.statistics.misses += 1
+                return None
+
+            triples, _, expiry_time = entry
+            if expiry_time < self._clock():
+                self._remove(key)
+                self.statistics.expirations += 1
+                self.statistics.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.statistics.hits += 1
+            return list(triples)
+
+    def set(
+        self,
+        eol_page_id: Union[str, int],
+        filter_for_predicates: Optional[Set[str]],
+        triples: List[Triple],
+    ) -> None:
+        """Stores the triples and evicts the least recently used entries, if the
+        cache exceeds its limits.
+        """
+        key = self.create_key(eol_page_id, filter_for_predicates)
+        size = estimate_size_of_triples(triples)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        expiry_time = (
+            self._clock() + self.ttl_seconds
+            if self.ttl_seconds is not None
+            else float("inf")
+        )
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (list(triples), size, expiry_time)
+            self._size_in_bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._size_in_bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.statistics.evictions += 1
+
+    def invalidate(self, eol_page_id: Optional[Union[str, int]] = None) -> None:
+        """Removes all entries of the given page, regardless of the predicate
+        filter. If no page ID is given, all entries are removed.
+        """
+        with self._lock:
+            if eol_page_id is None:
+                self._entries.clear()
+                self._size_in_bytes = 0
+                return
+
+            page_id = int(eol_page_id)
+            for key in [key for key in self._entries if key[0] == page_id]:
+                self._remove(key)
+
+    @staticmethod
+    def create_key(
+        eol_page_id: Union[str, int],
+        filter_for_predicates: Optional[Set[str]] = None,
+    ) -> MemoizationKey:
+        """Returns the cache key of a page and predicate filter. An empty filter is
+        the same as no filter.
+        """
+        if not filter_for_predicates:
+            return int(eol_page_id), None
+        return int(eol_page_id), frozenset(filter_for_predicates)
+
+    def _remove(self, key: MemoizationKey) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._size_in_bytes -= size
+
+
+def estimate_size_of_triples(triples: List[Triple]) -> int:
+    """Returns a rough estimate of the memory used by the triples in bytes.
+    Strings shared between triples are counted for each triple.
+    """
+    return sys.getsizeof(triples) + sum(
+        estimate_size_of_triple(triple) for triple in triples
+    )
+
+
+def estimate_size_of_triple(triple: Triple) -> int:
+    """Returns a rough estimate of the memory used by the triple in bytes."""
+    return (
+        sys.getsizeof(triple)
+        + sys.getsizeof(triple.__dict__)
+        + sum(sys.getsizeof(value) for value in triple.__dict__.values())
+    )
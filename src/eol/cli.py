@@ -0,0 +1,520 @@
+"""The `eol-harvest` command line interface.
+
+Harvests the trait data of all EOL page IDs (or GBIF IDs) in an input file and
+streams the triples to a JSON lines or CSV file. The pages are processed in batches
+by a pool of worker threads. With a checkpoint directory, an interrupted harvest
+resumes with the pages that were not written yet.
+
+Example:
+    eol-harvest page_ids.txt --handler api --workers 8 --output traits.jsonl
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import dataclasses
+import json
+import logging
+import os
+import pathlib
+import sys
+import time
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+)
+
+from eol import EncyclopediaOfLifeProcessing
+from eol.cache import SqliteCacheBackend, TripleCache
+from eol.conversions import create_identifier_converter
+from eol.data import DataProvider
+from eol.external_sort import OutOfCoreTripleDeduplicator
+from eol.handlers import (
+    EolTraitApiHandler,
+    EolTraitCsvHandler,
+)
+from eol.normalization import EolTraitApiNormalizer, EolTraitCsvNormalizer
+from eol.triple_generator import Triple
+from eol.triple_store import TripleStore
+
+CHECKPOINT_FILE_NAME = "completed_page_ids.txt"
+CACHE_FILE_NAME = "triple_cache.sqlite"
+TRIPLE_FIELD_NAMES = [field.name for field in dataclasses.fields(Triple)]
+
+logger = logging.getLogger(__name__)
+
+
+class TripleWriter(Protocol):
+    """An interface class for the writers of the harvested triples."""
+
+    def write(self, triples: Iterable[Triple]) -> None:
+        """Writes the given triples."""
+
+    def flush(self) -> None:
+        """Flushes the written triples to the output."""
+
+
+class JsonLinesTripleWriter:
+    """Writes one JSON object per triple and line."""
+
+    def __init__(self, output_file: TextIO):
+        self.output_file = output_file
+
+    def write(self, triples: Iterable[Triple]) -> None:
+        for triple in triples:
+            self.output_file.write(json.dumps(dataclasses.asdict(triple)))
+            self.output_file.write("\n")
+
+    def flush(self) -> None:
+        self.output_file.flush()
+
+
+class CsvTripleWriter:
+    """Writes one CSV row per triple. The header is only written to empty files."""
+
+    def __init__(self, output_file: TextIO):
+        self.output_file = output_file
+        self._writer = csv.DictWriter(output_file, fieldnames=TRIPLE_FIELD_NAMES)
+        if not output_file.seekable() or output_file.tell() == 0:
+            self._writer.writeheader()
+
+    def write(self, triples: Iterable[Triple]) -> None:
+        self._writer.writerows(dataclasses.asdict(triple) for triple in triples)
+
+    def flush(self) -> None:
+        self.output_file.flush()
+
+
+TRIPLE_WRITERS: Dict[str, Callable[[TextIO], TripleWriter]] = {
+    "jsonl": JsonLinesTripleWriter,
+    "csv": CsvTripleWriter,
+}
+
+
+class SortedTripleWriter:
+    """Spills all triples to disk and writes them deduplicated and sorted by subject
+    and predicate to the wrapped writer on `finish`. Only roughly
+    `memory_budget_bytes` of triples are held in memory at once.
+    """
+
+    def __init__(
+        self,
+        writer: TripleWriter,
+        memory_budget_bytes: int,
+        spill_directory: Optional[pathlib.Path] = None,
+    ):
+        self.writer = writer
+        self.deduplicator = OutOfCoreTripleDeduplicator(
+            memory_budget_bytes, spill_directory
+        )
+
+    def write(self, triples: Iterable[Triple]) -> None:
+        self.deduplicator.add(triples)
+
+    def flush(self) -> None:
+        # The triples are only written by `finish`
+        pass
+
+    def finish(self) -> None:
+        self.writer.write(self.deduplicator.iterate_sorted())
+        self.writer.flush()
+
+    def close(self) -> None:
+        """Removes the spill files."""
+        self.deduplicator.close()
+
+
+class Checkpoint:
+    """Records the page IDs, whose triples were written completely."""
+
+    def __init__(self, checkpoint_directory: Optional[pathlib.Path]):
+        self.completed_page_ids: Set[int] = set()
+        self._file: Optional[IO[str]] = None
+
+        if checkpoint_directory is not None:
+            checkpoint_directory.mkdir(parents=True, exist_ok=True)
+            checkpoint_file_path = checkpoint_directory / CHECKPOINT_FILE_NAME
+            if checkpoint_file_path.exists():
+                self.completed_page_ids = {
+                    int(line)
+                    for line in checkpoint_file_path.read_text().split()
+                    if line
+                }
+            self._file = open(checkpoint_file_path, "a", encoding="utf-8")
+
+    def add(self, page_ids: Iterable[int]) -> None:
+        page_ids = list(page_ids)
+        self.completed_page_ids.update(page_ids)
+        if self._file is not None:
+            self._file.writelines(f"{page_id}\n" for page_id in page_ids)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+class ProgressReporter:
+    """Reports the number of harvested pages and triples and the throughput."""
+
+    def __init__(
+        self, total_pages: int, interval_seconds: float, output: TextIO = sys.stderr
+    ):
+        self.total_pages = total_pages
+        self.interval_seconds = interval_seconds
+        self.output = output
+        self.pages = 0
+        self.failed_pages = 0
+        self.triples = 0
+
+        self._start_time = time.monotonic()
+        self._last_report_time = self._start_time
+
+    def update(self, pages: int, failed_pages: int, triples: int) -> None:
+        self.pages += pages
+        self.failed_pages += failed_pages
+        self.triples += triples
+
+        now = time.monotonic()
+        if self.interval_seconds >= 0 and (
+            now - self._last_report_time >= self.interval_seconds
+        ):
+            self._last_report_time = now
+            self.report()
+
+    def report(self) -> None:
+        seconds = max(time.monotonic() - self._start_time, 1e-9)
+        self.output.write(
+            f"{self.pages}/{self.total_pages} pages ({self.failed_pages} failed), "
+            f"{self.triples} triples, {self.pages / seconds:.1f} pages/s, "
+            f"{self.triples / seconds:.1f} triples/s\n"
+        )
+        self.output.flush()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Runs the harvest and returns the exit code."""
+    arguments = parse_arguments(argv)
+    logging.basicConfig(
+        level=logging.WARNING if arguments.quiet else logging.INFO,
+        format="%(levelname)s: %(message)s",
+    )
+
+    page_ids = read_page_ids(arguments)
+    eol = create_processing(arguments)
+    checkpoint = Checkpoint(arguments.checkpoint_dir)
+    pending_page_ids = [
+        page_id for page_id in page_ids if page_id not in checkpoint.completed_page_ids
+    ]
+    logger.info(
+        "Harvesting %d pages (%d already completed)",
+        len(pending_page_ids),
+        len(page_ids) - len(pending_page_ids),
+    )
+
+    progress = ProgressReporter(
+        len(pending_page_ids),
+        -1 if arguments.quiet else arguments.progress_interval,
+    )
+    # A resumed harvest appends to the output of the previous run
+    output_file = open_output_file(
+        arguments.output, append=bool(checkpoint.completed_page_ids)
+    )
+    writer = TRIPLE_WRITERS[arguments.format](output_file)
+    sorted_writer: Optional[SortedTripleWriter] = None
+    if arguments.sort:
+        sorted_writer = SortedTripleWriter(
+            writer, arguments.memory_budget * 2**20, arguments.spill_dir
+        )
+    try:
+        harvest(
+            eol,
+            pending_page_ids,
+            sorted_writer or writer,
+            checkpoint,
+            progress,
+            workers=arguments.workers,
+            batch_size=arguments.batch_size,
+            filter_for_predicates=set(arguments.predicate or []),
+        )
+        if sorted_writer is not None:
+            sorted_writer.finish()
+    finally:
+        if sorted_writer is not None:
+            sorted_writer.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+        checkpoint.close()
+
+    if not arguments.quiet:
+        progress.report()
+    return 1 if progress.failed_pages else 0
+
+
+def harvest(  # pylint: disable=too-many-arguments
+    eol: EncyclopediaOfLifeProcessing,
+    page_ids: List[int],
+    writer: TripleWriter,
+    checkpoint: Checkpoint,
+    progress: ProgressReporter,
+    workers: int = 4,
+    batch_size: int = 100,
+    filter_for_predicates: Optional[Set[str]] = None,
+) -> None:
+    """Harvests the pages in batches with a pool of worker threads. The triples of
+    each batch are written by the calling thread, then the batch is checkpointed.
+    The triples of a batch interrupted between both steps are written again
+    on resumption.
+    """
+    batches = iter(
+        page_ids[start : start + batch_size]
+        for start in range(0, len(page_ids), batch_size)
+    )
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        # Only a bounded number of batches is in flight, to bound the memory usage
+        pending = set()
+        for batch in batches:
+            pending.add(
+                executor.submit(harvest_batch, eol, batch, filter_for_predicates)
+            )
+            if len(pending) >= 2 * workers:
+                pending = _write_completed_batches(
+                    pending, writer, checkpoint, progress
+                )
+        while pending:
+            pending = _write_completed_batches(pending, writer, checkpoint, progress)
+
+
+def harvest_batch(
+    eol: EncyclopediaOfLifeProcessing,
+    page_ids: List[int],
+    filter_for_predicates: Optional[Set[str]] = None,
+) -> Tuple[Dict[int, List[Triple]], List[int]]:
+    """Returns the triples of the successfully harvested pages and the IDs of the
+    pages that failed.
+
+    The pages of a batch are harvested at once. If this fails, the pages are
+    harvested one by one to find the failing pages.
+    """
+    try:
+        return (
+            eol.get_trait_data_for_eol_page_ids(
+                page_ids, filter_for_predicates=filter_for_predicates
+            ),
+            [],
+        )
+    except Exception:  # pylint: disable=broad-except
+        logger.warning("Harvesting a batch failed, retrying page by page")
+
+    triples_by_page_id = {}
+    failed_page_ids = []
+    for page_id in page_ids:
+        try:
+            triples_by_page_id[page_id] = eol.get_trait_data_for_eol_page_id(
+                page_id, filter_for_predicates=filter_for_predicates
+            )
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Harvesting EOL page %s failed", page_id)
+            failed_page_ids.append(page_id)
+    return triples_by_page_id, failed_page_ids
+
+
+def _write_completed_batches(pending, writer, checkpoint, progress) -> set:
+    done, pending = concurrent.futures.wait(
+        pending, return_when=concurrent.futures.FIRST_COMPLETED
+    )
+    for future in done:
+        triples_by_page_id, failed_page_ids = future.result()
+        number_of_triples = 0
+        for triples in triples_by_page_id.values():
+            writer.write(triples)
+            number_of_triples += len(triples)
+        writer.flush()
+        checkpoint.add(triples_by_page_id)
+        progress.update(
+            len(triples_by_page_id), len(failed_page_ids), number_of_triples
+        )
+    return pending
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="eol-harvest", description="Harvests trait data from EOL as triples."
+    )
+    parser.add_argument(
+        "input_file",
+        type=pathlib.Path,
+        help="A file with one EOL page ID (or GBIF ID) per line.",
+    )
+    parser.add_argument(
+        "--id-type",
+        choices=["eol", "gbif"],
+        default="eol",
+        help="The type of the IDs in the input file (default: eol).",
+    )
+    parser.add_argument(
+        "--identifier-map",
+        type=pathlib.Path,
+        help="The EOL identifier map CSV file (or its compiled index). "
+        "Required for GBIF IDs.",
+    )
+    parser.add_argument("--handler", choices=["api", "csv", "store"], default="api")
+    parser.add_argument(
+        "--trait-csv",
+        type=pathlib.Path,
+        help="The EOL trait CSV file or archive (csv and store handler).",
+    )
+    parser.add_argument(
+        "--triple-store",
+        type=pathlib.Path,
+        help="The triple store compiled from --trait-csv (store handler).",
+    )
+    parser.add_argument(
+        "--api-token",
+        default=os.environ.get("EOL_API_TOKEN"),
+        help="The EOL API token (api handler, default: $EOL_API_TOKEN).",
+    )
+    parser.add_argument(
+        "--predicate",
+        action="append",
+        help="Only harvest triples with this predicate URI. Can be repeated.",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="The output file, or - for stdout (default).",
+    )
+    parser.add_argument("--format", choices=list(TRIPLE_WRITERS), default="jsonl")
+    parser.add_argument("--workers", type=_positive_int, default=4)
+    parser.add_argument(
+        "--batch-size",
+        type=_positive_int,
+        default=100,
+        help="The number of pages per job and checkpoint (default: 100).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=pathlib.Path,
+        help="Share the generated triples via a cache in this directory.",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=pathlib.Path,
+        help="Record completed pages in this directory to resume a harvest.",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between progress reports on stderr (default: 10).",
+    )
+    parser.add_argument(
+        "--sort",
+        action="store_true",
+        help="Write the triples deduplicated and sorted by subject and predicate, "
+        "after all pages were harvested.",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=_positive_int,
+        default=512,
+        help="The MiB of triples held in memory when sorting (default: 512). "
+        "The remaining triples are spilled to disk.",
+    )
+    parser.add_argument(
+        "--spill-dir",
+        type=pathlib.Path,
+        help="The directory of the spill files when sorting (default: temp dir).",
+    )
+    parser.add_argument("--quiet", action="store_true")
+
+    arguments = parser.parse_args(argv)
+    if arguments.id_type == "gbif" and arguments.identifier_map is None:
+        parser.error("--identifier-map is required for GBIF IDs")
+    if arguments.handler in ("csv", "store") and arguments.trait_csv is None:
+        parser.error(f"--trait-csv is required for the {arguments.handler} handler")
+    if arguments.handler == "store" and arguments.triple_store is None:
+        parser.error("--triple-store is required for the store handler")
+    if arguments.handler == "api" and not arguments.api_token:
+        parser.error("--api-token or $EOL_API_TOKEN is required for the api handler")
+    if arguments.sort and arguments.checkpoint_dir is not None:
+        parser.error("--sort cannot resume a harvest, omit --checkpoint-dir")
+    return arguments
+
+
+def read_page_ids(arguments: argparse.Namespace) -> List[int]:
+    """Returns the unique EOL page IDs of the input file in their order.
+    GBIF IDs are converted to EOL page IDs, unknown GBIF IDs are skipped.
+    """
+    identifiers = [
+        line.strip()
+        for line in arguments.input_file.read_text(encoding="utf-8").splitlines()
+        if line.strip() and not line.startswith("#")
+    ]
+
+    if arguments.id_type == "gbif":
+        converter = create_identifier_converter(
+            arguments.identifier_map, [DataProvider.Gbif]
+        )
+        page_ids = converter.to_eol_page_ids(identifiers, DataProvider.Gbif)
+        unknown_identifiers = int(page_ids.isna().sum())
+        if unknown_identifiers:
+            logger.warning("Skipping %d unknown GBIF IDs", unknown_identifiers)
+        identifiers = page_ids.dropna()
+
+    return list(dict.fromkeys(int(identifier) for identifier in identifiers))
+
+
+def create_processing(arguments: argparse.Namespace) -> EncyclopediaOfLifeProcessing:
+    triple_store = None
+    if arguments.handler == "store":
+        # The CSV file is only read, if a request cannot be served by the store
+        handler = EolTraitCsvHandler(arguments.trait_csv)
+        normalizer = EolTraitCsvNormalizer()
+        triple_store = TripleStore(arguments.triple_store)
+    elif arguments.handler == "csv":
+        handler = EolTraitCsvHandler(arguments.trait_csv)
+        # Loads the data once, before the workers access it concurrently
+        handler.get_data()
+        normalizer = EolTraitCsvNormalizer()
+    else:
+        handler = EolTraitApiHandler(api_credentials=f"JWT {arguments.api_token}")
+        normalizer = EolTraitApiNormalizer()
+
+    triple_cache = None
+    if arguments.cache_dir is not None:
+        arguments.cache_dir.mkdir(parents=True, exist_ok=True)
+        triple_cache = TripleCache(
+            SqliteCacheBackend(arguments.cache_dir / CACHE_FILE_NAME)
+        )
+
+    return EncyclopediaOfLifeProcessing(
+        handler, normalizer, triple_cache=triple_cache, triple_store=triple_store
+    )
+
+
+def open_output_file(output: str, append: bool) -> TextIO:
+    if output == "-":
+        return sys.stdout
+    return open(output, "a" if append else "w", encoding="utf-8", newline="")
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Helpers for sharing a single `EncyclopediaOfLifeProcessing` between threads.
+
+The handlers, the identifier converters, the indexes (`TaxonHierarchy`,
+`TraitIndex`, `ScientificNameIndex`), the caches and the `TripleStore` can be
+shared between threads:
+    * Lazily loaded data (e.g. the trait CSV file) is created once by a
+      `LazyValue`. The first thread creates it and all other threads wait for
+      the result ("single-flight"). Afterwards, it is returned without locking.
+    * Shared data must not be modified. The indexes mark their arrays as
+      read-only by `make_read_only`.
+    * Objects that must not be used concurrently (e.g. HTTP sessions) are lent
+      to one thread at a time by an `ObjectPool`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import threading
+from typing import TYPE_CHECKING, Callable, Generic, Iterator, List, Optional, TypeVar
+
+if TYPE_CHECKING:
+    import numpy as np
+
+T = TypeVar("T")
+
+
+class LazyValue(Generic[T]):
+    """A value created on the first call of `get`, at most once at a time.
+
+    If the creation raises an exception, the exception is raised to the calling
+    thread and the next call of `get` tries again.
+    """
+
+    def __init__(self, create: Callable[[], T]):
+        self._create = create
+        self._value: Optional[T] = None
+        self._is_created = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_created(self) -> bool:
+        """Whether the value was created, i.e. `get` returns without waiting."""
+        return self._is_created
+
+    def get(self) -> T:
+        """Returns the value, creating it if necessary. Concurrent callers wait for
+        the creation of the first caller instead of creating the value themselves.
+        """
+        if self._is_created:
+            return self._value  # type: ignore[return-value]
+
+        with self._lock:
+            # Another thread may have created the value while this one waited
+            if not self._is_created:
+                self._value = self._create()
+                self._is_created = True
+        return self._value  # type: ignore[return-value]
+
+    def reset(self) -> None:
+        """Drops the value. The next call of `get` creates it again."""
+        with self._lock:
+            self._value = None
+            self._is_created = False
+
+
+class ObjectPool(Generic[T]):
+    """Lends objects (e.g. HTTP sessions) to one thread at a time and reuses them.
+
+    An object is created, if no idle object is available. At most `max_idle`
+    returned objects are kept, the others are closed. The objects need a `close`
+    method, which `close` calls for all idle objects.
+    """
+
+    def __init__(self, create: Callable[[], T], max_idle: int):
+        self._create = create
+        self.max_idle = max_idle
+        self._idle_objects: List[T] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def acquire(self) -> Iterator[T]:
+        """Lends an object to the calling thread until the context is left."""
+        pooled_object = self.take()
+        try:
+            yield pooled_object
+        finally:
+            self.give_back(pooled_object)
+
+    def take(self) -> T:
+        """Lends an object until it is passed to `give_back`. Prefer `acquire`, if
+        the object is not needed beyond a single block.
+        """
+        with self._lock:
+            pooled_object = self._idle_objects.pop() if self._idle_objects else None
+        return self._create() if pooled_object is None else pooled_object
+
+    def give_back(self, pooled_object: T) -> None:
+        """Returns an object lent by `take` for reuse, or closes it."""
+        with self._lock:
+            is_kept = len(self._idle_objects) < self.max_idle
+            if is_kept:
+                self._idle_objects.append(pooled_object)
+        if not is_kept:
+            pooled_object.close()  # type: ignore[attr-defined]
+
+    def close(self) -> None:
+        """Closes all idle objects. Lent objects are closed on their return."""
+        with self._lock:
+            idle_objects, self._idle_objects = self._idle_objects, []
+            self.max_idle = 0
+        for idle_object in idle_objects:
+            idle_object.close()  # type: ignore[attr-defined]
+
+
+def make_read_only(array: np.ndarray) -> np.ndarray:
+    """Marks the array as read-only and returns it."""
+    array.flags.writeable = False
+    return array
@@ -6,11 +6,19 @@ from __future__ import annotations
 
 import logging
 import pathlib
-from typing import List, Optional, Union
-
-import pandas as pd
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
 from eol.data import DataProvider, read_csv_file
+from eol.identifier_index import IdentifierMapIndex, is_identifier_map_index
+from eol.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
 
 
 class IdentifierConverter:
@@ -52,7 +60,12 @@ class IdentifierConverter:
             relevant_data_providers = []
 
         self._relevant_data_providers = relevant_data_providers
+        # Guards the creation of the data frame and of the bulk lookups
+        self._lock = threading.RLock()
         self._csv_dataframe = None
+        self._bulk_lookups: Dict[
+            tuple, Tuple[pd.Index, pd.api.extensions.ExtensionArray]
+        ] = {}
 
         self.logger = logging.getLogger(__name__)
 
@@ -66,10 +79,11 @@ class IdentifierConverter:
         """Takes the update to the lists and converts the DataProviders into their
         IDs.
         """
-        self._relevant_data_providers = data_providers
+        with self._lock:
+            self._relevant_data_providers = data_providers
 
-        # You have to update the data_frame with the new data providers
-        self._create_data_frame()
+            # You have to update the data_frame with the new data providers
+            self._create_data_frame()
 
     @property
     def relevant_data_provider_ids(self) -> List[str]:
@@ -80,9 +94,16 @@ class IdentifierConverter:
     def data_frame(self) -> pd.DataFrame:
         """Read only access to the underlying dataframe."""
         if self._csv_dataframe is None:
-            self._create_data_frame()
+            with self._lock:
+                # Another thread may have read the file while this one waited
+                if self._csv_dataframe is None:
+                    self._create_data_frame()
         return self._csv_dataframe
 
+    def preload(self) -> None:
+        """Reads the mapping file, which otherwise happens on the first conversion."""
+        self.data_frame  # pylint: disable=pointless-statement
+
     def to_eol_page_id(
         self,
         identifier: Union[str, int, list[Union[str, int]]],
@@ -123,6 +144,55 @@ class IdentifierConverter:
             column_to_return=self.CORRESPONDING_ID_ROW_NAME,
         )
 
+    def to_eol_page_ids(
+        self,
+        identifiers: Union[np.ndarray, pd.Series, List[Union[str, int, None]]],
+        data_provider: Optional[DataProvider] = None,
+    ) -> pd.arrays.IntegerArray:
+        """Returns the corresponding EOL page IDs for an array of provider IDs.
+
+        The result is a nullable integer array of the same length and order as the
+        given identifiers. If no corresponding EOL page ID exists, the value is <NA>.
+        If a `data_provider` is given, only IDs of this provider are considered.
+        Otherwise, an ambiguous identifier resolves to the first match in the
+        mapping file.
+        """
+        identifiers = pd.Series(identifiers, copy=False)
+        # Joining on integers is much faster than on strings, so numeric input is
+        # matched against the numeric provider IDs.
+        integer_keys = pd.api.types.is_numeric_dtype(identifiers.dtype)
+        return self._lookup_bulk(
+            keys=(
+                _as_integer_keys(identifiers)
+                if integer_keys
+                else _as_string_keys(identifiers)
+            ),
+            key_column_name=self.CORRESPONDING_ID_ROW_NAME,
+            value_column_name=self.EOL_PAGE_ID_ROW_NAME,
+            data_provider=data_provider,
+            integer_keys=integer_keys,
+        )
+
+    def from_eol_page_ids(
+        self,
+        eol_page_ids: Union[np.ndarray, pd.Series, List[Union[str, int, None]]],
+        data_provider: Optional[DataProvider] = None,
+    ) -> pd.arrays.StringArray:
+        """Returns the corresponding provider IDs for an array of EOL page IDs.
+
+        The result is a nullable string array of the same length and order as the
+        given EOL page IDs, since provider IDs are not necessarily numeric. If no
+        corresponding ID exists, the value is <NA>. Ambiguities are resolved as in
+        `to_eol_page_ids`.
+        """
+        return self._lookup_bulk(
+            keys=_as_integer_keys(eol_page_ids),
+            key_column_name=self.EOL_PAGE_ID_ROW_NAME,
+            value_column_name=self.CORRESPONDING_ID_ROW_NAME,
+            data_provider=data_provider,
+            integer_keys=True,
+        )
+
     def _create_data_frame(self):
         column_number_of_provider_ids = 2
         column_index = (column_number_of_provider_ids,) * len(
@@ -135,8 +205,70 @@ class IdentifierConverter:
             column_index=column_index,
             dtypes=self.CSV_DTYPES,
         )
+        self._bulk_lookups = {}
         self.logger.info("Done!")
 
+    def _lookup_bulk(
+        self,
+        keys: Union[pd.Index, pd.Series],
+        key_column_name: str,
+        value_column_name: str,
+        data_provider: Optional[DataProvider] = None,
+        integer_keys: bool = False,
+    ) -> pd.api.extensions.ExtensionArray:
+        lookup_index, lookup_values = self._get_bulk_lookup(
+            key_column_name, value_column_name, data_provider, integer_keys
+        )
+        positions = lookup_index.get_indexer(keys)
+        return lookup_values.take(positions, allow_fill=True)
+
+    def _get_bulk_lookup(
+        self,
+        key_column_name: str,
+        value_column_name: str,
+        data_provider: Optional[DataProvider] = None,
+        integer_keys: bool = False,
+    ) -> Tuple[pd.Index, pd.api.extensions.ExtensionArray]:
+        """Returns a hash index over the unique keys and the corresponding values.
+        If `integer_keys` is True, keys that are not numeric are dropped.
+        The lookups are cached until the data frame is recreated.
+        """
+        lookup_key = (key_column_name, value_column_name, data_provider, integer_keys)
+        lookup = self._bulk_lookups.get(lookup_key)
+        if lookup is None:
+            with self._lock:
+                lookup = self._bulk_lookups.get(lookup_key)
+                if lookup is None:
+                    lookup = self._create_bulk_lookup(*lookup_key)
+                    self._bulk_lookups[lookup_key] = lookup
+        return lookup
+
+    def _create_bulk_lookup(
+        self,
+        key_column_name: str,
+        value_column_name: str,
+        data_provider: Optional[DataProvider],
+        integer_keys: bool,
+    ) -> Tuple[pd.Index, pd.api.extensions.ExtensionArray]:
+        df = self.data_frame
+        if data_provider is not None:
+            df = df.loc[df[self.DATA_PROVIDER_ID_ROW_NAME] == int(data_provider)]
+
+        keys = (
+            _as_integer_keys(df[key_column_name])
+            if integer_keys
+            else _as_string_keys(df[key_column_name])
+        )
+        is_unique_key = keys.notna() & ~keys.duplicated(keep="first")
+
+        value_dtype = (
+            "Int64" if value_column_name == self.EOL_PAGE_ID_ROW_NAME else "string"
+        )
+        return (
+            pd.Index(keys[is_unique_key]),
+            pd.array(df.loc[is_unique_key, value_column_name], dtype=value_dtype),
+        )
+
     def _access_dataframe_for_id(
         self,
         id_provider_column_name: str,
@@ -155,7 +287,7 @@ class IdentifierConverter:
             )
         else:
             result = self._process_list(  # type: ignore
-                search_value, self.data_frame, id_provider_column_name, column_to_return
+                search_value, id_provider_column_name, column_to_return, data_provider
             )
 
         return result
@@ -191,15 +323,131 @@ class IdentifierConverter:
     def _process_list(
         self,
         values: list[Union[str, int]],
-        df: pd.DataFrame,
         id_provider_column_name: str,
         column_to_return: str,
+        data_provider: Optional[DataProvider] = None,
     ) -> list[Optional[str]]:
-        df_for_search_values = df.loc[df[id_provider_column_name].isin(values)]
+        if id_provider_column_name == self.CORRESPONDING_ID_ROW_NAME:
+            ids = self.to_eol_page_ids(values, data_provider)
+        else:
+            ids = self.from_eol_page_ids(values, data_provider)
+
+        return [None if pd.isna(v) else str(v) for v in ids]
 
-        search_value_look_up = {
-            row[id_provider_column_name]: str(row[column_to_return])
-            for _, row in df_for_search_values.iterrows()
-        }
 
-        return [search_value_look_up.get(v) for v in values]
+class IndexedIdentifierConverter(IdentifierConverter):
+    """An IdentifierConverter backed by a compiled identifier map index (see
+    `eol.identifier_index.compile_identifier_map_index`).
+
+    Opening the index takes milliseconds and changing the relevant data providers
+    does not require re-reading any data.
+    """
+
+    def __init__(
+        self,
+        index_directory: Union[str, pathlib.Path],
+        relevant_data_providers: Union[List[DataProvider], DataProvider] = None,
+    ):
+        super().__init__(index_directory, relevant_data_providers)
+        self.index = IdentifierMapIndex(index_directory)
+
+    @property
+    def data_frame(self) -> pd.DataFrame:
+        """Read only access to the index data of the relevant data providers.
+        The DataFrame is created on each access. Avoid it for lookups.
+        """
+        return self.index.to_data_frame(self._relevant_provider_ids())
+
+    def preload(self) -> None:
+        """Nothing to do, since the index is memory-mapped."""
+
+    def _create_data_frame(self):
+        # All data providers are in the index, only the cached lookups are reset
+        self._bulk_lookups = {}
+
+    def _lookup_bulk(
+        self,
+        keys: Union[pd.Index, pd.Series],
+        key_column_name: str,
+        value_column_name: str,
+        data_provider: Optional[DataProvider] = None,
+        integer_keys: bool = False,
+    ) -> pd.api.extensions.ExtensionArray:
+        provider_ids = (
+            self._relevant_provider_ids()
+            if data_provider is None
+            else [int(data_provider)]
+        )
+        rows = self.index.find_rows(key_column_name, pd.Series(keys), provider_ids)
+        return self.index.get_values(value_column_name, rows)
+
+    def _access_dataframe_for_id(
+        self,
+        id_provider_column_name: str,
+        search_value: Union[str, int, list[Union[str, int]]],
+        column_to_return: str,
+        data_provider: DataProvider = None,
+    ) -> Optional[Union[Optional[str], List[Optional[str]]]]:
+        if not isinstance(search_value, (str, int)):
+            return self._process_list(
+                search_value, id_provider_column_name, column_to_return, data_provider
+            )
+
+        rows = self.index.find_all_rows(
+            id_provider_column_name, search_value, self._relevant_provider_ids()
+        )
+        if len(rows) == 0:
+            return None
+
+        if len(rows) > 1 and data_provider is not None:
+            rows = rows[self.index.providers[rows] == int(data_provider)]
+
+        corresponding_ids: List[Optional[str]] = [
+            str(value) for value in self.index.get_values(column_to_return, rows)
+        ]
+        return (
+            corresponding_ids[0] if len(corresponding_ids) == 1 else corresponding_ids
+        )
+
+    def _relevant_provider_ids(self) -> Optional[List[int]]:
+        # Without relevant data providers, all data providers are considered
+        if not self.relevant_data_providers:
+            return None
+        return [int(data_provider) for data_provider in self.relevant_data_providers]
+
+
+def create_identifier_converter(
+    provider_file_path: Union[str, pathlib.Path],
+    relevant_data_providers: Union[List[DataProvider], DataProvider] = None,
+) -> IdentifierConverter:
+    """Returns an IndexedIdentifierConverter, if the given path is a compiled
+    identifier map index, or else an IdentifierConverter reading the CSV file.
+    """
+    if is_identifier_map_index(provider_file_path):
+        return IndexedIdentifierConverter(provider_file_path, relevant_data_providers)
+    return IdentifierConverter(provider_file_path, relevant_data_providers)
+
+
+def _as_string_keys(values) -> pd.Series:
+    """Converts arbitrary identifiers into a nullable string series. Floating point
+    numbers (e.g. integer IDs with missing values) are converted into integers first.
+    """
+    series = pd.Series(values, copy=False)
+    if pd.api.types.is_float_dtype(series.dtype):
+        series = _as_whole_numbers(series)
+    return series.astype("string")
+
+
+def _as_integer_keys(values) -> pd.Series:
+    """Converts arbitrary identifiers into a nullable integer series. Identifiers,
+    which are not whole numbers, become <NA>.
+    """
+    series = pd.Series(values, copy=False)
+    if not pd.api.types.is_integer_dtype(series.dtype):
+        series = _as_whole_numbers(pd.to_numeric(series, errors="coerce"))
+    return series.astype("Int64")
+
+
+def _as_whole_numbers(series: pd.Series) -> pd.Series:
+    """Returns the numbers as nullable integers, with <NA> for fractional numbers."""
+    return series.where(series % 1 == 0).astype("Int64")
@@ -0,0 +1,257 @@
+"""Building the Cypher queries sent to the EOL Cypher API.
+
+The values of a query (e.g. the page IDs) are passed as parameters (`$page_ids`)
+instead of literals in the query text. The query text is the same for all
+values, which lets Neo4j reuse its cached query plan, and the values are sent in
+the request body, where many page IDs fit into a single request:
+
+    query = TraitQueryBuilder(return_variables, "t.eol_pk").by_page_ids(
+        [311544, 46523853], limit=1000
+    )
+    query.page(skip=1000)
+    # CypherQuery(text='UNWIND $page_ids AS page_id ... SKIP $skip LIMIT $limit',
+    #             parameters={'page_ids': [311544, 46523853], 'skip': 1000,
+    #                         'limit': 1000}, limit=1000, keyset_parameter=None)
+
+Queries of subtrees are paged by keyset instead (`CypherQuery.page_after`): each
+page continues after the last `t.eol_pk` of the previous page, so the server
+does not produce the rows of the previous pages again.
+"""
+
+import dataclasses
+import json
+import re
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+# The variable of the row count returned by count queries
+COUNT_VARIABLE = "row_count"
+
+# A variable or a property of a variable, e.g. "p" or "pred.uri"
+PROPERTY_PATTERN = re.compile(r"[A-Za-z_]\w*(\.[A-Za-z_]\w*)?")
+PARAMETER_PATTERN = re.compile(r"\$(\w+)")
+INTEGER_PATTERN = re.compile(r"-?[0-9]+")
+
+# The part of all trait queries following the selection of the pages
+TRAIT_MATCH_CLAUSES = """(t:Trait)<-[:trait]-(p),
+    (t)-[:supplier]->(r:Resource),
+    (t)-[:predicate]->(pred:Term)"""
+OPTIONAL_TRAIT_MATCH_CLAUSES = """OPTIONAL MATCH (t)-[:object_term]->(obj:Term)
+    OPTIONAL MATCH (t)-[:normal_units_term]->(units:Term)"""
+
+
+@dataclasses.dataclass(frozen=True)
+class CypherQuery:
+    """A Cypher query and the values of its parameters.
+
+    The `limit` is the number of rows per page of a paging. The query text must
+    not contain SKIP and LIMIT, they are added for each page by `page`. Queries
+    with a `keyset_parameter` can be paged by `page_after` as well.
+    """
+
+    text: str
+    parameters: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    limit: Optional[int] = None
+    # The parameter of the ordering value, after which the rows of a page start
+    keyset_parameter: Optional[str] = None
+
+    @classmethod
+    def from_string(cls, cypher_query_string: str) -> "CypherQuery":
+        """Converts a query string ending with a literal LIMIT (e.g.
+        "MATCH (t:Trait) RETURN t LIMIT 100;") into a query with this limit.
+        """
+        text, limit_count = split_limit_from_cypher_query(cypher_query_string)
+        return cls(text.strip(), limit=limit_count)
+
+    def page(self, skip: int, limit: Optional[int] = None) -> "CypherQuery":
+        """Returns the query for `limit` (default: `self.limit`) rows starting at
+        the row `skip`.
+        """
+        return dataclasses.replace(
+            self,
+            text=f"{self.text} SKIP $skip LIMIT $limit",
+            parameters={**self.parameters, "skip": skip, "limit": self._limit(limit)},
+        )
+
+    def page_after(self, last_value: Any, limit: Optional[int] = None) -> "CypherQuery":
+        """Returns the query for `limit` (default: `self.limit`) rows following the
+        row ordered by `last_value`, or the first rows if `last_value` is None.
+        Unlike by `page`, the rows of the previous pages are not produced again.
+        """
+        if self.keyset_parameter is None:
+            raise ValueError("The query does not support keyset pagination!")
+
+        return dataclasses.replace(
+            self,
+            text=f"{self.text} LIMIT $limit",
+            parameters={
+                **self.parameters,
+                self.keyset_parameter: last_value,
+                "limit": self._limit(limit),
+            },
+        )
+
+    def count(self) -> "CypherQuery":
+        """Returns the query of the number of rows of this query, see
+        `compose_count_cypher_query`.
+        """
+        return dataclasses.replace(
+            self, text=compose_count_cypher_query(self.text), limit=None
+        )
+
+    def _limit(self, limit: Optional[int]) -> int:
+        limit = self.limit if limit is None else limit
+        if limit is None:
+            raise ValueError("You have to provide a LIMIT to your query!")
+        return limit
+
+    def inline_parameters(self) -> str:
+        """Returns the query text with the parameters replaced by their values as
+        Cypher literals, for servers that do not support parameters.
+        """
+
+        def format_parameter(match: re.Match) -> str:
+            name = match.group(1)
+            if name not in self.parameters:
+                raise ValueError(f"The query has no value for the parameter ${name}!")
+            return format_cypher_literal(self.parameters[name])
+
+        return PARAMETER_PATTERN.sub(format_parameter, self.text)
+
+
+class TraitQueryBuilder:
+    """Builds the queries of the trait records of the EOL pages, returning the
+    given variables ordered by `order_by_variable`.
+    """
+
+    def __init__(self, return_variables: Sequence[str], order_by_variable: str):
+        self.return_variables = list(return_variables)
+        self.order_by_variable = order_by_variable
+
+    def by_key(self, key: str, value: Any, limit: int = 100) -> CypherQuery:
+        """Returns the query of the traits whose property `key` (e.g. "pred.uri")
+        has the given value. Strings of digits are compared as integers, since
+        e.g. page IDs are integers in the EOL graph.
+        """
+        if not PROPERTY_PATTERN.fullmatch(key):
+            raise ValueError(f"The key '{key}' is not a Cypher property!")
+        if isinstance(value, str) and INTEGER_PATTERN.fullmatch(value):
+            value = int(value)
+
+        return self._compose_query(
+            "MATCH (p:Page),\n"
+            f"    {TRAIT_MATCH_CLAUSES}\n"
+            f"    WHERE {key} = $value",
+            {"value": value},
+            limit,
+        )
+
+    def by_page_ids(self, page_ids: Iterable[int], limit: int) -> CypherQuery:
+        """Returns the query of the traits of the given EOL pages."""
+        return self._compose_query(
+            "UNWIND $page_ids AS page_id\n"
+            "    MATCH (p:Page),\n"
+            f"    {TRAIT_MATCH_CLAUSES}\n"
+            "    WHERE p.page_id = page_id",
+            {"page_ids": [int(page_id) for page_id in page_ids]},
+            limit,
+        )
+
+    def by_subtree(
+        self, page_id: int, max_depth: Optional[int], limit: int
+    ) -> CypherQuery:
+        """Returns the query of the traits of the given EOL page and all its
+        descendant pages, up to `max_depth` levels below the given page.
+
+        The query is paged by `CypherQuery.page_after` the last value of the
+        `order_by_variable`, since the traversal of a large subtree is too
+        expensive to be repeated for the skipped rows of each page.
+        """
+        # A path length of 0 includes the root page itself. Cypher does not
+        # support parameters in path lengths, so the depth is a literal.
+        path_length = "0.." if max_depth is None else f"0..{int(max_depth)}"
+
+        return self._compose_query(
+            f"MATCH (root:Page)<-[:parent*{path_length}]-(p:Page),\n"
+            f"    {TRAIT_MATCH_CLAUSES}\n"
+            "    WHERE root.page_id = $page_id\n"
+            f"    AND ($after IS NULL OR {self.order_by_variable} > $after)",
+            {"page_id": int(page_id), "after": None},
+            limit,
+            keyset_parameter="after",
+        )
+
+    def _compose_query(
+        self,
+        match_clauses: str,
+        parameters: Dict[str, Any],
+        limit: int,
+        keyset_parameter: Optional[str] = None,
+    ) -> CypherQuery:
+        # The ordering by the unique record ID keeps the pagination stable
+        text = (
+            f"{match_clauses}\n"
+            f"    {OPTIONAL_TRAIT_MATCH_CLAUSES}\n"
+            f"    RETURN {', '.join(self.return_variables)}\n"
+            f"    ORDER BY {self.order_by_variable}"
+        )
+        return CypherQuery(text, parameters, limit, keyset_parameter)
+
+
+def format_cypher_literal(value: Any) -> str:
+    """Returns the Cypher literal of the given value."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        # JSON string escapes are valid in Cypher
+        return json.dumps(value)
+    if isinstance(value, (list, tuple)):
+        return f"[{', '.join(format_cypher_literal(item) for item in value)}]"
+    raise ValueError(f"The value {value!r} cannot be converted into Cypher!")
+
+
+def extract_limit_count_and_string(query_string: str) -> Tuple[int, str]:
+    """Returns the limit count and the complete limit string, in this order."""
+    regex_limit_count = re.search("(LIMIT ([0-9]+))", query_string, re.IGNORECASE)
+
+    if regex_limit_count is None:
+        raise ValueError(
+            f"The given query string '{query_string}' "
+            f"does not stick the convention!"
+        )
+
+    return int(regex_limit_count.group(2)), regex_limit_count.group(1)
+
+
+def split_limit_from_cypher_query(cypher_query_string: str) -> Tuple[str, int]:
+    """Returns the given query without its LIMIT and the LIMIT count."""
+    if "limit" not in cypher_query_string.lower():
+        raise ValueError("You have to provide a LIMIT to your query!")
+
+    # Remove trailing semicolons
+    if cypher_query_string.endswith(";"):
+        cypher_query_string = cypher_query_string[:-1]
+
+    limit_count, limit_string = extract_limit_count_and_string(cypher_query_string)
+
+    # Remove limit count, it has to come after (!) the SKIP
+    return cypher_query_string.replace(limit_string, ""), limit_count
+
+
+def compose_count_cypher_query(cypher_query_string: str) -> str:
+    """Replaces the last RETURN clause of the given query (including any ORDER BY,
+    SKIP and LIMIT) by a RETURN of the number of rows.
+    """
+    return_clauses = list(
+        re.finditer(r"\bRETURN\b", cypher_query_string, re.IGNORECASE)
+    )
+    if not return_clauses:
+        raise ValueError(
+            f"The given query string '{cypher_query_string}' has no RETURN clause!"
+        )
+
+    query_head = cypher_query_string[: return_clauses[-1].start()].rstrip()
+    return f"{query_head} RETURN count(*) AS {COUNT_VARIABLE}"
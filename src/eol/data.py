@@ -1,10 +1,54 @@
+from __future__ import annotations
+
+import bz2
+import concurrent.futures
+import gzip
+import io
+import multiprocessing
+import os
 import pathlib
+import queue
+import threading
+import zipfile
 from enum import Enum
 from functools import partial
 from io import StringIO
-from typing import Generator, List, Tuple, Union
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Callable,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+    cast,
+)
+
+from eol.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+# The default size of the byte ranges parsed by a single worker
+DEFAULT_CSV_CHUNK_SIZE = 64 * 1024**2
+
+QUOTE_CHARACTER = ord('"')
+NEWLINE_CHARACTER = ord("\n")
 
-import pandas as pd
+# Compressed files are decompressed while they are read
+COMPRESSED_FILE_SUFFIXES = (".zip", ".gz", ".bz2", ".zst")
+DECOMPRESSION_BLOCK_SIZE = 1024**2
+# The number of decompressed blocks buffered ahead of the reader
+DECOMPRESSION_QUEUE_SIZE = 16
+# The number of rows parsed at once from a compressed CSV file
+CSV_STREAM_CHUNK_ROWS = 1_000_000
 
 
 class DataProvider(Enum):
@@ -38,12 +82,12 @@ def read_csv_file(
     dtypes: dict = None,
 ) -> pd.DataFrame:
     """Reads an arbitrary large CSV file, filters the data while reading and returns
-    the corresponding DataFrame.
+    the corresponding DataFrame. The file can be compressed (see `open_binary_file`).
 
     `filter_criteria` and `column_index` have to be either None or have to have
     the same length! If neither is the case, a ValueError will be thrown!
     """
-    with open(csv_file_path, "r") as in_file:
+    with open_text_file(csv_file_path) as in_file:
         column_names = next(in_file)  # The first line should be the column names
         data_frame = generate_dataframe_from_stream(
             in_file,
@@ -91,6 +135,311 @@ def generate_dataframe_from_stream(
     return df
 
 
+def read_csv_file_in_parallel(
+    csv_file_path: Union[pathlib.Path, str],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CSV_CHUNK_SIZE,
+    chunk_converter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    archive_member: Optional[str] = None,
+    **read_csv_kwargs,
+) -> pd.DataFrame:
+    """Reads a CSV file with a pool of `workers` processes (default: one per CPU)
+    and returns the concatenated DataFrame.
+
+    The file is split at record boundaries into byte ranges of about `chunk_size`
+    bytes, which are parsed concurrently with `pandas.read_csv` and the given
+    keyword arguments. Line breaks within quoted fields are respected. If given,
+    `chunk_converter` is applied to each parsed range in the worker process.
+
+    Compressed files (see `open_binary_file`) are parsed in chunks while they are
+    decompressed on a separate thread, without a temporary file.
+
+    The worker processes are not forked from the calling process, which may run
+    other threads holding locks, but started by a fork server (or spawned, where
+    this is not available). Scripts loading the data at import time must
+    guard their entry point by `if __name__ == "__main__":`.
+    """
+    if is_compressed_file(csv_file_path):
+        # Compressed files cannot be split, but are decompressed on another thread
+        chunks: Iterable[pd.DataFrame] = iterate_csv_chunks(
+            csv_file_path, archive_member=archive_member, **read_csv_kwargs
+        )
+        if chunk_converter is not None:
+            chunks = map(chunk_converter, chunks)
+        return pd.concat(chunks, ignore_index=True)
+
+    workers = workers or os.cpu_count() or 1
+    boundaries = find_csv_chunk_boundaries(csv_file_path, chunk_size)
+    if workers == 1 or len(boundaries) <= 2:
+        data = pd.read_csv(csv_file_path, **read_csv_kwargs)
+        return chunk_converter(data) if chunk_converter is not None else data
+
+    column_names = pd.read_csv(csv_file_path, nrows=0).columns.tolist()
+    read_range = partial(
+        _read_csv_byte_range,
+        csv_file_path,
+        column_names=column_names,
+        chunk_converter=chunk_converter,
+        **read_csv_kwargs,
+    )
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=_get_worker_process_context()
+    ) as executor:
+        chunks = list(executor.map(read_range, boundaries[:-1], boundaries[1:]))
+
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _get_worker_process_context() -> multiprocessing.context.BaseContext:
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def is_compressed_file(file_path: Union[pathlib.Path, str]) -> bool:
+    """Checks by the file extension, if the file is compressed."""
+    return pathlib.Path(file_path).suffix.lower() in COMPRESSED_FILE_SUFFIXES
+
+
+def open_binary_file(
+    file_path: Union[pathlib.Path, str], archive_member: Optional[str] = None
+) -> IO[bytes]:
+    """Opens the file for reading bytes. Files compressed by zip, gzip, bzip2 or
+    Zstandard (requires the `zstandard` package) are recognized by their extension
+    and decompressed on a separate thread while they are read.
+
+    Of a zip archive, the `archive_member` is read, or the largest CSV file in the
+    archive if not given.
+    """
+    if not is_compressed_file(file_path):
+        return open(file_path, "rb")
+
+    open_stream = partial(
+        _open_decompressing_stream, pathlib.Path(file_path), archive_member
+    )
+    return io.BufferedReader(
+        BackgroundDecompressor(open_stream), buffer_size=DECOMPRESSION_BLOCK_SIZE
+    )
+
+
+def open_text_file(
+    file_path: Union[pathlib.Path, str],
+    archive_member: Optional[str] = None,
+    encoding: Optional[str] = None,
+) -> TextIO:
+    """Opens the (possibly compressed) file for reading text, like
+    `open_binary_file`.
+    """
+    if not is_compressed_file(file_path):
+        return open(file_path, "r", encoding=encoding)
+    return io.TextIOWrapper(
+        open_binary_file(file_path, archive_member), encoding=encoding
+    )
+
+
+def iterate_csv_chunks(
+    csv_file_path: Union[pathlib.Path, str],
+    chunk_rows: int = CSV_STREAM_CHUNK_ROWS,
+    archive_member: Optional[str] = None,
+    **read_csv_kwargs,
+) -> Generator[pd.DataFrame, None, None]:
+    """Yields DataFrames of at most `chunk_rows` rows of the (possibly compressed)
+    CSV file, which is parsed with `pandas.read_csv` and the given keyword arguments.
+    """
+    with open_binary_file(csv_file_path, archive_member) as csv_file:
+        yield from pd.read_csv(csv_file, chunksize=chunk_rows, **read_csv_kwargs)
+
+
+class BackgroundDecompressor(io.RawIOBase):
+    """A readable stream of the data of a decompressing stream, which is read on a
+    separate thread. The decompression overlaps with the processing of the
+    data. At most `queue_size` blocks of `block_size` bytes are read ahead.
+
+    `open_stream` is called on the decompression thread and has to return the
+    decompressing stream, which is closed at the end.
+    """
+
+    def __init__(
+        self,
+        open_stream: Callable[[], IO[bytes]],
+        block_size: int = DECOMPRESSION_BLOCK_SIZE,
+        queue_size: int = DECOMPRESSION_QUEUE_SIZE,
+    ):
+        super().__init__()
+        self.block_size = block_size
+        self._blocks: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._current_block = memoryview(b"")
+        self._is_exhausted = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._decompress,
+            args=(open_stream,),
+            name="eol-decompression",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._current_block:
+            if self._is_exhausted:
+                return 0
+            block = self._blocks.get()
+            if isinstance(block, BaseException):
+                self._is_exhausted = True
+                raise block
+            if not block:
+                self._is_exhausted = True
+                return 0
+            self._current_block = memoryview(block)
+
+        size = min(len(buffer), len(self._current_block))
+        buffer[:size] = self._current_block[:size]
+        self._current_block = self._current_block[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stopped.set()
+            self._thread.join()
+        super().close()
+
+    def _decompress(self, open_stream: Callable[[], IO[bytes]]) -> None:
+        try:
+            with open_stream() as stream:
+                while not self._stopped.is_set():
+                    block = stream.read(self.block_size)
+                    self._put(block)
+                    if not block:
+                        return
+        except BaseException as error:  # pylint: disable=broad-except
+            # The error is raised by the reading thread
+            self._put(error)
+
+    def _put(self, item) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
+def _open_decompressing_stream(
+    file_path: pathlib.Path, archive_member: Optional[str]
+) -> IO[bytes]:
+    suffix = file_path.suffix.lower()
+    if suffix == ".gz":
+        return cast(IO[bytes], gzip.open(file_path, "rb"))
+    if suffix == ".bz2":
+        return bz2.open(file_path, "rb")
+    if suffix == ".zst":
+        import zstandard  # pylint: disable=import-outside-toplevel
+
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(file_path, "rb"), closefd=True
+        )
+
+    archive = zipfile.ZipFile(file_path)
+    if archive_member is None:
+        archive_member = _find_largest_csv_member(archive)
+    # The member keeps the archive file open until it is closed
+    return archive.open(archive_member)
+
+
+def _find_largest_csv_member(archive: zipfile.ZipFile) -> str:
+    csv_members = [
+        member
+        for member in archive.infolist()
+        if member.filename.lower().endswith(".csv")
+    ]
+    if not csv_members:
+        raise ValueError(f"The archive '{archive.filename}' contains no CSV file!")
+    return max(csv_members, key=lambda member: member.file_size).filename
+
+
+def find_csv_chunk_boundaries(
+    csv_file_path: Union[pathlib.Path, str], chunk_size: int
+) -> List[int]:
+    """Returns the byte offsets of the starts of CSV records, which split the
+    records after the header into ranges of about `chunk_size` bytes. The first
+    offset is the end of the header, the last one the file size.
+
+    A line break only starts a new record, if it is preceded by an even number of
+    quote characters (escaped quotes are doubled in CSV files).
+    """
+    file_size = os.path.getsize(csv_file_path)
+    with open(csv_file_path, "rb") as csv_file:
+        header_end = len(csv_file.readline())
+    if file_size - header_end <= chunk_size:
+        return [header_end, file_size]
+
+    data = np.memmap(csv_file_path, dtype=np.uint8, mode="r")
+    targets = list(range(header_end, file_size, chunk_size))[1:]
+    # The parity of quotes from the end of the header to each target
+    quote_counts = [
+        _count_quotes(data, start, stop)
+        for start, stop in zip([header_end] + targets[:-1], targets)
+    ]
+    quote_parities = np.cumsum(quote_counts) % 2
+
+    boundaries = [header_end]
+    for target, quote_parity in zip(targets, quote_parities):
+        # Skips targets within a record, which started before the previous target
+        if target < boundaries[-1]:
+            continue
+        boundary = _find_next_record_start(data, target, quote_parity)
+        if boundary < file_size:
+            boundaries.append(boundary)
+    boundaries.append(file_size)
+    return boundaries
+
+
+def _count_quotes(data: np.ndarray, start: int, stop: int, block_size=2**24) -> int:
+    # Counted in blocks to bound the memory of the comparison result
+    count = 0
+    for offset in range(start, stop, block_size):
+        block = data[offset : min(offset + block_size, stop)]
+        count += int(np.count_nonzero(block == QUOTE_CHARACTER))
+    return count
+
+
+def _find_next_record_start(
+    data: np.ndarray, position: int, quote_parity: int, window_size: int = 2**20
+) -> int:
+    while position < len(data):
+        window = np.asarray(data[position : position + window_size])
+        is_quote = window == QUOTE_CHARACTER
+        is_outside_quotes = (np.cumsum(is_quote) + quote_parity) % 2 == 0
+        record_ends = np.flatnonzero((window == NEWLINE_CHARACTER) & is_outside_quotes)
+        if len(record_ends):
+            return position + int(record_ends[0]) + 1
+
+        quote_parity = (quote_parity + int(is_quote.sum())) % 2
+        position += len(window)
+    return len(data)
+
+
+def _read_csv_byte_range(
+    csv_file_path: Union[pathlib.Path, str],
+    start: int,
+    stop: int,
+    column_names: List[str],
+    chunk_converter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    **read_csv_kwargs,
+) -> pd.DataFrame:
+    with open(csv_file_path, "rb") as csv_file:
+        csv_file.seek(start)
+        content = csv_file.read(stop - start)
+
+    data = pd.read_csv(
+        io.BytesIO(content), header=None, names=column_names, **read_csv_kwargs
+    )
+    return chunk_converter(data) if chunk_converter is not None else data
+
+
 def _filter_stream(
     stream,
     filter_criteria: Tuple[Union[str, int]],
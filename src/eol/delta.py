@@ -0,0 +1,217 @@
+"""Module for harvesting only the changes of the trait data since a previous harvest.
+
+The state of a harvest is stored in a `TraitSnapshot`, which holds a content hash
+and the generated triples for each EOL trait record (identified by its `eol_pk`).
+A subsequent harvest only generates triples for records whose content hash changed
+and reports the added and removed triples.
+"""
+
+import dataclasses
+import hashlib
+import json
+import pathlib
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import eol.variables as variables
+from eol.normalization import Normalizer
+from eol.triple_generator import Triple, TripleGenerator, deduplicate_triples
+
+# SQLite restricts the number of variables in a single statement
+SQLITE_MAX_VARIABLES = 900
+
+SnapshotRecord = Tuple[str, str, str, List[Triple]]
+
+
+@dataclass
+class TripleDelta:
+    """Holds the changes of the trait data compared to a previous harvest."""
+
+    added: List[Triple] = field(default_factory=list)
+    removed: List[Triple] = field(default_factory=list)
+    added_record_ids: Set[str] = field(default_factory=set)
+    changed_record_ids: Set[str] = field(default_factory=set)
+    removed_record_ids: Set[str] = field(default_factory=set)
+
+    def is_empty(self) -> bool:
+        """Returns True, if nothing changed since the previous harvest."""
+        return not self.added and not self.removed
+
+
+class TraitSnapshot:
+    """Stores the state of a harvest in an SQLite file.
+    For each EOL trait record, its page ID, content hash and the generated triples
+    are stored.
+    """
+
+    def __init__(self, snapshot_file_path: Union[str, pathlib.Path]):
+        self.snapshot_file_path = pathlib.Path(snapshot_file_path)
+        self._connection = sqlite3.connect(str(self.snapshot_file_path))
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "eol_record_id TEXT PRIMARY KEY, "
+            "page_id TEXT NOT NULL, "
+            "content_hash TEXT NOT NULL, "
+            "triples TEXT NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS records_page_id ON records (page_id)"
+        )
+
+    def __enter__(self) -> "TraitSnapshot":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        self._connection.close()
+
+    def get_content_hashes(
+        self, page_ids: Optional[Iterable[str]] = None
+    ) -> Dict[str, str]:
+        """Returns the content hashes by EOL record ID.
+        If `page_ids` are given, only records of these pages are returned.
+        """
+        if page_ids is None:
+            rows = self._connection.execute(
+                "SELECT eol_record_id, content_hash FROM records"
+            )
+            return dict(rows)
+
+        content_hashes: Dict[str, str] = {}
+        for page_id_chunk in _chunk(list(page_ids), SQLITE_MAX_VARIABLES):
+            rows = self._connection.execute(
+                "SELECT eol_record_id, content_hash FROM records "  # nosec B608
+                f"WHERE page_id IN ({_placeholders(page_id_chunk)})",
+                page_id_chunk,
+            )
+            content_hashes.update(rows)
+        return content_hashes
+
+    def get_triples(self, eol_record_ids: Iterable[str]) -> Dict[str, List[Triple]]:
+        """Returns the stored triples by EOL record ID."""
+        triples = {}
+        for record_id_chunk in _chunk(list(eol_record_ids), SQLITE_MAX_VARIABLES):
+            rows = self._connection.execute(
+                "SELECT eol_record_id, triples FROM records "  # nosec B608
+                f"WHERE eol_record_id IN ({_placeholders(record_id_chunk)})",
+                record_id_chunk,
+            )
+            for eol_record_id, serialized_triples in rows:
+                triples[eol_record_id] = deserialize_triples(serialized_triples)
+        return triples
+
+    def store(self, records: Iterable[SnapshotRecord]) -> None:
+        """Inserts or replaces the given records, which are tuples of
+        (EOL record ID, page ID, content hash, triples).
+        """
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                (
+                    (record_id, page_id, content_hash, serialize_triples(triples))
+                    for record_id, page_id, content_hash, triples in records
+                ),
+            )
+
+    def delete(self, eol_record_ids: Iterable[str]) -> None:
+        """Removes the records with the given EOL record IDs."""
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM records WHERE eol_record_id = ?",
+                ((record_id,) for record_id in eol_record_ids),
+            )
+
+
+def compute_triple_delta(
+    non_normalized_records: Iterable[dict],
+    data_normalizer: Normalizer,
+    snapshot: TraitSnapshot,
+    page_ids: Optional[Iterable[str]] = None,
+    update_snapshot: bool = True,
+) -> TripleDelta:
+    """Compares the given records against the snapshot and returns the changed
+    triples.
+
+    Triples are only generated for records that are new or whose content changed.
+    If `page_ids` are given, the records are expected to cover only these pages,
+    so only snapshot records of these pages can be reported as removed.
+    If `update_snapshot` is True, the snapshot is updated to the state of the given
+    records.
+    """
+    previous_content_hashes = snapshot.get_content_hashes(page_ids)
+    triple_generator = TripleGenerator()
+    delta = TripleDelta()
+
+    seen_record_ids = set()
+    records_to_store: List[SnapshotRecord] = []
+    for non_normalized_data in non_normalized_records:
+        normalized_data = data_normalizer.normalize(non_normalized_data)
+        record_id = normalized_data[variables.EOL_RECORD_ID]
+        seen_record_ids.add(record_id)
+
+        content_hash = compute_record_hash(normalized_data)
+        previous_content_hash = previous_content_hashes.get(record_id)
+        if previous_content_hash == content_hash:
+            continue
+
+        if previous_content_hash is None:
+            delta.added_record_ids.add(record_id)
+        else:
+            delta.changed_record_ids.add(record_id)
+
+        page_id = str(normalized_data[variables.PAGE_ID_STRING])
+        triples = triple_generator.create_triples(normalized_data)
+        records_to_store.append((record_id, page_id, content_hash, triples))
+
+    delta.removed_record_ids = set(previous_content_hashes) - seen_record_ids
+    previous_triples = snapshot.get_triples(
+        delta.changed_record_ids | delta.removed_record_ids
+    )
+
+    added_triples, removed_triples = set(), set()
+    for record_id, _, _, triples in records_to_store:
+        new_record_triples = set(triples)
+        old_record_triples = set(previous_triples.get(record_id, []))
+        added_triples.update(new_record_triples - old_record_triples)
+        removed_triples.update(old_record_triples - new_record_triples)
+
+    for record_id in delta.removed_record_ids:
+        removed_triples.update(previous_triples[record_id])
+
+    delta.added = deduplicate_triples(added_triples)
+    delta.removed = deduplicate_triples(removed_triples)
+
+    if update_snapshot:
+        snapshot.store(records_to_store)
+        snapshot.delete(delta.removed_record_ids)
+
+    return delta
+
+
+def compute_record_hash(normalized_data: dict) -> str:
+    """Returns a hash over the complete content of a single normalized record."""
+    serialized_data = json.dumps(normalized_data, sort_keys=True, default=str)
+    return hashlib.blake2b(serialized_data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def serialize_triples(triples: Iterable[Triple]) -> str:
+    """Converts the given triples into a JSON string."""
+    return json.dumps([dataclasses.asdict(triple) for triple in triples], default=str)
+
+
+def deserialize_triples(serialized_triples: str) -> List[Triple]:
+    """Converts a JSON string created by `serialize_triples` back into triples."""
+    return [Triple(**triple_data) for triple_data in json.loads(serialized_triples)]
+
+
+def _chunk(values: list, chunk_size: int) -> Iterable[list]:
+    for start in range(0, len(values), chunk_size):
+        yield values[start : start + chunk_size]
+
+
+def _placeholders(values: list) -> str:
+    return ", ".join("?" * len(values))
@@ -0,0 +1,252 @@
+"""Deduplication and sorting of more triples than fit into memory.
+
+`deduplicate_triples` keeps all triples in memory, which is not feasible e.g. for
+a conversion of the complete EOL trait dump. The `OutOfCoreTripleDeduplicator`
+instead spills the triples to disk:
+
+    1. The triples are hash-partitioned into spill files, so all duplicates of
+       a triple end up in the same partition.
+    2. Each partition is deduplicated and sorted in memory and written back as a
+       sorted run. Partitions exceeding the memory budget are partitioned again.
+    3. The sorted runs are merged (k-way merge) into a single sorted stream.
+
+Only a single partition is held in memory at once, so the memory usage is
+bounded by the configured budget.
+"""
+
+import heapq
+import logging
+import pathlib
+import shutil
+import tempfile
+from typing import IO, Callable, Generator, Iterable, List, Optional, Union
+
+from eol.cache import estimate_size_of_triple
+from eol.delta import deserialize_triples, serialize_triples
+from eol.metrics import metrics_registry
+from eol.triple_generator import Triple
+
+DEFAULT_MEMORY_BUDGET_BYTES = 512 * 2**20
+DEFAULT_NUMBER_OF_PARTITIONS = 64
+
+# Partitions are not split any further, if they do not fit into the budget
+# after this number of repartitionings (e.g. because of hash collisions)
+MAX_PARTITIONING_DEPTH = 8
+
+# The spill files hold one JSON list of at most this number of triples per line
+TRIPLES_PER_LINE = 100
+
+logger = logging.getLogger(__name__)
+
+
+class OutOfCoreTripleDeduplicator:
+    """Collects triples in spill files and returns them deduplicated and sorted by
+    subject and predicate, like `deduplicate_triples`.
+
+    The spill files are written to a temporary directory within `spill_directory`
+    (the system's temporary directory, if not given), which is removed by `close`.
+    """
+
+    def __init__(
+        self,
+        memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES,
+        spill_directory: Optional[Union[str, pathlib.Path]] = None,
+        number_of_partitions: int = DEFAULT_NUMBER_OF_PARTITIONS,
+    ):
+        if memory_budget_bytes <= 0:
+            raise ValueError("The memory budget has to be positive!")
+        if number_of_partitions < 2:
+            raise ValueError("At least two partitions are necessary!")
+
+        self.memory_budget_bytes = memory_budget_bytes
+        self.number_of_partitions = number_of_partitions
+        self._directory = pathlib.Path(
+            tempfile.mkdtemp(prefix="eol-spill-", dir=spill_directory)
+        )
+        self._number_of_spill_files = 0
+        self._partition_files: Optional[List[IO[bytes]]] = self._open_partition_files(
+            "partition"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, triples: Iterable[Triple]) -> None:
+        """Spills the given triples to the partition files."""
+        partition_files = self._partition_files
+        if partition_files is None:
+            raise ValueError("No triples can be added after the iteration started!")
+
+        number_of_triples = _write_partitioned_spill_files(
+            triples,
+            partition_files,
+            lambda triple: _hash_triple(triple) % self.number_of_partitions,
+        )
+        metrics_registry.increment("eol_spilled_triples_total", number_of_triples)
+
+    def iterate_sorted(self) -> Generator[Triple, None, None]:
+        """Yields the unique triples, sorted by subject and predicate. Afterwards,
+        no triples can be added anymore.
+        """
+        partition_paths = self._close_partition_files()
+
+        run_paths = []
+        for partition_path in partition_paths:
+            run_paths.extend(self._write_sorted_runs(partition_path, depth=0))
+        logger.debug("Merging %d sorted runs", len(run_paths))
+
+        run_files = [open(run_path, "rb") for run_path in run_paths]
+        try:
+            runs = [_iterate_spill_file(run_file) for run_file in run_files]
+            yield from heapq.merge(*runs, key=_sort_key)
+        finally:
+            for run_file in run_files:
+                run_file.close()
+
+    def close(self) -> None:
+        """Removes all spill files."""
+        self._close_partition_files()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _write_sorted_runs(self, partition_path: pathlib.Path, depth: int) -> List:
+        """Deduplicates and sorts the triples of the partition file into a run file.
+        If the unique triples exceed the memory budget, the partition is split.
+        """
+        unique_triples = set()
+        size = 0
+        exceeds_memory_budget = False
+        with open(partition_path, "rb") as partition_file:
+            for triple in _iterate_spill_file(partition_file):
+                if triple in unique_triples:
+                    continue
+                unique_triples.add(triple)
+                size += estimate_size_of_triple(triple)
+                if size > self.memory_budget_bytes and depth < MAX_PARTITIONING_DEPTH:
+                    exceeds_memory_budget = True
+                    break
+
+        if exceeds_memory_budget:
+            unique_triples.clear()
+            return self._repartition(partition_path, depth + 1)
+
+        partition_path.unlink()
+        if not unique_triples:
+            return []
+
+        metrics_registry.increment(
+            "eol_deduplicated_triples_total", len(unique_triples)
+        )
+        run_path = self._create_spill_file_path("run")
+        sorted_triples = sorted(unique_triples, key=_sort_key)
+        with open(run_path, "wb") as run_file:
+            for start in range(0, len(sorted_triples), TRIPLES_PER_LINE):
+                _write_spill_line(
+                    run_file, sorted_triples[start : start + TRIPLES_PER_LINE]
+                )
+        return [run_path]
+
+    def _repartition(self, partition_path: pathlib.Path, depth: int) -> List:
+        logger.debug("Partition %s exceeds the memory budget", partition_path.name)
+        metrics_registry.increment("eol_spill_repartitions_total")
+
+        partition_files = self._open_partition_files(f"partition{depth}")
+        with open(partition_path, "rb") as split_partition_file:
+            # The depth acts as salt, otherwise all triples would end up in the
+            # same partition again
+            _write_partitioned_spill_files(
+                _iterate_spill_file(split_partition_file),
+                partition_files,
+                lambda triple: hash((depth, _hash_triple(triple)))
+                % self.number_of_partitions,
+            )
+        partition_path.unlink()
+
+        run_paths = []
+        for partition_file in partition_files:
+            partition_file.close()
+            run_paths.extend(
+                self._write_sorted_runs(pathlib.Path(partition_file.name), depth)
+            )
+        return run_paths
+
+    def _open_partition_files(self, name: str) -> List[IO[bytes]]:
+        return [
+            open(self._create_spill_file_path(name), "wb")
+            for _ in range(self.number_of_partitions)
+        ]
+
+    def _close_partition_files(self) -> List[pathlib.Path]:
+        if self._partition_files is None:
+            return []
+        partition_paths = []
+        for partition_file in self._partition_files:
+            partition_file.close()
+            partition_paths.append(pathlib.Path(partition_file.name))
+        self._partition_files = None
+        return partition_paths
+
+    def _create_spill_file_path(self, name: str) -> pathlib.Path:
+        self._number_of_spill_files += 1
+        return self._directory / f"{name}-{self._number_of_spill_files}.jsonl"
+
+
+def deduplicate_triples_out_of_core(
+    triples: Iterable[Triple],
+    memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES,
+    spill_directory: Optional[Union[str, pathlib.Path]] = None,
+) -> Generator[Triple, None, None]:
+    """Yields the unique triples sorted by subject and predicate, like
+    `deduplicate_triples`, but uses at most roughly `memory_budget_bytes` of memory
+    for the triples. The remaining triples are spilled to disk.
+    """
+    with OutOfCoreTripleDeduplicator(memory_budget_bytes, spill_directory) as spill:
+        spill.add(triples)
+        yield from spill.iterate_sorted()
+
+
+def _sort_key(triple: Triple):
+    return triple.subject, triple.predicate
+
+
+def _hash_triple(triple: Triple) -> int:
+    # The eol_record_id is not part of the Triple hash, but of its equality, so
+    # triples differing only in it have to be spread over the partitions as well
+    return hash((triple, triple.eol_record_id))
+
+
+def _write_partitioned_spill_files(
+    triples: Iterable[Triple],
+    partition_files: List[IO[bytes]],
+    get_partition_index: Callable[[Triple], int],
+) -> int:
+    """Writes each triple to the partition file of the given index and returns the
+    number of triples.
+    """
+    buffers: List[List[Triple]] = [[] for _ in partition_files]
+    number_of_triples = 0
+    for triple in triples:
+        partition_index = get_partition_index(triple)
+        buffer = buffers[partition_index]
+        buffer.append(triple)
+        number_of_triples += 1
+        if len(buffer) >= TRIPLES_PER_LINE:
+            _write_spill_line(partition_files[partition_index], buffer)
+            buffer.clear()
+
+    for partition_file, buffer in zip(partition_files, buffers):
+        if buffer:
+            _write_spill_line(partition_file, buffer)
+    return number_of_triples
+
+
+def _write_spill_line(spill_file: IO[bytes], triples: List[Triple]) -> None:
+    spill_file.write(serialize_triples(triples).encode("utf-8"))
+    spill_file.write(b"\n")
+
+
+def _iterate_spill_file(spill_file: IO[bytes]) -> Generator[Triple, None, None]:
+    for line in spill_file:
+        yield from deserialize_triples(line.decode("utf-8"))
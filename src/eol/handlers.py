@@ -1,14 +1,87 @@
 """Holds all DataHandlers to process EOL data."""
 
-import json
+from __future__ import annotations
+
+import itertools
 import logging
 import pathlib
-import re
-from typing import Any, Generator, List, Optional, Protocol, Tuple, Union
-
-import numpy as np
-import pandas as pd
-import requests
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+    Union,
+)
+
+from eol.concurrency import LazyValue, ObjectPool
+from eol.cypher import (  # noqa: F401 (re-exported)
+    COUNT_VARIABLE,
+    CypherQuery,
+    TraitQueryBuilder,
+    compose_count_cypher_query,
+    extract_limit_count_and_string,
+    split_limit_from_cypher_query,
+)
+from eol.data import read_csv_file_in_parallel
+from eol.hierarchy import TaxonHierarchy
+from eol.lazy import lazy_import
+from eol.metrics import metrics_registry
+from eol.name_index import ScientificNameIndex
+from eol.trait_index import TraitIndex
+
+if TYPE_CHECKING:
+    import ijson
+    import numpy as np
+    import pandas as pd
+    import requests
+else:
+    ijson = lazy_import("ijson")
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+    requests = lazy_import("requests")
+
+# The ways to detect the last page of a paging (see `paginate_cypher_api`)
+SHORT_PAGE_SIZING = "short_page"
+HAS_MORE_SIZING = "has_more"
+COUNT_SIZING = "count"
+PAGINATION_SIZINGS = (SHORT_PAGE_SIZING, HAS_MORE_SIZING, COUNT_SIZING)
+
+# The columns of the EOL traits CSV file holding the data of the Cypher variables
+# returned by the EolTraitApiHandler
+API_TO_CSV_COLUMN_NAMES = {
+    "r.resource_id": "resource_id",
+    "t.eol_pk": "eol_pk",
+    "t.source": "source",
+    "p.page_id": "page_id",
+    "t.scientific_name": "scientific_name",
+    "pred.uri": "predicate",
+    "t.object_page_id": "object_page_id",
+    "obj.uri": "value_uri",
+    "t.normal_measurement": "normal_measurement",
+    "units.uri": "normal_units_uri",
+    "t.normal_units": "normal_units",
+    "t.literal": "literal",
+    "t.citation": "citation",
+}
+
+# The number of EOL pages queried at once and the LIMIT of these queries. The
+# page IDs are inlined into the URL by default, which limits their number.
+DEFAULT_PAGE_IDS_PER_QUERY = 100
+DEFAULT_QUERY_LIMIT = 1000
+# The LIMIT of subtree queries. Each page repeats the traversal of the subtree on
+# the server, so the pages are large.
+DEFAULT_SUBTREE_QUERY_LIMIT = 10_000
 
 
 class DataHandler(Protocol):
@@ -27,10 +100,43 @@ class DataHandler(Protocol):
         If the key and/or the value cannot be found, an empty DataFrame is returned.
         """
 
+    def iterate_subtree_data_by_page_id(
+        self, page_id: Union[str, int], max_depth: Optional[int] = None
+    ) -> Generator[dict, None, None]:
+        """Iterate all data of the given EOL page and all its descendant pages in
+        the taxon hierarchy, up to `max_depth` levels below the given page.
+        """
+
+    def iterate_batches(
+        self, key: str, values: Iterable[Any], batch_size: int = 10_000
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Iterate all data having one of the given `values` for the given key in
+        DataFrames of at most `batch_size` records, with one column per key.
+        """
+
+    def fetch_raw_batches(self, key: str, values: Iterable[Any]) -> Iterator[Any]:
+        """Retrieves all data having one of the given `values` for the given key
+        from the source, in raw batches for `parse_raw_batch`. This is the I/O bound
+        part of `iterate_batches`.
+        """
+
+    def parse_raw_batch(
+        self, raw_batch: Any, batch_size: int = 10_000
+    ) -> Iterator[pd.DataFrame]:
+        """Converts a batch of `fetch_raw_batches` to DataFrames of at most
+        `batch_size` records, like the ones of `iterate_batches`.
+        """
+
+    def get_source_version(self) -> str:
+        """Returns a string that changes whenever the data of the source changes."""
+
 
 class EolTraitCsvHandler:
     """Takes care of reading and converting data from a EOL traits CSV file.
     This is a DataHandler class and obeys the DataHandler interface.
+
+    The CSV file can also be compressed (.zip, .gz, .bz2 or .zst), e.g. the EOL
+    all-traits archive, which is decompressed while it is parsed.
     """
 
     # Data loading is restricted to specific columns
@@ -56,12 +162,31 @@ class EolTraitCsvHandler:
 
     column_types = {"page_id": "int64", "resource_id": "int16"}
 
-    def __init__(self, csv_file_path: Union[pathlib.Path, str]):
+    def __init__(
+        self,
+        csv_file_path: Union[pathlib.Path, str],
+        pages_csv_file_path: Optional[Union[pathlib.Path, str]] = None,
+        workers: Optional[int] = None,
+        archive_member: Optional[str] = None,
+    ):
         if not isinstance(csv_file_path, pathlib.Path):
             csv_file_path = pathlib.Path(csv_file_path)
 
         self.csv_file_path = csv_file_path
-        self._data: Optional[pd.DataFrame] = None
+        self.pages_csv_file_path = pages_csv_file_path
+        # The number of processes parsing the CSV file (default: one per CPU)
+        self.workers = workers
+        # The member of a zip archive to read (default: its largest CSV file)
+        self.archive_member = archive_member
+        # Each lazily loaded value is created once, even by concurrent threads
+        self._data: LazyValue[pd.DataFrame] = LazyValue(self._load_data)
+        self._taxon_hierarchy: LazyValue[TaxonHierarchy] = LazyValue(
+            self._create_taxon_hierarchy
+        )
+        self._trait_index: LazyValue[TraitIndex] = LazyValue(self._create_trait_index)
+        self._name_index: LazyValue[ScientificNameIndex] = LazyValue(
+            self._create_name_index
+        )
 
     def iterate(self) -> Generator[dict, None, None]:
         """Returns a generator yielding the items in the data source."""
@@ -78,19 +203,126 @@ class EolTraitCsvHandler:
         for _, series in data.iterrows():
             yield _convert_pandas_object_to_dict(series)
 
+    def iterate_subtree_data_by_page_id(
+        self, page_id: Union[str, int], max_depth: Optional[int] = None
+    ) -> Generator[dict, None, None]:
+        """Iterate all data of the given EOL page and all its descendant pages in
+        the taxon hierarchy, up to `max_depth` levels below the given page.
+        The hierarchy is read from the pages CSV file given on initialization.
+        """
+        page_ids = self.get_taxon_hierarchy().get_descendant_page_ids(
+            page_id, max_depth
+        )
+        df = self.get_data()
+        data = df.loc[df["page_id"].isin(page_ids)]
+
+        for _, series in data.iterrows():
+            yield _convert_pandas_object_to_dict(series)
+
+    def iterate_batches(
+        self, key: str, values: Iterable[Any], batch_size: int = 10_000
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Iterate all data having one of the given `values` for the given key in
+        DataFrames of at most `batch_size` records, with one column per key.
+        The batches are slices of the loaded data and not copied.
+        """
+        df = self.get_data()
+        data = df.loc[df[key].isin(list(values))]
+
+        for start in range(0, len(data), batch_size):
+            yield data.iloc[start : start + batch_size]
+
+    def fetch_raw_batches(
+        self, key: str, values: Iterable[Any]
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Yields the loaded data having one of the given `values` for the given
+        key, as a single DataFrame.
+        """
+        df = self.get_data()
+        yield df.loc[df[key].isin(list(values))]
+
+    def parse_raw_batch(
+        self, raw_batch: pd.DataFrame, batch_size: int = 10_000
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Slices the DataFrame into batches of at most `batch_size` records."""
+        for start in range(0, len(raw_batch), batch_size):
+            yield raw_batch.iloc[start : start + batch_size]
+
+    def get_source_version(self) -> str:
+        """Returns a string that changes whenever the CSV file changes."""
+        file_stats = self.csv_file_path.stat()
+        return (
+            f"csv:{self.csv_file_path.resolve()}:"
+            f"{file_stats.st_size}:{file_stats.st_mtime_ns}"
+        )
+
+    def get_preload_tasks(self) -> Dict[str, Callable[[], Any]]:
+        """Returns the functions loading the data and the indexes by name, e.g. to
+        load them in the background (see `eol.warm_up.WarmUp`). The indexes wait
+        for the data, if they run concurrently.
+        """
+        tasks: Dict[str, Callable[[], Any]] = {
+            "trait_data": self.get_data,
+            "trait_index": self.get_trait_index,
+            "name_index": self.get_name_index,
+        }
+        if self.pages_csv_file_path is not None:
+            tasks["taxon_hierarchy"] = self.get_taxon_hierarchy
+        return tasks
+
+    def get_taxon_hierarchy(self) -> TaxonHierarchy:
+        """Get the taxon hierarchy of the EOL pages CSV file."""
+        if self.pages_csv_file_path is None:
+            raise ValueError(
+                "You have to provide an EOL pages CSV file to traverse the hierarchy!"
+            )
+        return self._taxon_hierarchy.get()
+
+    def get_trait_index(self) -> TraitIndex:
+        """Get the index of the pages by their traits, built from the loaded data."""
+        return self._trait_index.get()
+
+    def get_name_index(self) -> ScientificNameIndex:
+        """Get the index of the pages by their scientific names, built from the
+        loaded data.
+        """
+        return self._name_index.get()
+
     def get_data(self) -> pd.DataFrame:
-        """Get the complete dataset available."""
-        if self._data is None:
-            self._data = self._create_data()
-        return self._data
+        """Get the complete dataset available. The data is shared by all callers
+        and must not be modified.
+        """
+        if self._data.is_created:
+            metrics_registry.increment("eol_csv_data_cache_hits_total")
+        return self._data.get()
+
+    def _create_taxon_hierarchy(self) -> TaxonHierarchy:
+        return TaxonHierarchy.from_csv_file(self.pages_csv_file_path)
+
+    def _create_trait_index(self) -> TraitIndex:
+        with metrics_registry.time("eol_trait_index_build_seconds"):
+            return TraitIndex.from_trait_data(self.get_data())
 
+    def _create_name_index(self) -> ScientificNameIndex:
+        with metrics_registry.time("eol_name_index_build_seconds"):
+            return ScientificNameIndex.from_trait_data(self.get_data())
+
+    def _load_data(self) -> pd.DataFrame:
+        metrics_registry.increment("eol_csv_data_cache_misses_total")
+        return self._create_data()
+
+    @metrics_registry.timed("eol_csv_load_seconds")
     def _create_data(self) -> pd.DataFrame:
-        data = pd.read_csv(
-            self.csv_file_path, usecols=self.required_columns, dtype=self.column_types
+        data = read_csv_file_in_parallel(
+            self.csv_file_path,
+            workers=self.workers,
+            chunk_converter=_replace_nan_by_none,
+            archive_member=self.archive_member,
+            usecols=self.required_columns,
+            dtype=self.column_types,
         )
-        # Replace all NaN values with None
-        data = data.replace({np.nan: None})
 
+        metrics_registry.increment("eol_csv_rows_loaded_total", len(data))
         return data
 
 
@@ -118,164 +350,679 @@ class EolTraitApiHandler:
     ]
     """
 
+    cypher_api_url = "https://eol.org/service/cypher"
+
+    # The number of idle HTTP sessions (and their connections) kept for reuse
+    max_idle_sessions = 8
+
     parameter_name_normalizations = {"page_id": "p.page_id"}
 
-    def __init__(self, api_credentials):
+    # The ORDER BY command is mandatory to make pagination predictable.
+    # In Neo4J, the return order may (!) be continuous, but it seems to
+    # depend on the data.
+    order_by_variable = "t.eol_pk"
+    return_variables = [
+        "obj.name",
+        "obj.uri",
+        "p.citation",
+        "p.page_id",
+        "pred.name",
+        "pred.uri",
+        "r.resource_id",
+        "t.citation",
+        "t.eol_pk",
+        "t.literal",
+        "t.normal_measurement",
+        "t.normal_units",
+        "t.object_page_id",
+        "t.resource_ok",
+        "t.scientific_name",
+        "t.source",
+        "units.name",
+        "units.uri",
+    ]
+
+    def __init__(
+        self,
+        api_credentials,
+        pagination_sizing: str = SHORT_PAGE_SIZING,
+        prefetch_pages: bool = False,
+        parameterized_queries: bool = False,
+    ):
         self.api_credentials = api_credentials
-        self.session = create_http_session(api_credentials)
+        # See `paginate_cypher_api` for the options of the pagination
+        self.pagination_sizing = pagination_sizing
+        self.prefetch_pages = prefetch_pages
+        # See `request_cypher_query`
+        self.parameterized_queries = parameterized_queries
+        self.query_builder = TraitQueryBuilder(
+            self.return_variables, self.order_by_variable
+        )
+        # requests.Session is not thread-safe, so each request borrows one
+        self.sessions: ObjectPool[requests.Session] = ObjectPool(
+            lambda: create_http_session(self.api_credentials),
+            max_idle=self.max_idle_sessions,
+        )
+        # The sessions of the open responses by the response ID, see `_post`
+        self._lent_sessions: Dict[int, requests.Session] = {}
         self.logger = logging.getLogger(__name__)
 
+    def close(self) -> None:
+        """Closes the idle HTTP sessions and their connections."""
+        self.sessions.close()
+
     def iterate(self) -> Generator[dict, None, None]:
         """Returns a generator yielding the items in the data source."""
-        iterate_everything_query_string = "MATCH (trait:Trait) RETURN trait LIMIT 100;"
-        return self.iterate_cypher_response_for_query(iterate_everything_query_string)
+        iterate_everything_query = CypherQuery(
+            "MATCH (trait:Trait) RETURN trait", limit=100
+        )
+        return self.iterate_cypher_response_for_query(iterate_everything_query)
 
     def iterate_data_by_key(self, key: str, value: str) -> Generator[dict, None, None]:
         """Iterate all data for the given key.
         If a `value` is given, only data having this value will be returned.
         If the key and/or the value cannot be found, an empty DataFrame is returned.
         """
-        key = self.normalize_key_parameter(key)
+        query = self.query_builder.by_key(self.normalize_key_parameter(key), value)
+        return self.iterate_cypher_response_for_query(query)
+
+    def iterate_data_by_page_ids(
+        self,
+        page_ids: Iterable[Union[str, int]],
+        page_ids_per_query: int = DEFAULT_PAGE_IDS_PER_QUERY,
+        query_limit: int = DEFAULT_QUERY_LIMIT,
+    ) -> Generator[dict, None, None]:
+        """Iterate all data of the given EOL pages.
+
+        The page IDs are queried in groups of `page_ids_per_query` IDs, so the
+        number of requests depends on the number of traits (`query_limit` per
+        request) rather than on the number of pages.
+        """
+        page_ids = iter(page_ids)
+        while True:
+            page_id_group = [
+                int(page_id)
+                for page_id in itertools.islice(page_ids, page_ids_per_query)
+            ]
+            if not page_id_group:
+                return
 
-        filtered_iteration_string = self._convert_key_value_pairs_to_cypher_query(
-            keys=[key], values=[value]
-        )
-        return self.iterate_cypher_response_for_query(filtered_iteration_string)
+            query = self.query_builder.by_page_ids(page_id_group, query_limit)
+            yield from self.iterate_cypher_response_for_query(query)
 
-    def iterate_cypher_response_for_query(
-        self, cypher_query_string: str
+    def get_data_by_page_ids(
+        self, page_ids: Iterable[Union[str, int]], **kwargs
+    ) -> Dict[int, List[dict]]:
+        """Returns the data of the given EOL pages, split by page ID. Pages without
+        data map to an empty list. The keyword arguments are passed on to
+        `iterate_data_by_page_ids`.
+        """
+        data_by_page_id: Dict[int, List[dict]] = {
+            int(page_id): [] for page_id in page_ids
+        }
+        for data in self.iterate_data_by_page_ids(data_by_page_id, **kwargs):
+            data_by_page_id[int(data["p.page_id"])].append(data)
+        return data_by_page_id
+
+    def iterate_subtree_data_by_page_id(
+        self,
+        page_id: Union[str, int],
+        max_depth: Optional[int] = None,
+        query_limit: int = DEFAULT_SUBTREE_QUERY_LIMIT,
     ) -> Generator[dict, None, None]:
-        """Iterate a Neo4J database with the given query."""
-        limit_count, _ = extract_limit_count_and_string(cypher_query_string)
+        """Iterate all data of the given EOL page and all its descendant pages in
+        the taxon hierarchy, up to `max_depth` levels below the given page.
 
-        for response in self.paginate_cypher_api(cypher_query_string):
-            self.logger.debug("Received EOL API response: %s", response)
-            self._raise_if_response_contains_error(response)
+        The hierarchy is traversed by the EOL server along the `parent`
+        relationships, once per request of `query_limit` entries. The requests
+        are paged by keyset (see `paginate_cypher_api_by_keyset`), so a complete
+        clade costs one request per `query_limit` traits.
+        """
+        query = self.query_builder.by_subtree(int(page_id), max_depth, query_limit)
+        return self.paginate_cypher_api_by_keyset(query)
+
+    def iterate_batches(
+        self, key: str, values: Iterable[Any], batch_size: int = 10_000
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Iterate all data having one of the given `values` for the given key in
+        DataFrames of at most `batch_size` records, with one column per returned
+        Cypher variable.
+        """
+        records: Iterator[dict]
+        if self.normalize_key_parameter(key) == self.normalize_key_parameter("page_id"):
+            records = self.iterate_data_by_page_ids(values)
+        else:
+            records = itertools.chain.from_iterable(
+                self.iterate_data_by_key(key, value) for value in values
+            )
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                return
+            yield pd.DataFrame.from_records(batch, columns=self.return_variables)
 
-            response_data = self._convert_cypher_response_data_to_list(response.text)
-            for data in response_data:
-                yield data
+    def fetch_raw_batches(
+        self, key: str, values: Iterable[Any]
+    ) -> Generator[List[dict], None, None]:
+        """Yields the records of each page of the Cypher API responses as a list,
+        for all data having one of the given `values` for the given key.
+        """
+        if self.normalize_key_parameter(key) == self.normalize_key_parameter("page_id"):
+            page_ids = [int(page_id) for page_id in values]
+            queries = [
+                self.query_builder.by_page_ids(
+                    page_ids[start : start + DEFAULT_PAGE_IDS_PER_QUERY],
+                    DEFAULT_QUERY_LIMIT,
+                )
+                for start in range(0, len(page_ids), DEFAULT_PAGE_IDS_PER_QUERY)
+            ]
+        else:
+            queries = [
+                self.query_builder.by_key(self.normalize_key_parameter(key), value)
+                for value in values
+            ]
+
+        for query in queries:
+            for page_rows in self.paginate_cypher_api(
+                query,
+                sizing=self.pagination_sizing,
+                prefetch=self.prefetch_pages,
+            ):
+                yield list(page_rows)
+
+    def parse_raw_batch(
+        self, raw_batch: List[dict], batch_size: int = 10_000
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Converts the records to DataFrames of at most `batch_size` records, with
+        one column per returned Cypher variable.
+        """
+        for start in range(0, len(raw_batch), batch_size):
+            yield pd.DataFrame.from_records(
+                raw_batch[start : start + batch_size], columns=self.return_variables
+            )
 
-            # The last page is indicated by not being of the same size as the LIMIT
-            if len(response_data) < limit_count:
-                break
+    def get_source_version(self) -> str:
+        """Returns a string that changes whenever the data of the source changes.
+        Since the EOL API does not expose a data version, the version changes daily.
+        """
+        return f"api:{date.today().isoformat()}"
+
+    def iterate_cypher_response_for_query(
+        self, cypher_query: Union[str, CypherQuery]
+    ) -> Generator[dict, None, None]:
+        """Iterate a Neo4J database with the given query. See
+        `paginate_cypher_api`.
+        """
+        for page_rows in self.paginate_cypher_api(
+            cypher_query,
+            sizing=self.pagination_sizing,
+            prefetch=self.prefetch_pages,
+        ):
+            yield from page_rows
 
     def normalize_key_parameter(self, parameter_name: str) -> str:
         """Normalizes a Neo4J variable to fit the EOL server schema."""
         return self.parameter_name_normalizations.get(parameter_name, parameter_name)
 
-    def get_data_from_cypher_api(self, cypher_query_string: str) -> List[dict]:
+    def get_data_from_cypher_api(
+        self, cypher_query: Union[str, CypherQuery]
+    ) -> List[dict]:
         """Calls the EOL Cypher API and returns the response as dict.
         Raises an SyntaxError, if the Cypher API returns an error.
         """
-        url = self.compose_cypher_url(cypher_query_string)
-        response = self.read_api_with_parameters(url)
+        if isinstance(cypher_query, str):
+            cypher_query = CypherQuery(cypher_query)
+        response = self.request_cypher_query(cypher_query)
 
         self._raise_if_response_contains_error(response)
 
-        return self._convert_cypher_response_data_to_list(response.text)
-
-    def paginate_cypher_api(self, cypher_query_string: str, **kwargs) -> Generator:
-        """Yields successively the responses of a paging of the EOL Cypher API."""
-        number_of_returned_entries = 0
-
-        if "limit" not in cypher_query_string.lower():
-            raise ValueError("You have to provide a LIMIT to your query!")
+        return list(self._iterate_cypher_response_rows(response))
+
+    def paginate_cypher_api(
+        self,
+        cypher_query: Union[str, CypherQuery],
+        sizing: str = SHORT_PAGE_SIZING,
+        prefetch: bool = False,
+        **kwargs,
+    ) -> Generator[Iterator[dict], None, None]:
+        """Yields successively the pages of a paging of the EOL Cypher API.
+
+        Each page is an iterator over the row dicts of the page, which are decoded
+        while the response body is received. A page has to be consumed before the
+        next page is requested; rows not consumed are skipped.
+
+        The end of the paging is detected according to `sizing`:
+            * "short_page": A page with less rows than the LIMIT is the last one.
+              If the number of rows is a multiple of the LIMIT, an empty page is
+              requested additionally.
+            * "has_more": Each request asks for one row more than the LIMIT, which
+              tells whether another page follows. No request is wasted.
+            * "count": The rows are counted by a count query first, and only the
+              necessary pages are requested.
+
+        If `prefetch` is True, the next page is requested while the current page is
+        consumed. With the "short_page" and "has_more" sizing, this request is
+        discarded if the current page turns out to be the last one.
+
+        The query is either a CypherQuery with a `limit`, or a query string ending
+        with a LIMIT (e.g. "MATCH (t:Trait) RETURN t LIMIT 100"). The pages are
+        requested by the SKIP and LIMIT parameters `$skip` and `$limit`.
+        """
+        if sizing not in PAGINATION_SIZINGS:
+            raise ValueError(
+                f"Unknown sizing '{sizing}', use one of {PAGINATION_SIZINGS}!"
+            )
 
-        # Remove trailing semicolons
-        if cypher_query_string.endswith(";"):
-            cypher_query_string = cypher_query_string[:-1]
+        cypher_query = _to_paged_cypher_query(cypher_query)
+        limit_count = cypher_query.limit
+        number_of_rows = (
+            self.count_cypher_query_rows(cypher_query)
+            if sizing == COUNT_SIZING
+            else None
+        )
+        requested_limit_count = (
+            limit_count + 1 if sizing == HAS_MORE_SIZING else limit_count
+        )
 
-        limit_count, limit_string = extract_limit_count_and_string(cypher_query_string)
+        def request_page(number_of_skipped_rows: int):
+            cypher_response = self.request_cypher_query(
+                cypher_query.page(number_of_skipped_rows, requested_limit_count),
+                **kwargs,
+            )
+            self.logger.debug("Received EOL API response: %s", cypher_response)
+            self._raise_if_response_contains_error(cypher_response)
+            return cypher_response
 
-        # Remove limit count, it has to come after (!) the SKIP
-        cypher_query_string = cypher_query_string.replace(limit_string, "")
+        def has_next_page(number_of_skipped_rows: int) -> bool:
+            return number_of_rows is None or number_of_skipped_rows < number_of_rows
 
-        url = self.compose_cypher_url(cypher_query_string)
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        next_response: Optional[Future] = None
+        number_of_returned_entries = 0
+        try:
+            while has_next_page(number_of_returned_entries):
+                cypher_response = (
+                    next_response.result()
+                    if next_response is not None
+                    else request_page(number_of_returned_entries)
+                )
+                next_response = None
+                if executor is not None and has_next_page(
+                    number_of_returned_entries + limit_count
+                ):
+                    next_response = executor.submit(
+                        request_page, number_of_returned_entries + limit_count
+                    )
+
+                response_rows = self._iterate_cypher_response_rows(cypher_response)
+                page_rows = _CountingIterator(
+                    itertools.islice(response_rows, limit_count)
+                )
+                first_row = next(page_rows, None)
+                if first_row is None:
+                    self.logger.info("Response is empty!")
+                    metrics_registry.increment("eol_api_empty_pages_total")
+                    response_rows.close()
+                    return
+
+                metrics_registry.increment("eol_api_pages_total")
+                yield itertools.chain([first_row], page_rows)
+
+                # Skip the rows that were not consumed, to know the page size
+                for _ in page_rows:
+                    pass
+                has_more_rows = next(response_rows, None) is not None
+                response_rows.close()
+
+                if _is_last_page(sizing, page_rows.count, limit_count, has_more_rows):
+                    return
+
+                number_of_returned_entries += limit_count
+        finally:
+            _stop_prefetching(executor, next_response, self.close_response)
+
+    def paginate_cypher_api_by_keyset(
+        self, cypher_query: CypherQuery, **kwargs
+    ) -> Generator[dict, None, None]:
+        """Yields the rows of a keyset paging of the EOL Cypher API.
 
+        Each page continues after the value of the `order_by_variable` in the last
+        row of the previous page (see `CypherQuery.page_after`), so the server
+        neither produces nor skips the rows of the previous pages. A page with
+        less rows than the LIMIT is the last one. The pages cannot be prefetched,
+        since each page depends on the previous one.
+        """
+        last_value = None
         while True:
-            skip_string = f"SKIP {number_of_returned_entries} {limit_string}"
-            ready_url = f"{url} {skip_string}"
-
-            cypher_response = self.read_api_with_parameters(ready_url, **kwargs)
+            page_query = cypher_query.page_after(last_value)
+            response = self.request_cypher_query(page_query, **kwargs)
+            self._raise_if_response_contains_error(response)
 
-            if self._is_data_response_empty(cypher_response):
-                self.logger.info("Response is empty!")
+            number_of_rows = 0
+            for row in self._iterate_cypher_response_rows(response):
+                number_of_rows += 1
+                last_value = row[self.order_by_variable]
+                yield row
+
+            if number_of_rows == 0:
+                metrics_registry.increment("eol_api_empty_pages_total")
+            else:
+                metrics_registry.increment("eol_api_pages_total")
+            if number_of_rows < page_query.parameters["limit"]:
                 return
 
-            yield cypher_response
+    def count_cypher_query_rows(self, cypher_query: Union[str, CypherQuery]) -> int:
+        """Returns the number of rows the given query returns, ignoring any SKIP and
+        LIMIT. The query has to end with a RETURN clause without aggregations.
+        """
+        if isinstance(cypher_query, str):
+            cypher_query = CypherQuery(cypher_query)
+        rows = self.get_data_from_cypher_api(cypher_query.count())
+        return int(rows[0][COUNT_VARIABLE]) if rows else 0
+
+    def request_cypher_query(self, cypher_query: CypherQuery, **kwargs):
+        """Posts the query to the EOL Cypher API and returns the response.
+
+        By default, the parameters are inlined into the query text, which is sent
+        as the URL parameter `query`. If `parameterized_queries` is True, the query
+        text and its parameters are sent in a JSON body instead. If the API rejects
+        the parameters, the handler falls back to inlining them from then on. The
+        keyword arguments are sent as URL parameters.
+        """
+        if self.parameterized_queries:
+            body = {"query": cypher_query.text, "params": cypher_query.parameters}
+            response = self.read_api_with_body(self.cypher_api_url, body, **kwargs)
+            if not _is_parameter_error(response):
+                return response
+            self.close_response(response)
+            self.logger.warning(
+                "The EOL API rejected the query parameters, inlining them instead"
+            )
+            self.parameterized_queries = False
 
-            number_of_returned_entries += limit_count
+        url = self.compose_cypher_url(cypher_query.inline_parameters())
+        return self.read_api_with_parameters(url, **kwargs)
 
     def read_api_with_parameters(self, url: str, **kwargs):
-        """Calls the URL with the given URL parameters."""
+        """Calls the URL with the given URL parameters.
+
+        The response body is not downloaded upfront, but can be streamed from
+        `response.raw`. Pass the response to `close_response` afterwards.
+        """
         self.logger.debug("Calling EOL with URL: '%s'", url)
         self.logger.debug("Using additional Parameters: %s", kwargs)
+        return self._post(url, params=kwargs)
 
-        if self.api_credentials is None:
-            raise ValueError("The API key is None! Please provide a valid EOL API key.")
+    def read_api_with_body(self, url: str, body: dict, **kwargs):
+        """Calls the URL with the given JSON body and URL parameters.
 
-        return self.session.post(url, params=kwargs)
+        The response body is not downloaded upfront, but can be streamed from
+        `response.raw`. Pass the response to `close_response` afterwards.
+        """
+        self.logger.debug("Calling EOL with URL: '%s'", url)
+        self.logger.debug(
+            "Using the body %s and additional Parameters: %s", body, kwargs
+        )
+        return self._post(url, params=kwargs, json=body)
 
     def compose_cypher_url(self, cypher_query: str) -> str:
         """Adds the given query to the EOL REST-API base URL."""
-        return f"https://eol.org/service/cypher?query={cypher_query.strip()}"
+        return f"{self.cypher_api_url}?query={cypher_query.strip()}"
+
+    def close_response(self, response) -> None:
+        """Closes a response of the API and returns its HTTP session to the pool."""
+        response.close()
+        session = self._lent_sessions.pop(id(response), None)
+        if session is not None:
+            self.sessions.give_back(session)
 
-    def _is_data_response_empty(self, cypher_response) -> bool:
-        empty_data_indication_string = '"data":[]'
-        return empty_data_indication_string in cypher_response.text.replace(": ", ":")
+    def _post(self, url: str, **kwargs):
+        if self.api_credentials is None:
+            raise ValueError("The API key is None! Please provide a valid EOL API key.")
+
+        metrics_registry.increment("eol_api_requests_total")
+        # The session is lent until the streamed response is closed, since another
+        # thread must not use it meanwhile
+        session = self.sessions.take()
+        try:
+            with metrics_registry.time("eol_api_request_seconds"):
+                response = session.post(url, stream=True, **kwargs)
+        except BaseException:
+            self.sessions.give_back(session)
+            raise
+        self._lent_sessions[id(response)] = session
+
+        # Let urllib3 take care of gzip/deflate encoded responses
+        response.raw.decode_content = True
+        return response
 
     def _raise_if_response_contains_error(self, response):
         if response.status_code != 200:
+            metrics_registry.increment("eol_api_request_errors_total")
+            self.close_response(response)
             raise SyntaxError(
                 f"The EOL API returned with an error! Message: {response}"
             )
 
-    def _convert_cypher_response_data_to_list(self, response_data: str) -> List[dict]:
-        self.logger.debug("Converting response data to JSON!")
-        data_json = json.loads(response_data)
-        column_names = data_json["columns"]
-        return [dict(zip(column_names, element)) for element in data_json["data"]]
-
-    def _convert_key_value_pairs_to_cypher_query(
-        self, keys: List[str], values: List[str], query_limit: int = 100
-    ) -> str:
-        values = [f'"{v}"' if str(v).startswith("http") else v for v in values]
-
-        # The ORDER BY command is mandatory to make pagination predictable.
-        # In Neo4J, the return order may (!) be continuous, but it seems to
-        # depend on the data.
-        order_by_variable = "t.eol_pk"
-        return_variables = [
-            "obj.name",
-            "obj.uri",
-            "p.citation",
-            "p.page_id",
-            "pred.name",
-            "pred.uri",
-            "r.resource_id",
-            "t.citation",
-            "t.eol_pk",
-            "t.literal",
-            "t.normal_measurement",
-            "t.normal_units",
-            "t.object_page_id",
-            "t.resource_ok",
-            "t.scientific_name",
-            "t.source",
-            "units.name",
-            "units.uri",
+    def _iterate_cypher_response_rows(self, response) -> Generator[dict, None, None]:
+        self.logger.debug("Stream-decoding response data!")
+        try:
+            if metrics_registry.enabled:
+                yield from self._iterate_cypher_response_rows_with_metrics(response)
+            else:
+                yield from iterate_cypher_response_rows(response.raw)
+        finally:
+            self.close_response(response)
+
+    def _iterate_cypher_response_rows_with_metrics(
+        self, response
+    ) -> Generator[dict, None, None]:
+        # Only the time spent reading and decoding the body is measured, not the
+        # time the consumer of the rows needs.
+        number_of_rows = 0
+        read_duration = 0.0
+        stream = response.raw
+        rows = iterate_cypher_response_rows(stream)
+        try:
+            while True:
+                start = time.perf_counter()
+                row = next(rows, None)
+                read_duration += time.perf_counter() - start
+
+                if row is None:
+                    return
+
+                number_of_rows += 1
+                yield row
+        finally:
+            metrics_registry.increment("eol_api_rows_total", number_of_rows)
+            metrics_registry.increment("eol_api_response_bytes_total", stream.tell())
+            metrics_registry.observe("eol_api_response_read_seconds", read_duration)
+
+
+class EolTraitHybridHandler:
+    """Serves the data of an EOL traits CSV file and queries the EOL Cypher API
+    only for the pages missing in the file or marked as stale by `is_page_stale`.
+    The data is as complete as the one of the API at nearly the speed of
+    the CSV file. This is a DataHandler class and obeys the DataHandler interface.
+
+    The API records are converted into the columns of the CSV file, so the data
+    of both sources is normalized by the EolTraitCsvNormalizer. For stale pages,
+    the records of both sources are merged, where the API records replace the CSV
+    records with the same `eol_pk`.
+
+    Only data requested by page ID (including batches and subtrees) is completed
+    by the API. All other data is served from the CSV file.
+    """
+
+    columns = EolTraitCsvHandler.required_columns + ["citation"]
+
+    def __init__(
+        self,
+        csv_handler: EolTraitCsvHandler,
+        api_handler: EolTraitApiHandler,
+        is_page_stale: Optional[Callable[[int], bool]] = None,
+    ):
+        self.csv_handler = csv_handler
+        self.api_handler = api_handler
+        # Decides whether the CSV data of a page is outdated (default: never)
+        self.is_page_stale = is_page_stale
+        self.logger = logging.getLogger(__name__)
+
+    def iterate(self) -> Generator[dict, None, None]:
+        """Returns a generator yielding the items in the CSV file."""
+        return self.csv_handler.iterate()
+
+    def iterate_data_by_key(self, key: str, value: Any) -> Generator[dict, None, None]:
+        """Iterate all data for the given key, which also has to have the given
+        `value`. For the key "page_id", missing and stale pages are read from the
+        API.
+        """
+        return _iterate_records(self.fetch_raw_batches(key, [value]))
+
+    def iterate_subtree_data_by_page_id(
+        self, page_id: Union[str, int], max_depth: Optional[int] = None
+    ) -> Generator[dict, None, None]:
+        """Iterate all data of the given EOL page and all its descendant pages in
+        the taxon hierarchy, up to `max_depth` levels below the given page.
+
+        The descendant pages are taken from the pages CSV file of the CSV handler,
+        if given. Otherwise, the complete subtree is read from the API.
+        """
+        if self.csv_handler.pages_csv_file_path is None:
+            records = self.api_handler.iterate_subtree_data_by_page_id(
+                page_id, max_depth
+            )
+            return _iterate_records([self._convert_api_records(list(records))])
+
+        page_ids = self.csv_handler.get_taxon_hierarchy().get_descendant_page_ids(
+            page_id, max_depth
+        )
+        return _iterate_records(self.fetch_raw_batches("page_id", page_ids))
+
+    def iterate_batches(
+        self, key: str, values: Iterable[Any], batch_size: int = 10_000
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Iterate all data having one of the given `values` for the given key in
+        DataFrames of at most `batch_size` records, with the columns `columns`.
+        """
+        for raw_batch in self.fetch_raw_batches(key, values):
+            yield from self.parse_raw_batch(raw_batch, batch_size)
+
+    def fetch_raw_batches(
+        self, key: str, values: Iterable[Any]
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Yields the data having one of the given `values` for the given key as
+        DataFrames with the columns `columns`. For the key "page_id", the CSV data
+        of the up-to-date pages is yielded first, then the API data of the missing
+        and stale pages and finally the CSV data of the stale pages not returned by
+        the API.
+        """
+        if key != "page_id":
+            for raw_batch in self.csv_handler.fetch_raw_batches(key, values):
+                yield self._conform_to_columns(raw_batch)
+            return
+
+        page_ids = list(dict.fromkeys(int(page_id) for page_id in values))
+        data = self.csv_handler.get_data()
+        local_data = data.loc[data["page_id"].isin(page_ids)]
+        stale_page_ids, missing_page_ids = self._find_pages_to_fetch(
+            page_ids, local_data
+        )
+
+        is_stale = local_data["page_id"].isin(stale_page_ids)
+        yield self._conform_to_columns(local_data.loc[~is_stale])
+
+        api_eol_pks: Set[str] = set()
+        for api_batch in self._fetch_api_batches(missing_page_ids + stale_page_ids):
+            # The API may return a record for several pages
+            api_batch = api_batch.loc[~api_batch["eol_pk"].isin(api_eol_pks)]
+            api_eol_pks.update(api_batch["eol_pk"])
+            yield api_batch
+
+        stale_data = local_data.loc[is_stale]
+        yield self._conform_to_columns(
+            stale_data.loc[~stale_data["eol_pk"].isin(api_eol_pks)]
+        )
+
+    def parse_raw_batch(
+        self, raw_batch: pd.DataFrame, batch_size: int = 10_000
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Slices the DataFrame into batches of at most `batch_size` records."""
+        for start in range(0, len(raw_batch), batch_size):
+            yield raw_batch.iloc[start : start + batch_size]
+
+    def get_source_version(self) -> str:
+        """Returns a string that changes whenever the data of either source
+        changes.
+        """
+        return (
+            f"hybrid:{self.csv_handler.get_source_version()}|"
+            f"{self.api_handler.get_source_version()}"
+        )
+
+    def get_preload_tasks(self) -> Dict[str, Callable[[], Any]]:
+        """Returns the preload tasks of the CSV handler, see
+        `EolTraitCsvHandler.get_preload_tasks`.
+        """
+        return self.csv_handler.get_preload_tasks()
+
+    def _find_pages_to_fetch(
+        self, page_ids: List[int], local_data: pd.DataFrame
+    ) -> Tuple[List[int], List[int]]:
+        """Returns the stale pages and the pages missing in the CSV file."""
+        local_page_ids = set(local_data["page_id"].unique().tolist())
+        missing_page_ids = [
+            page_id for page_id in page_ids if page_id not in local_page_ids
         ]
+        stale_page_ids = (
+            []
+            if self.is_page_stale is None
+            else [
+                page_id
+                for page_id in page_ids
+                if page_id in local_page_ids and self.is_page_stale(page_id)
+            ]
+        )
 
-        return f"""MATCH (t:Trait)<-[:trait]-(p:Page),
-    (t)-[:supplier]->(r:Resource),
-    (t)-[:predicate]->(pred:Term)
-    WHERE {' AND '.join(f'{key} = {value}' for key, value in zip(keys, values))}
-    OPTIONAL MATCH (t)-[:object_term]->(obj:Term)
-    OPTIONAL MATCH (t)-[:normal_units_term]->(units:Term)
-    RETURN {', '.join(return_variables)}
-    ORDER BY {order_by_variable}
-    LIMIT {query_limit}"""
+        metrics_registry.increment(
+            "eol_hybrid_local_pages_total", len(local_page_ids) - len(stale_page_ids)
+        )
+        metrics_registry.increment(
+            "eol_hybrid_missing_pages_total", len(missing_page_ids)
+        )
+        metrics_registry.increment("eol_hybrid_stale_pages_total", len(stale_page_ids))
+        return stale_page_ids, missing_page_ids
+
+    def _fetch_api_batches(
+        self, page_ids: List[int]
+    ) -> Generator[pd.DataFrame, None, None]:
+        if not page_ids:
+            return
+
+        self.logger.debug("Reading %d pages from the EOL API...", len(page_ids))
+        for records in self.api_handler.fetch_raw_batches("page_id", page_ids):
+            yield self._convert_api_records(records)
+
+    def _convert_api_records(self, records: List[dict]) -> pd.DataFrame:
+        """Converts the records of the API handler into the columns of the CSV
+        file.
+        """
+        data = pd.DataFrame.from_records(
+            records, columns=self.api_handler.return_variables
+        )
+        # The citation of the trait takes precedence over the one of the page
+        data["t.citation"] = data["t.citation"].where(
+            data["t.citation"].notna(), data["p.citation"]
+        )
+        data = data.rename(columns=API_TO_CSV_COLUMN_NAMES)
+        return _replace_nan_by_none(self._conform_to_columns(data))
+
+    def _conform_to_columns(self, data: pd.DataFrame) -> pd.DataFrame:
+        missing_columns = {
+            column: None for column in self.columns if column not in data.columns
+        }
+        return data.assign(**missing_columns)[self.columns]
 
 
 def create_http_session(
@@ -293,17 +1040,30 @@ def create_http_session(
     return session
 
 
-def extract_limit_count_and_string(query_string: str) -> Tuple[int, str]:
-    """Returns the limit count and the complete limit string, in this order."""
-    regex_limit_count = re.search("(LIMIT ([0-9]+))", query_string, re.IGNORECASE)
+def iterate_cypher_response_rows(stream) -> Generator[dict, None, None]:
+    """Incrementally decodes a Cypher API response body from the given binary stream
+    and yields one dict per data row, mapping the column names to the row values.
 
-    if regex_limit_count is None:
-        raise ValueError(
-            f"The given query string '{query_string}' "
-            f"does not stick the convention!"
-        )
+    Rows are yielded as soon as they are decoded, i.e. before the complete body
+    is read. If the body contains the "columns" only after the "data", the rows
+    are buffered until the column names are known.
+    """
+    column_names: List[str] = []
+    buffered_rows = []
 
-    return int(regex_limit_count.group(2)), regex_limit_count.group(1)
+    events = ijson.parse(stream, use_float=True)
+    for prefix, event, value in events:
+        if prefix == "columns.item":
+            column_names.append(value)
+        elif prefix == "data.item" and event == "start_array":
+            row = _build_json_value(events, event, value)
+            if column_names:
+                yield dict(zip(column_names, row))
+            else:
+                buffered_rows.append(row)
+
+    for row in buffered_rows:
+        yield dict(zip(column_names, row))
 
 
 def raise_if_response_contains_error(response):
@@ -312,6 +1072,96 @@ def raise_if_response_contains_error(response):
         raise SyntaxError(f"The EOL API returned with an error! Message: {response}")
 
 
+def _build_json_value(events, start_event: str, start_value: Any) -> Any:
+    """Consumes the ijson `events` until the container opened by `start_event`
+    is closed and returns the built Python object.
+    """
+    builder = ijson.ObjectBuilder()
+    builder.event(start_event, start_value)
+
+    depth = 1
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in ("start_array", "start_map"):
+            depth += 1
+        elif event in ("end_array", "end_map"):
+            depth -= 1
+
+        if depth == 0:
+            break
+
+    return builder.value
+
+
+def _is_parameter_error(response) -> bool:
+    """Returns True, if the response rejects the parameters of a query, e.g. by a
+    Neo4J "ParameterMissing" error.
+    """
+    return response.status_code != 200 and "parameter" in response.text.lower()
+
+
+def _replace_nan_by_none(data: pd.DataFrame) -> pd.DataFrame:
+    return data.replace({np.nan: None})
+
+
+class _CountingIterator:
+    """Counts the items taken from the wrapped iterator."""
+
+    def __init__(self, iterator: Iterator):
+        self.iterator = iterator
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self.iterator)
+        self.count += 1
+        return item
+
+
+def _to_paged_cypher_query(cypher_query: Union[str, CypherQuery]) -> CypherQuery:
+    if isinstance(cypher_query, str):
+        cypher_query = CypherQuery.from_string(cypher_query)
+    if cypher_query.limit is None:
+        raise ValueError("You have to provide a LIMIT to your query!")
+    return cypher_query
+
+
+def _is_last_page(
+    sizing: str, page_row_count: int, limit_count: int, has_more_rows: bool
+) -> bool:
+    if sizing == SHORT_PAGE_SIZING:
+        return page_row_count < limit_count
+    if sizing == HAS_MORE_SIZING:
+        return not has_more_rows
+    # The number of pages of the COUNT_SIZING is known upfront
+    return False
+
+
+def _stop_prefetching(
+    executor: Optional[ThreadPoolExecutor],
+    response_future: Optional[Future],
+    close_response: Callable[[Any], None],
+) -> None:
+    if response_future is not None and not response_future.cancel():
+        try:
+            close_response(response_future.result())
+        except Exception:  # pylint: disable=broad-except
+            # The prefetched page is not needed, only its error is logged
+            logging.getLogger(__name__).debug(
+                "Discarding the failed prefetched page", exc_info=True
+            )
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def _iterate_records(batches: Iterable[pd.DataFrame]) -> Generator[dict, None, None]:
+    for batch in batches:
+        for _, series in batch.iterrows():
+            yield _convert_pandas_object_to_dict(series)
+
+
 def _convert_pandas_object_to_dict(pandas_obj) -> dict:
     if isinstance(pandas_obj, pd.Series):
         new_dict = dict(pandas_obj.to_dict())
@@ -0,0 +1,95 @@
+"""Module for traversing the EOL taxon hierarchy without the EOL API.
+
+The hierarchy is read from the pages CSV file of the EOL trait bank dump, which
+holds the parent page ID of each page ("page_id,parent_id,rank,canonical").
+"""
+
+from __future__ import annotations
+
+import pathlib
+from typing import TYPE_CHECKING, Optional, Union
+
+from eol.concurrency import make_read_only
+from eol.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+
+PAGE_ID_COLUMN_NAME = "page_id"
+PARENT_ID_COLUMN_NAME = "parent_id"
+
+# Marks pages without a parent
+NO_PARENT_ID = -1
+
+
+class TaxonHierarchy:
+    """A precomputed parent index over the EOL pages.
+
+    The child pages are sorted by their parent page ID, so the children of any
+    number of pages are found by binary searches. A subtree is collected level by
+    level.
+    """
+
+    def __init__(self, page_ids: np.ndarray, parent_ids: np.ndarray):
+        order = np.argsort(parent_ids, kind="stable")
+        self._sorted_parent_ids = make_read_only(
+            np.asarray(parent_ids, dtype=np.int64)[order]
+        )
+        self._child_page_ids = make_read_only(
+            np.asarray(page_ids, dtype=np.int64)[order]
+        )
+
+    @classmethod
+    def from_csv_file(cls, csv_file_path: Union[str, pathlib.Path]) -> "TaxonHierarchy":
+        """Reads the hierarchy from an EOL pages CSV file."""
+        df = pd.read_csv(
+            csv_file_path,
+            usecols=[PAGE_ID_COLUMN_NAME, PARENT_ID_COLUMN_NAME],
+            dtype={PAGE_ID_COLUMN_NAME: "int64", PARENT_ID_COLUMN_NAME: "Int64"},
+        )
+        return cls(
+            df[PAGE_ID_COLUMN_NAME].to_numpy(),
+            df[PARENT_ID_COLUMN_NAME].fillna(NO_PARENT_ID).to_numpy(dtype=np.int64),
+        )
+
+    def get_child_page_ids(self, page_ids: np.ndarray) -> np.ndarray:
+        """Returns the page IDs of all direct children of the given pages."""
+        page_ids = np.asarray(page_ids, dtype=np.int64)
+        starts = np.searchsorted(self._sorted_parent_ids, page_ids, "left")
+        stops = np.searchsorted(self._sorted_parent_ids, page_ids, "right")
+
+        # Concatenate all ranges [start, stop) without a Python loop
+        lengths = stops - starts
+        range_offsets = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - range_offsets, lengths) + np.arange(
+            lengths.sum()
+        )
+        return self._child_page_ids[positions]
+
+    def get_descendant_page_ids(
+        self, page_id: Union[str, int], max_depth: Optional[int] = None
+    ) -> np.ndarray:
+        """Returns the given page ID and the page IDs of all its descendants.
+        If `max_depth` is given, only descendants up to this depth are returned
+        (e.g. 1 for the direct children only).
+        """
+        descendant_page_ids = [np.array([int(page_id)], dtype=np.int64)]
+        visited_page_ids = descendant_page_ids[0]
+        current_level = visited_page_ids
+
+        depth = 0
+        while len(current_level) and (max_depth is None or depth < max_depth):
+            # Guards against cycles in the hierarchy
+            current_level = np.setdiff1d(
+                self.get_child_page_ids(current_level), visited_page_ids
+            )
+            descendant_page_ids.append(current_level)
+            visited_page_ids = np.union1d(visited_page_ids, current_level)
+            depth += 1
+
+        return np.concatenate(descendant_page_ids)
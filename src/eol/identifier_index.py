@@ -0,0 +1,399 @@
+"""Module for compiling the EOL identifier map CSV into a binary index.
+
+The index is a directory of NumPy arrays, which are opened memory-mapped.
+Opening an index takes milliseconds, independent of its size, and all processes
+on the same machine share the pages of the index via the operating system.
+
+The rows of the index are kept in the order of the CSV file. For each lookup key
+(the hashed provider ID, the numeric provider ID and the EOL page ID), the index
+holds the sorted keys and the corresponding row numbers, so lookups are binary
+searches (`numpy.searchsorted`).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import pathlib
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+
+from eol.data import iterate_csv_chunks
+from eol.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+
+INDEX_FORMAT_VERSION = 1
+HEADER_FILE_NAME = "header.json"
+
+RESOURCE_PK_COLUMN_NAME = "resource_pk"
+PAGE_ID_COLUMN_NAME = "page_id"
+PROVIDER_COLUMN_NAME = "resource_id"
+
+# Names of the arrays stored in the index directory
+ARRAY_NAMES = (
+    "page_ids",
+    "providers",
+    "resource_pk_bytes",
+    "resource_pk_offsets",
+    "resource_pk_hash_keys",
+    "resource_pk_hash_rows",
+    "resource_pk_numeric_keys",
+    "resource_pk_numeric_rows",
+    "page_id_keys",
+    "page_id_rows",
+)
+
+
+class IdentifierMapIndex:
+    """Read-only access to a compiled identifier map index.
+    Create the index with `compile_identifier_map_index`.
+    """
+
+    def __init__(self, index_directory: Union[str, pathlib.Path]):
+        self.index_directory = pathlib.Path(index_directory)
+
+        with open(self.index_directory / HEADER_FILE_NAME) as header_file:
+            self.header = json.load(header_file)
+
+        if self.header.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"The identifier map index in '{self.index_directory}' has an "
+                f"unsupported format version! Please recompile it."
+            )
+
+        self._arrays: Dict[str, np.ndarray] = {
+            name: np.load(self.index_directory / f"{name}.npy", mmap_mode="r")
+            for name in ARRAY_NAMES
+        }
+
+    def __len__(self) -> int:
+        return self.header["row_count"]
+
+    @property
+    def page_ids(self) -> np.ndarray:
+        """The EOL page IDs of all rows."""
+        return self._arrays["page_ids"]
+
+    @property
+    def providers(self) -> np.ndarray:
+        """The data provider IDs of all rows."""
+        return self._arrays["providers"]
+
+    def find_rows(
+        self,
+        key_column_name: str,
+        keys: pd.Series,
+        provider_ids: Optional[Iterable[int]] = None,
+    ) -> np.ndarray:
+        """Returns for each key the first row number matching the key, or -1 if
+        there is none.
+
+        `keys` are either EOL page IDs (`key_column_name` is "page_id") or provider
+        IDs ("resource_pk"). Provider IDs with an integer dtype are matched against
+        the numeric provider IDs, all others as strings.
+        If `provider_ids` are given, only rows of these data providers are considered.
+        """
+        sorted_keys, sorted_rows, search_keys, is_valid = self._prepare_search(
+            key_column_name, keys
+        )
+        return _find_first_rows(
+            sorted_keys,
+            sorted_rows,
+            search_keys,
+            is_valid,
+            self.providers,
+            None if provider_ids is None else np.asarray(list(provider_ids)),
+        )
+
+    def find_all_rows(
+        self,
+        key_column_name: str,
+        key: Union[str, int],
+        provider_ids: Optional[Iterable[int]] = None,
+    ) -> np.ndarray:
+        """Returns all row numbers matching the single `key`, in CSV order."""
+        keys = pd.Series([key])
+        if key_column_name == PAGE_ID_COLUMN_NAME:
+            keys = keys.astype("int64")
+        else:
+            keys = keys.astype(str)
+
+        sorted_keys, sorted_rows, search_keys, _ = self._prepare_search(
+            key_column_name, keys
+        )
+        start = np.searchsorted(sorted_keys, search_keys[0], "left")
+        stop = np.searchsorted(sorted_keys, search_keys[0], "right")
+        rows = np.sort(np.asarray(sorted_rows[start:stop], dtype=np.int64))
+
+        if provider_ids is not None:
+            rows = rows[np.isin(self.providers[rows], list(provider_ids))]
+        return rows
+
+    def get_values(self, column_name: str, rows: np.ndarray):
+        """Returns the values of the given column for the given row numbers as
+        nullable array. Row numbers of -1 result in <NA>.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        is_found = rows >= 0
+
+        if column_name == PAGE_ID_COLUMN_NAME:
+            values = np.zeros(len(rows), dtype=np.int64)
+            values[is_found] = self.page_ids[rows[is_found]]
+            return pd.arrays.IntegerArray(values, ~is_found)
+
+        if column_name == PROVIDER_COLUMN_NAME:
+            values = np.zeros(len(rows), dtype=np.int64)
+            values[is_found] = self.providers[rows[is_found]]
+            return pd.arrays.IntegerArray(values, ~is_found)
+
+        return pd.array(self._get_resource_pks(rows), dtype="string")
+
+    def to_data_frame(self, provider_ids: Optional[Iterable[int]] = None):
+        """Returns the rows of the given data providers as DataFrame with the same
+        columns as the identifier map CSV file.
+        """
+        rows = np.arange(len(self), dtype=np.int64)
+        if provider_ids is not None:
+            rows = rows[np.isin(self.providers, list(provider_ids))]
+
+        return pd.DataFrame(
+            {
+                RESOURCE_PK_COLUMN_NAME: self._get_resource_pks(rows),
+                PROVIDER_COLUMN_NAME: np.asarray(self.providers[rows], dtype="int64"),
+                PAGE_ID_COLUMN_NAME: np.asarray(self.page_ids[rows], dtype="int64"),
+            }
+        )
+
+    def _get_resource_pks(self, rows: np.ndarray) -> List[Optional[str]]:
+        resource_pk_bytes = self._arrays["resource_pk_bytes"]
+        offsets = self._arrays["resource_pk_offsets"]
+        resource_pks: List[Optional[str]] = []
+        for row in rows:
+            if row < 0:
+                resource_pks.append(None)
+            else:
+                start, stop = offsets[row], offsets[row + 1]
+                resource_pks.append(bytes(resource_pk_bytes[start:stop]).decode())
+        return resource_pks
+
+    def _prepare_search(self, key_column_name: str, keys: pd.Series):
+        if key_column_name == PAGE_ID_COLUMN_NAME:
+            keys = keys.astype("Int64")
+            return (
+                self._arrays["page_id_keys"],
+                self._arrays["page_id_rows"],
+                keys.fillna(0).to_numpy(dtype=np.int64),
+                keys.notna().to_numpy(),
+            )
+
+        if key_column_name != RESOURCE_PK_COLUMN_NAME:
+            raise ValueError(f"'{key_column_name}' is not a key of the index!")
+
+        if pd.api.types.is_integer_dtype(keys.dtype):
+            keys = keys.astype("Int64")
+            return (
+                self._arrays["resource_pk_numeric_keys"],
+                self._arrays["resource_pk_numeric_rows"],
+                keys.fillna(0).to_numpy(dtype=np.int64),
+                keys.notna().to_numpy(),
+            )
+
+        is_valid = keys.notna().to_numpy()
+        return (
+            self._arrays["resource_pk_hash_keys"],
+            self._arrays["resource_pk_hash_rows"],
+            hash_strings(keys.fillna("").astype(str).to_numpy(dtype=object)),
+            is_valid,
+        )
+
+
+def compile_identifier_map_index(
+    csv_file_path: Union[str, pathlib.Path],
+    index_directory: Union[str, pathlib.Path],
+    chunk_size: int = 1_000_000,
+) -> IdentifierMapIndex:
+    """Compiles the EOL identifier map CSV file into a binary index in the given
+    directory, covering all data providers, and returns the opened index.
+
+    The CSV file (which can be compressed) is read in chunks of `chunk_size` rows,
+    see `eol.data.iterate_csv_chunks`. Provider IDs are looked up
+    by a 64-bit hash, so a hash collision of two different provider IDs is
+    possible, though very unlikely.
+    """
+    logger = logging.getLogger(__name__)
+    index_directory = pathlib.Path(index_directory)
+    index_directory.mkdir(parents=True, exist_ok=True)
+    # An existing index is invalid while it is overwritten
+    (index_directory / HEADER_FILE_NAME).unlink(missing_ok=True)
+
+    page_id_chunks, provider_chunks, hash_chunks = [], [], []
+    numeric_chunks, is_numeric_chunks = [], []
+    resource_pk_byte_chunks, resource_pk_length_chunks = [], []
+
+    logger.info("Compiling identifier map index from '%s'...", csv_file_path)
+    csv_chunks = iterate_csv_chunks(
+        csv_file_path,
+        chunk_rows=chunk_size,
+        usecols=[RESOURCE_PK_COLUMN_NAME, PROVIDER_COLUMN_NAME, PAGE_ID_COLUMN_NAME],
+        dtype={
+            RESOURCE_PK_COLUMN_NAME: "str",
+            PROVIDER_COLUMN_NAME: "int32",
+            PAGE_ID_COLUMN_NAME: "int64",
+        },
+        keep_default_na=False,
+    )
+    for chunk in csv_chunks:
+        resource_pks = chunk[RESOURCE_PK_COLUMN_NAME].to_numpy(dtype=object)
+        encoded_resource_pks = [pk.encode("utf-8") for pk in resource_pks]
+
+        page_id_chunks.append(chunk[PAGE_ID_COLUMN_NAME].to_numpy())
+        provider_chunks.append(chunk[PROVIDER_COLUMN_NAME].to_numpy())
+        hash_chunks.append(hash_strings(resource_pks))
+        numeric_values, is_numeric = _as_canonical_integers(
+            chunk[RESOURCE_PK_COLUMN_NAME]
+        )
+        numeric_chunks.append(numeric_values)
+        is_numeric_chunks.append(is_numeric)
+        resource_pk_byte_chunks.append(b"".join(encoded_resource_pks))
+        resource_pk_length_chunks.append(
+            np.fromiter(map(len, encoded_resource_pks), dtype=np.int64)
+        )
+
+    page_ids = _concatenate(page_id_chunks, np.int64)
+    row_count = len(page_ids)
+    row_dtype = np.int32 if row_count < 2**31 else np.int64
+
+    resource_pk_offsets = np.zeros(row_count + 1, dtype=np.int64)
+    np.cumsum(
+        _concatenate(resource_pk_length_chunks, np.int64), out=resource_pk_offsets[1:]
+    )
+
+    arrays = {
+        "page_ids": page_ids,
+        "providers": _concatenate(provider_chunks, np.int32),
+        "resource_pk_bytes": np.frombuffer(
+            b"".join(resource_pk_byte_chunks), dtype=np.uint8
+        ),
+        "resource_pk_offsets": resource_pk_offsets,
+    }
+    arrays.update(
+        _create_sorted_key(
+            "resource_pk_hash", _concatenate(hash_chunks, np.uint64), row_dtype
+        )
+    )
+    arrays.update(_create_sorted_key("page_id", page_ids, row_dtype))
+
+    # Provider IDs that are integers can be looked up without hashing strings
+    numeric_rows = np.flatnonzero(_concatenate(is_numeric_chunks, bool))
+    numeric_keys = _concatenate(numeric_chunks, np.int64)[numeric_rows]
+    order = np.argsort(numeric_keys, kind="stable")
+    arrays["resource_pk_numeric_keys"] = numeric_keys[order]
+    arrays["resource_pk_numeric_rows"] = numeric_rows[order].astype(row_dtype)
+
+    for name, array in arrays.items():
+        np.save(index_directory / f"{name}.npy", array)
+
+    # The header is written last, since it marks the index as complete
+    with open(index_directory / HEADER_FILE_NAME, "w") as header_file:
+        json.dump(
+            {
+                "format_version": INDEX_FORMAT_VERSION,
+                "row_count": row_count,
+                "source": str(csv_file_path),
+            },
+            header_file,
+        )
+
+    logger.info("Compiled identifier map index with %d rows!", row_count)
+    return IdentifierMapIndex(index_directory)
+
+
+def is_identifier_map_index(path: Union[str, pathlib.Path]) -> bool:
+    """Returns True, if the given path is a compiled identifier map index."""
+    return (pathlib.Path(path) / HEADER_FILE_NAME).is_file()
+
+
+def hash_strings(values: np.ndarray) -> np.ndarray:
+    """Returns a 64-bit hash for each string, which is stable across processes."""
+    return pd.util.hash_array(values, categorize=False)
+
+
+def _find_first_rows(  # pylint: disable=too-many-arguments
+    sorted_keys: np.ndarray,
+    sorted_rows: np.ndarray,
+    search_keys: np.ndarray,
+    is_valid: np.ndarray,
+    providers: np.ndarray,
+    provider_ids: Optional[np.ndarray],
+) -> np.ndarray:
+    # Binary searches for sorted search keys are much more cache friendly
+    search_order = np.argsort(search_keys, kind="stable")
+    ordered_search_keys = search_keys[search_order]
+    starts = np.empty(len(search_keys), dtype=np.int64)
+    stops = np.empty(len(search_keys), dtype=np.int64)
+    starts[search_order] = np.searchsorted(sorted_keys, ordered_search_keys, "left")
+    stops[search_order] = np.searchsorted(sorted_keys, ordered_search_keys, "right")
+
+    rows = np.full(len(search_keys), -1, dtype=np.int64)
+    candidates = starts
+    is_pending = is_valid & (candidates < stops)
+
+    # Equal keys are rare (the same ID in several data providers), so only
+    # a few iterations over the candidates are required.
+    while is_pending.any():
+        pending_positions = np.flatnonzero(is_pending)
+        candidate_rows = np.asarray(
+            sorted_rows[candidates[pending_positions]], dtype=np.int64
+        )
+
+        if provider_ids is None:
+            is_accepted = np.ones(len(candidate_rows), dtype=bool)
+        else:
+            is_accepted = np.isin(providers[candidate_rows], provider_ids)
+
+        rows[pending_positions[is_accepted]] = candidate_rows[is_accepted]
+        is_pending[pending_positions[is_accepted]] = False
+
+        candidates[pending_positions] += 1
+        is_pending &= candidates < stops
+
+    return rows
+
+
+def _create_sorted_key(
+    key_name: str, keys: np.ndarray, row_dtype
+) -> Dict[str, np.ndarray]:
+    order = np.argsort(keys, kind="stable")
+    return {
+        f"{key_name}_keys": keys[order],
+        f"{key_name}_rows": order.astype(row_dtype),
+    }
+
+
+def _as_canonical_integers(resource_pks: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the integer value of each provider ID and a mask of the IDs that are
+    exactly the string representation of an integer (e.g. not "007" or "1e3").
+    """
+    numbers = pd.to_numeric(resource_pks, errors="coerce")
+    # Larger numbers cannot be represented exactly as float
+    is_integer = (numbers % 1 == 0) & (numbers.abs() < 2**53)
+
+    values = np.zeros(len(resource_pks), dtype=np.int64)
+    values[is_integer.to_numpy()] = numbers[is_integer].astype("int64").to_numpy()
+
+    is_canonical = is_integer.to_numpy() & (
+        values.astype(str) == resource_pks.to_numpy(dtype=str)
+    )
+    return values, is_canonical
+
+
+def _concatenate(chunks: List[np.ndarray], dtype) -> np.ndarray:
+    if not chunks:
+        return np.array([], dtype=dtype)
+    return np.concatenate(chunks).astype(dtype, copy=False)
@@ -0,0 +1,43 @@
+"""Module for importing heavy dependencies on their first use.
+
+Importing pandas, numpy and requests takes a considerable amount of time, which
+processes that e.g. only need the `Triple` class should not pay. The modules
+of this package refer to these dependencies via `lazy_import`:
+
+    if TYPE_CHECKING:
+        import pandas as pd
+    else:
+        pd = lazy_import("pandas")
+
+Modules doing so have to use `from __future__ import annotations`, otherwise their
+type annotations trigger the import.
+"""
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """A placeholder for a module, which is imported on the first attribute access.
+    Afterwards, all attributes of the module are copied to the placeholder, so
+    the placeholder is as fast as the module itself.
+    """
+
+    def __getattr__(self, attribute_name: str):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute_name)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def lazy_import(module_name: str) -> types.ModuleType:
+    """Returns a placeholder for the module, which imports it on first use.
+    If the module was already imported, it is returned directly.
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    return LazyModule(module_name)
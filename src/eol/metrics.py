@@ -0,0 +1,221 @@
+"""Lightweight counters and latency histograms for instrumenting harvest runs.
+
+All hooks in the harvester report to the module-wide `metrics_registry`. The
+registry is disabled by default, in which case every hook returns immediately.
+The collected metrics can be exported in the Prometheus text format (e.g. for the
+node_exporter textfile collector) or as JSON.
+"""
+
+import bisect
+import functools
+import json
+import os
+import pathlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Generator, List, Sequence, Union
+
+# Upper bounds of the latency histogram buckets in seconds
+DEFAULT_LATENCY_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Histogram:
+    """A cumulative histogram with fixed bucket upper bounds."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # The last count holds all observations larger than the largest bucket
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Adds a single observation to the histogram."""
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[int]:
+        """Returns the number of observations less or equal to each bucket bound,
+        including the "+Inf" bucket as last element.
+        """
+        cumulative_counts = []
+        total = 0
+        for bucket_count in self.bucket_counts:
+            total += bucket_count
+            cumulative_counts.append(total)
+        return cumulative_counts
+
+    def as_dict(self) -> dict:
+        """Returns a JSON serializable representation of the histogram."""
+        bucket_names = [_format_number(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(bucket_names, self.cumulative_counts())),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class MetricsRegistry:
+    """Collects counters and histograms by name.
+
+    When the registry is disabled, all recording methods are no-ops. Recording
+    is thread-safe.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        """Increases the counter `name` by `amount`."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float) -> None:
+        """Adds the `value` to the histogram `name`."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def time(self, name: str) -> Generator[None, None, None]:
+        """Context manager recording the duration of its body in the histogram
+        `name`.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name: str) -> Callable:
+        """Decorator recording the duration of each function call in the histogram
+        `name`.
+        """
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def reset(self) -> None:
+        """Removes all recorded metrics."""
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def as_dict(self) -> dict:
+        """Returns a JSON serializable snapshot of all recorded metrics."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: histogram.as_dict()
+                    for name, histogram in self.histograms.items()
+                },
+            }
+
+    def to_json(self) -> str:
+        """Returns all recorded metrics as JSON string."""
+        return json.dumps(self.as_dict(), indent=2, sort_keys=True)
+
+    def to_prometheus_text(self) -> str:
+        """Returns all recorded metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {_format_number(value)}")
+
+            for name, histogram in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                bucket_names = [_format_number(b) for b in histogram.buckets]
+                bucket_names.append("+Inf")
+                for bucket_name, count in zip(
+                    bucket_names, histogram.cumulative_counts()
+                ):
+                    lines.append(f'{name}_bucket{{le="{bucket_name}"}} {count}')
+                lines.append(f"{name}_sum {_format_number(histogram.sum)}")
+                lines.append(f"{name}_count {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_text_file(self, file_path: Union[str, pathlib.Path]) -> None:
+        """Writes the metrics in the Prometheus text format to the given file.
+        The file is replaced atomically, so a collector never reads a partial file.
+        """
+        _write_atomically(file_path, self.to_prometheus_text())
+
+    def write_json_file(self, file_path: Union[str, pathlib.Path]) -> None:
+        """Writes the metrics as JSON to the given file."""
+        _write_atomically(file_path, self.to_json())
+
+
+metrics_registry = MetricsRegistry()
+
+
+def enable_metrics() -> MetricsRegistry:
+    """Starts recording metrics in the module-wide registry and returns it."""
+    metrics_registry.enabled = True
+    return metrics_registry
+
+
+def disable_metrics() -> None:
+    """Stops recording metrics in the module-wide registry.
+    Already recorded metrics are kept.
+    """
+    metrics_registry.enabled = False
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _write_atomically(file_path: Union[str, pathlib.Path], content: str) -> None:
+    file_path = pathlib.Path(file_path)
+    temporary_file_path = file_path.with_name(f".{file_path.name}.tmp")
+    with open(temporary_file_path, "w") as out_file:
+        out_file.write(content)
+    os.replace(temporary_file_path, file_path)
@@ -0,0 +1,178 @@
+"""Module for finding EOL pages by the scientific names of their taxa.
+
+The scientific names in the EOL trait data contain HTML markup and the authorship,
+e.g. "<i>Metharpinia longirostris</i> Schellenberg 1931". The `ScientificNameIndex`
+maps the canonical names (e.g. "Metharpinia longirostris") to the page IDs.
+"""
+
+from __future__ import annotations
+
+import bisect
+import html
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from eol.concurrency import make_read_only
+from eol.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+
+HTML_TAG_PATTERN = re.compile(r"<[^>]*>")
+# A subgenus following the genus, e.g. "(Ctenodaphnia)"
+SUBGENUS_PATTERN = re.compile(r"\([A-Z][a-z-]+\)")
+
+# Words marking an uncertain identification, e.g. "Acer cf. campestre"
+QUALIFIERS = {"cf.", "aff."}
+
+# Words between the epithets of infraspecific and hybrid names
+RANK_MARKERS = {"subsp.", "ssp.", "var.", "subvar.", "f.", "forma", "×"}
+
+# Lowercase words starting the authorship, e.g. "de Candolle"
+AUTHOR_PARTICLES = {
+    "d'",
+    "da",
+    "de",
+    "del",
+    "der",
+    "di",
+    "du",
+    "la",
+    "le",
+    "van",
+    "von",
+}
+
+
+def normalize_scientific_name(scientific_name: str) -> str:
+    """Returns the canonical name of the given scientific name, without markup and
+    authorship, e.g. "Metharpinia longirostris" for
+    "<i>Metharpinia longirostris</i> Schellenberg 1931".
+
+    The canonical name consists of the first word and all following lowercase
+    epithets (and rank markers like "var."). A subgenus and qualifiers like "cf."
+    are left out, e.g. "Daphnia magna" for "Daphnia (Ctenodaphnia) magna".
+    """
+    words = html.unescape(HTML_TAG_PATTERN.sub(" ", scientific_name)).split()
+    if not words:
+        return ""
+
+    canonical_words = [words[0]]
+    if len(words) > 1 and SUBGENUS_PATTERN.fullmatch(words[1]):
+        del words[1]
+    for word in words[1:]:
+        if word.lower() in QUALIFIERS:
+            continue
+        if word.lower() in RANK_MARKERS:
+            canonical_words.append(word.lower())
+        elif _is_epithet(word):
+            canonical_words.append(word)
+        else:
+            break
+
+    # A rank marker without epithet belongs to the authorship
+    while len(canonical_words) > 1 and canonical_words[-1] in RANK_MARKERS:
+        canonical_words.pop()
+    return " ".join(canonical_words)
+
+
+def create_name_key(scientific_name: str) -> str:
+    """Returns the key of the name in the index, which ignores markup, authorship
+    and the case.
+    """
+    return normalize_scientific_name(scientific_name).casefold()
+
+
+class ScientificNameIndex:
+    """Maps canonical scientific names to the IDs of the EOL pages with this name.
+
+    The name keys are sorted, so exact and prefix lookups are binary searches.
+    """
+
+    def __init__(self, page_ids: np.ndarray, scientific_names: pd.Series):
+        names = pd.DataFrame(
+            {
+                "page_id": np.asarray(page_ids, dtype=np.int64),
+                "scientific_name": pd.Series(scientific_names, copy=False).to_numpy(),
+            }
+        )
+        names = names.dropna().drop_duplicates()
+
+        # Each distinct name is normalized only once
+        unique_names = pd.Series(names["scientific_name"].unique())
+        canonical_names = dict(
+            zip(unique_names, unique_names.map(normalize_scientific_name))
+        )
+        names["canonical_name"] = names["scientific_name"].map(canonical_names)
+        names["key"] = names["canonical_name"].str.casefold()
+        names = (
+            names.loc[names["key"] != "", ["key", "canonical_name", "page_id"]]
+            .drop_duplicates(["key", "page_id"])
+            .sort_values(["key", "page_id"], kind="stable")
+        )
+
+        self._number_of_names = names["key"].nunique()
+        self._keys: Tuple[str, ...] = tuple(names["key"])
+        self._canonical_names: Tuple[str, ...] = tuple(names["canonical_name"])
+        self._page_ids = make_read_only(names["page_id"].to_numpy())
+
+    @classmethod
+    def from_trait_data(
+        cls,
+        data: pd.DataFrame,
+        page_id_column_name: str = "page_id",
+        scientific_name_column_name: str = "scientific_name",
+    ) -> "ScientificNameIndex":
+        """Builds the index from the data of the EOL trait CSV file."""
+        return cls(
+            data[page_id_column_name].to_numpy(), data[scientific_name_column_name]
+        )
+
+    def __len__(self) -> int:
+        """Returns the number of distinct canonical names."""
+        return self._number_of_names
+
+    def get_page_ids(self, scientific_name: str) -> np.ndarray:
+        """Returns the sorted IDs of the pages with the given name (read-only).
+        Markup, authorship and the case of the given name are ignored.
+        """
+        key = create_name_key(scientific_name)
+        start = bisect.bisect_left(self._keys, key)
+        stop = bisect.bisect_right(self._keys, key, lo=start)
+        return self._page_ids[start:stop]
+
+    def find_names(
+        self, prefix: str, limit: Optional[int] = None
+    ) -> Dict[str, List[int]]:
+        """Returns the canonical names starting with the given prefix (ignoring the
+        case) and their page IDs, in alphabetical order. At most `limit` names are
+        returned, if given.
+        """
+        # A trailing space is kept, e.g. to find the species of a genus
+        key_prefix = re.sub(r"\s+", " ", html.unescape(prefix)).lstrip().casefold()
+        start = bisect.bisect_left(self._keys, key_prefix)
+
+        names: Dict[str, List[int]] = {}
+        for index in range(start, len(self._keys)):
+            if not self._keys[index].startswith(key_prefix):
+                break
+            canonical_name = self._canonical_names[index]
+            if canonical_name not in names:
+                if limit is not None and len(names) >= limit:
+                    break
+                names[canonical_name] = []
+            names[canonical_name].append(int(self._page_ids[index]))
+        return names
+
+
+def _is_epithet(word: str) -> bool:
+    return (
+        word.islower()
+        and word.replace("-", "").isalpha()
+        and word not in AUTHOR_PARTICLES
+    )
@@ -1,8 +1,15 @@
+from __future__ import annotations
+
 from copy import copy
+from typing import TYPE_CHECKING
 
 import eol.variables as variables
+from eol.metrics import metrics_registry
 from eol.triple_generator import TripleGenerator
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class Normalizer:
     """A base class for all normalization processes of EOL data sources.
@@ -16,6 +23,7 @@ class Normalizer:
     # A list of keys to be delete
     delete_keys = []
 
+    @metrics_registry.timed("eol_normalize_seconds")
     def normalize(self, data: dict) -> dict:
         """Normalizes the keys in the given data.
         This function returns a new dictionary.
@@ -32,6 +40,21 @@ class Normalizer:
 
         return data_copy
 
+    @metrics_registry.timed("eol_normalize_batch_seconds")
+    def normalize_batch(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Normalizes the columns of the given batch of records, as `normalize` does
+        for a single record. This function returns a new DataFrame, which shares
+        the column data with the given one.
+        """
+        data_copy = data.copy(deep=False)
+
+        for old_key, normalized_key in self.normalized_keys.items():
+            replace_column_by_new_column(old_key, normalized_key, data_copy)
+
+        return data_copy.drop(
+            columns=[key for key in self.delete_keys if key in data_copy.columns]
+        )
+
 
 class EolTraitCsvNormalizer(Normalizer):
     """This class normalizes the data provided by the EolTraitCsvHandler."""
@@ -95,6 +118,31 @@ def replace_key_by_new_key(old_key: str, new_key: str, data: dict) -> None:
         del data[old_key]
 
 
+def replace_column_by_new_column(
+    old_key: str, new_key: str, data: pd.DataFrame
+) -> None:
+    """The columnar equivalent of `replace_key_by_new_key`.
+    The exchange is done in-place.
+    """
+    if old_key == new_key or old_key not in data.columns:
+        return
+
+    old_values = data[old_key]
+    if new_key in data.columns:
+        new_values = data[new_key]
+        conflicts = old_values.notna() & new_values.notna() & (old_values != new_values)
+        if conflicts.any():
+            raise ValueError(
+                f"Multiple keys map to the value {new_key}, but both have "
+                f"valid (not-None) values!"
+            )
+        data[new_key] = new_values.where(new_values.notna(), old_values)
+    else:
+        data[new_key] = old_values
+
+    del data[old_key]
+
+
 if __name__ == "__main__":
     # How to use the DataHandler and Normalizer in conjunction
 
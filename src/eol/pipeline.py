@@ -0,0 +1,208 @@
+"""A staged pipeline that overlaps network requests, parsing and triple generation.
+
+Each stage runs in its own worker threads and hands its results to the next stage
+via a bounded queue. When a stage is slower than its predecessor, the queue fills
+up and the predecessor blocks (backpressure), so the memory usage is bounded.
+With enough workers per stage, the throughput approaches the one of the slowest
+stage instead of the sum of all stages:
+
+    pipeline = StagedPipeline(
+        [
+            Stage("fetch", fetch_records, workers=4),
+            Stage("parse", parse_records),
+            Stage("generate", generate_triples),
+        ]
+    )
+    for triples in pipeline.process(page_id_groups):
+        ...
+
+The order of the results is not preserved if a stage has more than one worker.
+"""
+
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from eol.metrics import metrics_registry
+
+# How long blocked workers wait before checking whether the pipeline was stopped
+POLL_INTERVAL_SECONDS = 0.1
+
+logger = logging.getLogger(__name__)
+
+_END_OF_STREAM = object()
+
+
+@dataclass
+class Stage:
+    """A step of a `StagedPipeline`.
+
+    The `function` is called for each item of the previous stage and returns an
+    iterable of the items for the next stage (e.g. a generator or a list).
+    A stage can split, pass or drop items. It is called by `workers` threads
+    concurrently, so it has to be thread-safe if `workers` is larger than 1.
+    """
+
+    name: str
+    function: Callable[[Any], Optional[Iterable[Any]]]
+    workers: int = 1
+
+    def __post_init__(self):
+        if self.workers < 1:
+            raise ValueError(f"The stage '{self.name}' needs at least one worker!")
+
+
+class StagedPipeline:
+    """Processes items by a sequence of stages, which run concurrently and are
+    connected by queues of at most `queue_size` items.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 4):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage!")
+        if queue_size < 1:
+            raise ValueError("The queue size has to be at least 1!")
+
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def process(self, items: Iterable[Any]) -> Iterator[Any]:
+        """Yields the items returned by the last stage for all given items.
+
+        If a stage raises an exception, the pipeline is stopped and the exception
+        is raised here. If the returned iterator is closed early, the pipeline is
+        stopped as well.
+        """
+        run = _PipelineRun(self.stages, self.queue_size)
+        run.start(items)
+        try:
+            yield from run.iterate_results()
+        finally:
+            run.stop()
+
+    def run(self, items: Iterable[Any]) -> int:
+        """Processes all given items and returns the number of items returned by
+        the last stage. Use this, if the last stage is a sink (e.g. a file writer).
+        """
+        return sum(1 for _ in self.process(items))
+
+
+class _PipelineRun:
+    """The threads and queues of a single `StagedPipeline.process` call."""
+
+    def __init__(self, stages: List[Stage], queue_size: int):
+        self.stages = stages
+        # The queue of each stage's input, followed by the queue of the results
+        self.queues: List[queue.Queue] = [
+            queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)
+        ]
+        self.stopped = threading.Event()
+        self.errors: List[BaseException] = []
+        self.threads: List[threading.Thread] = []
+        self._remaining_workers = [stage.workers for stage in stages]
+        self._lock = threading.Lock()
+
+    def start(self, items: Iterable[Any]) -> None:
+        self._start_thread("source", self._feed, items)
+        for stage_index, stage in enumerate(self.stages):
+            for worker_index in range(stage.workers):
+                self._start_thread(
+                    f"{stage.name}-{worker_index}", self._work, stage_index
+                )
+
+    def iterate_results(self) -> Iterator[Any]:
+        while True:
+            item = self._get(self.queues[-1])
+            if item is _END_OF_STREAM:
+                break
+            yield item
+        if self.errors:
+            raise self.errors[0]
+
+    def stop(self) -> None:
+        self.stopped.set()
+        for thread in self.threads:
+            thread.join()
+
+    def _start_thread(self, name: str, target: Callable, *args) -> None:
+        thread = threading.Thread(
+            target=self._run_guarded,
+            args=(target, *args),
+            name=f"eol-pipeline-{name}",
+            daemon=True,
+        )
+        self.threads.append(thread)
+        thread.start()
+
+    def _run_guarded(self, target: Callable, *args) -> None:
+        try:
+            target(*args)
+        except BaseException as error:  # pylint: disable=broad-except
+            logger.debug("Stopping the pipeline after an error", exc_info=True)
+            with self._lock:
+                self.errors.append(error)
+            self.stopped.set()
+
+    def _feed(self, items: Iterable[Any]) -> None:
+        for item in items:
+            if not self._put(self.queues[0], item):
+                return
+        self._finish_stage(-1)
+
+    def _work(self, stage_index: int) -> None:
+        stage = self.stages[stage_index]
+        input_queue = self.queues[stage_index]
+        output_queue = self.queues[stage_index + 1]
+        metric_name = f"eol_pipeline_{stage.name}_seconds"
+        while True:
+            item = self._get(input_queue)
+            if item is _END_OF_STREAM:
+                break
+            results = iter(stage.function(item) or ())
+            while True:
+                # Only the work of the stage is timed, not the waiting for the queue
+                with metrics_registry.time(metric_name):
+                    result = next(results, _END_OF_STREAM)
+                if result is _END_OF_STREAM:
+                    break
+                if not self._put(output_queue, result):
+                    return
+
+        with self._lock:
+            self._remaining_workers[stage_index] -= 1
+            is_last_worker = self._remaining_workers[stage_index] == 0
+        if is_last_worker:
+            self._finish_stage(stage_index)
+
+    def _finish_stage(self, stage_index: int) -> None:
+        """Signals the end of the stream to all workers of the next stage."""
+        next_stage_index = stage_index + 1
+        number_of_receivers = (
+            self.stages[next_stage_index].workers
+            if next_stage_index < len(self.stages)
+            else 1
+        )
+        for _ in range(number_of_receivers):
+            if not self._put(self.queues[next_stage_index], _END_OF_STREAM):
+                return
+
+    def _put(self, target_queue: queue.Queue, item: Any) -> bool:
+        """Blocks until the item is put or the pipeline is stopped."""
+        while not self.stopped.is_set():
+            try:
+                target_queue.put(item, timeout=POLL_INTERVAL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source_queue: queue.Queue) -> Any:
+        """Blocks until an item is available or the pipeline is stopped."""
+        while not self.stopped.is_set():
+            try:
+                return source_queue.get(timeout=POLL_INTERVAL_SECONDS)
+            except queue.Empty:
+                continue
+        return _END_OF_STREAM
@@ -0,0 +1,131 @@
+"""Module for finding the EOL pages having a given trait without scanning the data.
+
+The `TraitIndex` holds inverted indexes from each predicate and from each pair of
+predicate and value URI to the pages having such a trait, e.g. all pages with the
+habitat (http://purl.obolibrary.org/obo/RO_0002303) "terrestrial biome"
+(http://purl.obolibrary.org/obo/ENVO_00000446).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Hashable, Iterable, Optional, Tuple, Union
+
+from eol.concurrency import make_read_only
+from eol.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+
+# A trait is given by its predicate URI, or by its predicate and value URIs
+Trait = Union[str, Tuple[str, str]]
+
+
+class TraitIndex:
+    """Inverted indexes from predicates and (predicate, value URI) pairs to the
+    sorted, unique page IDs having such a trait.
+
+    The page IDs of all keys are stored in a single array, ordered by key, and the
+    page IDs of a key are sliced from it by offsets. A lookup is a dict access,
+    and set operations work on sorted arrays.
+    """
+
+    def __init__(
+        self, page_ids: np.ndarray, predicates: pd.Series, value_uris: pd.Series
+    ):
+        page_ids = np.asarray(page_ids, dtype=np.int64)
+        predicates = pd.Series(predicates, copy=False).reset_index(drop=True)
+        value_uris = pd.Series(value_uris, copy=False).reset_index(drop=True)
+
+        predicate_codes, unique_predicates = pd.factorize(predicates)
+        self._predicate_index = _InvertedIndex(
+            predicate_codes, unique_predicates, page_ids
+        )
+
+        has_value = (predicates.notna() & value_uris.notna()).to_numpy()
+        traits = pd.MultiIndex.from_arrays(
+            [predicates[has_value], value_uris[has_value]]
+        )
+        trait_codes, unique_traits = traits.factorize()
+        self._trait_index = _InvertedIndex(
+            trait_codes, unique_traits, page_ids[has_value]
+        )
+
+    @classmethod
+    def from_trait_data(
+        cls,
+        data: pd.DataFrame,
+        page_id_column_name: str = "page_id",
+        predicate_column_name: str = "predicate",
+        value_uri_column_name: str = "value_uri",
+    ) -> "TraitIndex":
+        """Builds the index from the data of the EOL trait CSV file."""
+        return cls(
+            data[page_id_column_name].to_numpy(),
+            data[predicate_column_name],
+            data[value_uri_column_name],
+        )
+
+    def get_page_ids(
+        self, predicate: str, value_uri: Optional[str] = None
+    ) -> np.ndarray:
+        """Returns the sorted page IDs having a trait with the given predicate (and
+        value URI, if given). The returned array is read-only.
+        """
+        if value_uri is None:
+            return self._predicate_index.get(predicate)
+        return self._trait_index.get((predicate, value_uri))
+
+    def find_page_ids(self, traits: Iterable[Trait]) -> np.ndarray:
+        """Returns the sorted page IDs having all given traits. Each trait is either
+        a predicate URI or a tuple of a predicate and a value URI.
+        """
+        page_id_sets = [
+            self.get_page_ids(trait)
+            if isinstance(trait, str)
+            else self.get_page_ids(*trait)
+            for trait in traits
+        ]
+        if not page_id_sets:
+            raise ValueError("At least one trait has to be given!")
+
+        # Intersecting the smallest sets first keeps the intermediate results small
+        page_id_sets.sort(key=len)
+        page_ids = page_id_sets[0]
+        for other_page_ids in page_id_sets[1:]:
+            if not len(page_ids):
+                break
+            page_ids = np.intersect1d(page_ids, other_page_ids, assume_unique=True)
+        return page_ids
+
+
+class _InvertedIndex:
+    """Maps keys to the sorted unique page IDs of the rows having this key."""
+
+    def __init__(self, codes: np.ndarray, keys: Iterable[Hashable], page_ids):
+        # Rows without key have the code -1
+        has_key = codes >= 0
+        codes = codes[has_key].astype(np.int64)
+        page_ids = page_ids[has_key]
+
+        order = np.lexsort((page_ids, codes))
+        codes, page_ids = codes[order], page_ids[order]
+        is_unique = np.ones(len(codes), dtype=bool)
+        is_unique[1:] = (codes[1:] != codes[:-1]) | (page_ids[1:] != page_ids[:-1])
+        codes = codes[is_unique]
+        self._page_ids = make_read_only(page_ids[is_unique])
+
+        self._codes = {key: code for code, key in enumerate(keys)}
+        self._offsets = make_read_only(
+            np.searchsorted(codes, np.arange(len(self._codes) + 1))
+        )
+
+    def get(self, key: Hashable) -> np.ndarray:
+        code = self._codes.get(key)
+        if code is None:
+            return self._page_ids[:0]
+        return self._page_ids[self._offsets[code] : self._offsets[code + 1]]
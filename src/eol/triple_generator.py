@@ -4,10 +4,21 @@ Created on Mon Sep 19 10:34:39 2022
 
 @author: TAHIR
 """
+from __future__ import annotations
+
 from dataclasses import dataclass
-from typing import Iterable, List, Optional, Union
+from typing import TYPE_CHECKING, Generator, Iterable, List, Optional, Union
 
 import eol.variables as variables
+from eol.lazy import lazy_import
+from eol.metrics import metrics_registry
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
 
 
 @dataclass
@@ -38,11 +49,31 @@ class Triple:
 class TripleGenerator:
     """Generates Triple objects from a given normalized dataset."""
 
+    @metrics_registry.timed("eol_create_triples_seconds")
     def create_triples(self, triple_data):
         obj = Objectclass_objuri()
         triples = []
         triples = obj.create_triple(triple_data, triples)
-        return deduplicate_triples(triples)
+        triples = deduplicate_triples(triples)
+        metrics_registry.increment("eol_triples_generated_total", len(triples))
+        return triples
+
+    @metrics_registry.timed("eol_create_triples_from_batch_seconds")
+    def create_triples_from_batch(self, batch: pd.DataFrame) -> List[Triple]:
+        """Generates the triples of a batch of normalized records at once.
+
+        The triples are the same as `create_triples` generates for each record,
+        in the order of the records. Duplicates are only removed within a record.
+        """
+        triple_columns = create_triple_columns(batch)
+        triples = [
+            Triple(*values)
+            for values in zip(
+                *(triple_columns[name].tolist() for name in TRIPLE_COLUMN_NAMES)
+            )
+        ]
+        metrics_registry.increment("eol_triples_generated_total", len(triples))
+        return triples
 
 
 class Objectclass_objuri:
@@ -116,12 +147,112 @@ def create_triple(triple_data: dict, obj_value: [str, int, float], unit: str = N
     )
 
 
+# The columns of `create_triple_columns`, in the order of the Triple fields
+TRIPLE_COLUMN_NAMES = [
+    "subject",
+    "predicate",
+    "object",
+    "eol_record_id",
+    "unit",
+    "source_url",
+    "citation_text",
+]
+
+
+def create_triple_columns(batch: pd.DataFrame) -> pd.DataFrame:
+    """Returns one row per triple of the given normalized records. The object of a
+    triple is taken from the value URI, the literal or the measurement and unit
+    (see `Objectclass_objuri` and its successors).
+    """
+
+    def get_column(name: str) -> pd.Series:
+        if name not in batch.columns:
+            return pd.Series([None] * len(batch), dtype=object)
+        column = batch[name].reset_index(drop=True)
+        # Missing values are None, as in the records
+        return column.astype(object).where(column.notna(), None)
+
+    measurements = get_column(variables.NORMAL_MEASURE_STRING)
+    units = get_column(variables.NORMAL_UNITS_URI_STRING)
+    value_uris = get_column(variables.VALUE_URI_STRING)
+    literals = get_column(variables.LITERAL_STRING)
+    no_units = pd.Series([None] * len(batch), dtype=object)
+
+    objects_and_units = [
+        (value_uris, no_units, value_uris.notna()),
+        (literals, no_units, literals.notna()),
+        (
+            _convert_numeric_measurements(measurements),
+            units,
+            measurements.notna() & units.notna(),
+        ),
+    ]
+
+    record_columns = {
+        "subject": get_column(variables.PAGE_ID_STRING).astype(str),
+        "predicate": get_column(variables.PREDICATE_STRING),
+        "eol_record_id": get_column(variables.EOL_RECORD_ID),
+        "source_url": get_column(variables.SOURCE_URL_STRING),
+        "citation_text": get_column(variables.CITATION_STRING),
+    }
+    record_numbers = np.arange(len(batch))
+
+    triple_frames = []
+    for object_kind, (objects, object_units, has_object) in enumerate(
+        objects_and_units
+    ):
+        triple_frame = pd.DataFrame(
+            {
+                "record": record_numbers,
+                "object_kind": object_kind,
+                "object": objects.astype(object),
+                "unit": object_units.astype(object),
+                **record_columns,
+            }
+        )
+        triple_frames.append(triple_frame[has_object.to_numpy()])
+
+    triple_columns = pd.concat(triple_frames, ignore_index=True).sort_values(
+        ["record", "object_kind"], kind="stable"
+    )
+    # All other columns are the same within a record
+    return triple_columns.drop_duplicates(["record", "object", "unit"])
+
+
+def _convert_numeric_measurements(measurements: pd.Series) -> pd.Series:
+    """Numeric values should be numeric, not strings (see `Objectclass_meas_units`)."""
+    if pd.api.types.is_numeric_dtype(measurements.dtype):
+        return measurements.astype(float)
+    return measurements.map(
+        lambda quantity: float(quantity)
+        if is_string_float_or_integer(quantity)
+        else quantity
+    )
+
+
+@metrics_registry.timed("eol_deduplicate_triples_seconds")
 def deduplicate_triples(triples: Iterable[Triple]) -> List[Triple]:
     """data from list -> set -> sorted list"""
     triple_set = set(triples)
+    metrics_registry.increment("eol_deduplicated_triples_total", len(triple_set))
     return sorted(triple_set, key=lambda triple: (triple.subject, triple.predicate))
 
 
+def iterate_unique_triples(
+    triples: Iterable[Triple],
+) -> Generator[Triple, None, None]:
+    """Yields the given triples in their order, but skips duplicates.
+    Only the hashes of the already yielded triples are kept in memory.
+    """
+    seen_triple_hashes = set()
+    for triple in triples:
+        # The eol_record_id is not part of the Triple hash, but of its equality
+        triple_hash = hash((triple, triple.eol_record_id))
+        if triple_hash not in seen_triple_hashes:
+            seen_triple_hashes.add(triple_hash)
+            yield triple
+
+
 def is_string_float_or_integer(string: str) -> float:
     """Checks if a given string is an integer or a float number."""
     if isinstance(string, str):
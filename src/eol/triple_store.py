@@ -0,0 +1,267 @@
+"""Module for compiling the EOL traits CSV file into a store of ready-made triples.
+
+The store is a SQLite file holding the deduplicated and sorted triples of each EOL
+page as one compressed block, keyed by the page ID. The triples of a page are
+read with a single lookup and decompression, without normalizing the records
+and generating the triples again. Compile the store once per CSV file with
+`compile_triple_store`, open it with `TripleStore` and pass it to
+`EncyclopediaOfLifeProcessing` as `triple_store`.
+
+The blocks are compressed by zlib, or by Zstandard (requires the `zstandard`
+package), which decompresses considerably faster.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+import zlib
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Union
+
+from eol.delta import deserialize_triples, serialize_triples
+from eol.lazy import lazy_import
+from eol.metrics import metrics_registry
+from eol.normalization import Normalizer
+from eol.triple_generator import Triple, TripleGenerator, deduplicate_triples
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+    from eol.handlers import EolTraitCsvHandler
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+STORE_FORMAT_VERSION = 1
+ZLIB_COMPRESSION = "zlib"
+ZSTD_COMPRESSION = "zstd"
+COMPRESSIONS = (ZLIB_COMPRESSION, ZSTD_COMPRESSION)
+
+# SQLite limits the number of parameters of a statement
+PAGE_IDS_PER_STATEMENT = 500
+
+
+class TripleStore:
+    """Read-only access to a compiled triple store.
+    Create the store with `compile_triple_store`.
+    """
+
+    def __init__(self, store_file_path: Union[str, pathlib.Path]):
+        self.store_file_path = pathlib.Path(store_file_path)
+        if not self.store_file_path.is_file():
+            raise FileNotFoundError(f"The triple store '{store_file_path}' is missing!")
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            f"{self.store_file_path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+        )
+        try:
+            self.header: Dict[str, str] = dict(
+                self._connection.execute("SELECT key, value FROM header")
+            )
+        except sqlite3.DatabaseError:
+            self.header = {}
+
+        if self.header.get("format_version") != str(STORE_FORMAT_VERSION):
+            self._connection.close()
+            raise ValueError(
+                f"The triple store '{self.store_file_path}' has an unsupported "
+                f"format version! Please recompile it."
+            )
+        self._decompress = _create_decompressor(self.header["compression"])
+
+    def __len__(self) -> int:
+        return int(self.header["page_count"])
+
+    def __contains__(self, eol_page_id: Union[str, int]) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM pages WHERE page_id = ?", (int(eol_page_id),)
+            ).fetchone()
+        return row is not None
+
+    @property
+    def source_version(self) -> str:
+        """The version of the data the store was compiled from, see
+        `DataHandler.get_source_version`.
+        """
+        return self.header["source_version"]
+
+    def get(self, eol_page_id: Union[str, int]) -> List[Triple]:
+        """Returns the triples of the page sorted by subject and predicate, or an
+        empty list if the page has no trait data.
+        """
+        return self.get_many([eol_page_id])[int(eol_page_id)]
+
+    def get_many(
+        self, eol_page_ids: Iterable[Union[str, int]]
+    ) -> Dict[int, List[Triple]]:
+        """Returns a dictionary mapping each given page ID (as an integer) to its
+        triples, as returned by `get`.
+        """
+        page_ids = list(dict.fromkeys(int(page_id) for page_id in eol_page_ids))
+        blocks: Dict[int, bytes] = {}
+        with self._lock:
+            for start in range(0, len(page_ids), PAGE_IDS_PER_STATEMENT):
+                page_id_chunk = page_ids[start : start + PAGE_IDS_PER_STATEMENT]
+                blocks.update(
+                    self._connection.execute(
+                        # Only the "?" placeholders are interpolated
+                        "SELECT page_id, triples FROM pages "  # nosec B608
+                        f"WHERE page_id IN ({', '.join('?' * len(page_id_chunk))})",
+                        page_id_chunk,
+                    )
+                )
+
+        metrics_registry.increment("eol_triple_store_hits_total", len(blocks))
+        metrics_registry.increment(
+            "eol_triple_store_misses_total", len(page_ids) - len(blocks)
+        )
+        return {
+            page_id: (
+                deserialize_triples(self._decompress(blocks[page_id]).decode("utf-8"))
+                if page_id in blocks
+                else []
+            )
+            for page_id in page_ids
+        }
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        self._connection.close()
+
+
+@metrics_registry.timed("eol_triple_store_compile_seconds")
+def compile_triple_store(
+    data_handler: EolTraitCsvHandler,
+    data_normalizer: Normalizer,
+    store_file_path: Union[str, pathlib.Path],
+    compression: str = ZLIB_COMPRESSION,
+    batch_size: int = 100_000,
+) -> TripleStore:
+    """Compiles all data of the handler (e.g. the complete all-traits CSV file) into
+    a triple store at the given path and returns the opened store.
+
+    The records are sorted by page ID and converted in batches of about
+    `batch_size` records (see `TripleGenerator.create_triples_from_batch`), which
+    never split the records of a page. The triples of each page are deduplicated
+    and sorted as by `EncyclopediaOfLifeProcessing.get_trait_data_for_eol_page_id`.
+    An existing store is replaced only after the new one is complete.
+    """
+    logger = logging.getLogger(__name__)
+    compress = _create_compressor(compression)
+    store_file_path = pathlib.Path(store_file_path)
+    temporary_file_path = store_file_path.with_name(f"{store_file_path.name}.tmp")
+    temporary_file_path.unlink(missing_ok=True)
+
+    source_version = data_handler.get_source_version()
+    data = data_handler.get_data()
+    logger.info("Compiling triple store of %d records...", len(data))
+
+    connection = sqlite3.connect(str(temporary_file_path))
+    try:
+        connection.execute(
+            "CREATE TABLE pages (page_id INTEGER PRIMARY KEY, triples BLOB NOT NULL)"
+        )
+        connection.execute("CREATE TABLE header (key TEXT PRIMARY KEY, value TEXT)")
+        page_count = 0
+        for batch in _iterate_page_batches(data, batch_size):
+            triples_by_page_id = _create_triples_by_page_id(batch, data_normalizer)
+            with connection:
+                connection.executemany(
+                    "INSERT INTO pages VALUES (?, ?)",
+                    (
+                        (page_id, compress(serialize_triples(triples).encode("utf-8")))
+                        for page_id, triples in triples_by_page_id.items()
+                    ),
+                )
+            page_count += len(triples_by_page_id)
+
+        header = {
+            "format_version": STORE_FORMAT_VERSION,
+            "compression": compression,
+            "page_count": page_count,
+            "source_version": source_version,
+        }
+        with connection:
+            connection.executemany(
+                "INSERT INTO header VALUES (?, ?)",
+                ((key, str(value)) for key, value in header.items()),
+            )
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+
+    os.replace(temporary_file_path, store_file_path)
+    logger.info("Compiled triple store with %d pages!", page_count)
+    return TripleStore(store_file_path)
+
+
+def _iterate_page_batches(data: pd.DataFrame, batch_size: int):
+    """Yields the records sorted by page ID in batches of at least `batch_size`
+    records (or the remaining ones), which hold all records of their pages.
+    """
+    page_ids = data["page_id"].to_numpy()
+    order = np.argsort(page_ids, kind="stable")
+    sorted_page_ids = page_ids[order]
+    # The positions in the sorted records, where a new page starts
+    page_starts = np.flatnonzero(np.diff(sorted_page_ids)) + 1
+
+    start = 0
+    while start < len(order):
+        end_index = np.searchsorted(page_starts, start + batch_size)
+        end = page_starts[end_index] if end_index < len(page_starts) else len(order)
+        yield data.iloc[order[start:end]]
+        start = end
+
+
+def _create_triples_by_page_id(
+    batch: pd.DataFrame, data_normalizer: Normalizer
+) -> Dict[int, List[Triple]]:
+    normalized_batch = data_normalizer.normalize_batch(batch)
+    triples_by_subject: Dict[str, List[Triple]] = {}
+    for triple in TripleGenerator().create_triples_from_batch(normalized_batch):
+        triples_by_subject.setdefault(triple.subject, []).append(triple)
+
+    return {
+        int(page_id): deduplicate_triples(triples_by_subject.get(str(page_id), []))
+        for page_id in batch["page_id"].unique().tolist()
+    }
+
+
+def _create_compressor(compression: str) -> Callable[[bytes], bytes]:
+    if compression == ZLIB_COMPRESSION:
+        return zlib.compress
+    if compression == ZSTD_COMPRESSION:
+        import zstandard  # pylint: disable=import-outside-toplevel
+
+        return zstandard.ZstdCompressor(level=9).compress
+    raise ValueError(
+        f"The compression '{compression}' is not one of {', '.join(COMPRESSIONS)}!"
+    )
+
+
+def _create_decompressor(compression: str) -> Callable[[bytes], bytes]:
+    if compression == ZLIB_COMPRESSION:
+        return zlib.decompress
+    if compression == ZSTD_COMPRESSION:
+        import zstandard  # pylint: disable=import-outside-toplevel
+
+        # A decompressor must not be used by several threads at the same time
+        local = threading.local()
+
+        def decompress(block: bytes) -> bytes:
+            if not hasattr(local, "decompressor"):
+                local.decompressor = zstandard.ZstdDecompressor()
+            return local.decompressor.decompress(block)
+
+        return decompress
+    raise ValueError(
+        f"The compression '{compression}' is not one of {', '.join(COMPRESSIONS)}!"
+    )
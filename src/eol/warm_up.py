@@ -0,0 +1,131 @@
+"""Loading the data of an `EncyclopediaOfLifeProcessing` before the first request.
+
+Loading the EOL trait CSV file and the identifier map takes minutes, which
+otherwise the first request would wait for. A `WarmUp` runs these loading tasks
+concurrently in background threads and reports their progress:
+
+    warm_up = eol.warm_up(background=True)
+    ...  # e.g. start accepting requests
+    print(warm_up.progress, warm_up.states)
+    warm_up.wait()
+
+Requests arriving during the warm-up wait only for the data they need, since the
+data is loaded once (see `eol.concurrency.LazyValue`).
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from eol.metrics import metrics_registry
+
+# The states of a warm-up task
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Runs the given loading tasks, each in its own daemon thread.
+
+    The tasks are given by name. Their return values are discarded, since they
+    are expected to load data into their objects.
+    """
+
+    def __init__(self, tasks: Mapping[str, Callable[[], Any]]):
+        self._tasks = dict(tasks)
+        self._states: Dict[str, str] = {name: PENDING for name in self._tasks}
+        self._errors: Dict[str, BaseException] = {}
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    @property
+    def states(self) -> Dict[str, str]:
+        """The state of each task: pending, running, done or failed."""
+        with self._lock:
+            return dict(self._states)
+
+    @property
+    def errors(self) -> Dict[str, BaseException]:
+        """The exceptions raised by the failed tasks."""
+        with self._lock:
+            return dict(self._errors)
+
+    @property
+    def progress(self) -> float:
+        """The fraction of finished (done or failed) tasks, from 0.0 to 1.0."""
+        states = self.states
+        if not states:
+            return 1.0
+        finished = sum(state in (DONE, FAILED) for state in states.values())
+        return finished / len(states)
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether all tasks are done or failed."""
+        return self.progress == 1.0
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether all tasks are done, i.e. all data is loaded."""
+        return all(state == DONE for state in self.states.values())
+
+    @property
+    def has_failed(self) -> bool:
+        """Whether any task failed."""
+        return FAILED in self.states.values()
+
+    def start(self) -> "WarmUp":
+        """Starts all tasks in background threads and returns immediately."""
+        if self._threads:
+            raise ValueError("The warm-up was already started!")
+
+        for name, task in self._tasks.items():
+            thread = threading.Thread(
+                target=self._run_task,
+                args=(name, task),
+                name=f"eol-warm-up-{name}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits at most `timeout` seconds (or forever) for all tasks to finish and
+        returns whether they finished. If a task failed, its exception is raised.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(
+                None if deadline is None else max(deadline - time.monotonic(), 0)
+            )
+
+        errors = self.errors
+        if errors:
+            raise next(iter(errors.values()))
+        return self.is_finished
+
+    def _run_task(self, name: str, task: Callable[[], Any]) -> None:
+        with self._lock:
+            self._states[name] = RUNNING
+        logger.info("Warming up %s...", name)
+
+        try:
+            with metrics_registry.time(f"eol_warm_up_{name}_seconds"):
+                task()
+        except Exception as error:  # pylint: disable=broad-except
+            logger.exception("Warming up %s failed!", name)
+            metrics_registry.increment("eol_warm_up_failures_total")
+            with self._lock:
+                self._states[name] = FAILED
+                self._errors[name] = error
+            return
+
+        with self._lock:
+            self._states[name] = DONE
+        logger.info("Warmed up %s", name)
@@ -25,6 +25,11 @@ def provider_ids_csv_file_path(resource_directory) -> pathlib.Path:
     return resource_directory / "test_provider_ids.csv"
 
 
+@pytest.fixture(scope="session")
+def pages_csv_file_path(resource_directory) -> pathlib.Path:
+    return resource_directory / "test_pages.csv"
+
+
 @pytest.fixture(scope="session")
 def eol_api_credentials(current_directory) -> Optional[str]:
     load_dotenv()
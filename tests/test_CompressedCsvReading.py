@@ -0,0 +1,100 @@
+import bz2
+import gzip
+import io
+import pathlib
+import zipfile
+
+import pytest
+
+from eol.conversions import IdentifierConverter
+from eol.data import (
+    BackgroundDecompressor,
+    DataProvider,
+    is_compressed_file,
+    open_binary_file,
+)
+from eol.handlers import EolTraitCsvHandler
+from eol.identifier_index import compile_identifier_map_index
+
+
+class TestCompressedCsvReading:
+    @pytest.mark.parametrize("suffix", [".gz", ".bz2", ".zip", ".zst"])
+    def test_csv_handler_reads_compressed_files(
+        self, tmp_path, eol_trait_csv_file_path, suffix
+    ):
+        compressed_file_path = compress(
+            pathlib.Path(eol_trait_csv_file_path), tmp_path, suffix
+        )
+
+        handler = EolTraitCsvHandler(compressed_file_path)
+        expected_data = EolTraitCsvHandler(eol_trait_csv_file_path).get_data()
+        assert handler.get_data().to_dict("records") == expected_data.to_dict("records")
+
+    def test_archive_member_selection(self, tmp_path, eol_trait_csv_file_path):
+        archive_path = tmp_path / "traits_all.zip"
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            archive.write(eol_trait_csv_file_path, "traits.csv")
+            archive.writestr("metadata.csv", "a,b\n1,2\n")
+
+        with open_binary_file(archive_path) as largest_member:
+            assert (
+                largest_member.read()
+                == pathlib.Path(eol_trait_csv_file_path).read_bytes()
+            )
+        with open_binary_file(archive_path, archive_member="metadata.csv") as member:
+            assert member.read() == b"a,b\n1,2\n"
+
+    def test_identifier_map_reads_compressed_files(
+        self, tmp_path, provider_ids_csv_file_path
+    ):
+        compressed_file_path = compress(provider_ids_csv_file_path, tmp_path, ".gz")
+        converter = IdentifierConverter(compressed_file_path, [DataProvider.Gbif])
+        expected_converter = IdentifierConverter(
+            provider_ids_csv_file_path, [DataProvider.Gbif]
+        )
+
+        assert converter.to_eol_page_id("1057764") == "21828356"
+        assert converter.data_frame.equals(expected_converter.data_frame)
+
+        index = compile_identifier_map_index(compressed_file_path, tmp_path / "index")
+        expected_index = compile_identifier_map_index(
+            provider_ids_csv_file_path, tmp_path / "expected_index"
+        )
+        assert len(index) == len(expected_index)
+
+    def test_decompression_errors_are_raised_by_the_reader(self):
+        def open_broken_stream():
+            return gzip.GzipFile(fileobj=io.BytesIO(b"no gzip data"))
+
+        with BackgroundDecompressor(open_broken_stream) as stream:
+            with pytest.raises(gzip.BadGzipFile):
+                stream.read()
+
+    def test_reader_can_stop_early(self):
+        content = bytes(range(256)) * 1000
+        stream = BackgroundDecompressor(
+            lambda: io.BytesIO(content), block_size=100, queue_size=1
+        )
+        assert stream.read(10) == content[:10]
+        stream.close()
+        assert stream.closed
+
+    def test_plain_files_are_not_compressed(self):
+        assert not is_compressed_file("traits.csv")
+        assert is_compressed_file("traits_all.ZIP")
+
+
+def compress(file_path: pathlib.Path, directory: pathlib.Path, suffix: str):
+    compressed_file_path = directory / f"{file_path.name}{suffix}"
+    content = file_path.read_bytes()
+    if suffix == ".gz":
+        compressed_file_path.write_bytes(gzip.compress(content))
+    elif suffix == ".bz2":
+        compressed_file_path.write_bytes(bz2.compress(content))
+    elif suffix == ".zst":
+        zstandard = pytest.importorskip("zstandard")
+        compressed_file_path.write_bytes(zstandard.ZstdCompressor().compress(content))
+    else:
+        with zipfile.ZipFile(compressed_file_path, "w") as archive:
+            archive.writestr(file_path.name, content)
+    return compressed_file_path
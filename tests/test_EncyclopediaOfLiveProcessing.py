@@ -3,6 +3,8 @@ from typing import Iterable, Union
 import pytest
 
 from eol import EncyclopediaOfLifeProcessing, IdentifierConverterNotSetError
+from eol.handlers import EolTraitCsvHandler
+from eol.normalization import EolTraitCsvNormalizer
 from eol.triple_generator import Triple
 
 
@@ -160,6 +162,173 @@ class TestEolProcessing:
         with pytest.raises(IdentifierConverterNotSetError):
             eol.get_gbif_id_for_eol_page_id("46559130")
 
+    def test_streaming_trait_data_retrieval(self, eol_with_csv_handler):
+        """
+        Feature: Trait data can be consumed as a stream
+            Scenario: The user wants to process triples as soon as they arrive.
+                GIVEN a valid EOL page ID is given as parameter
+                THEN the function yields the same unique triples as the non-streaming
+                     function, optionally in the same order.
+        """
+        eol_page_id = "311544"
+        triples = eol_with_csv_handler.get_trait_data_for_eol_page_id(eol_page_id)
+        streamed_triples = eol_with_csv_handler.iter_trait_data_for_eol_page_id(
+            eol_page_id
+        )
+        assert not isinstance(streamed_triples, list)
+
+        streamed_triples = list(streamed_triples)
+        assert len(streamed_triples) == len(triples)
+        assert set(streamed_triples) == set(triples)
+
+        sorted_triples = eol_with_csv_handler.iter_trait_data_for_eol_page_id(
+            eol_page_id, sort=True
+        )
+        assert list(sorted_triples) == triples
+
+    def test_streaming_trait_data_filtering(self, eol_with_csv_handler):
+        predicate_filters = {"http://eol.org/schema/terms/Present"}
+        triples = eol_with_csv_handler.iter_trait_data_for_eol_page_id(
+            "1143547", filter_for_predicates=predicate_filters
+        )
+        assert {triple.predicate for triple in triples} == predicate_filters
+
+    def test_trait_data_batches(self, eol_with_csv_handler):
+        page_ids = ["311544", 1143547]
+        batches = list(
+            eol_with_csv_handler.iter_trait_data_batches(page_ids, batch_size=4)
+        )
+
+        # 13 records in batches of 4 records
+        assert len(batches) == 4
+        expected_triples = [
+            triple
+            for page_id in page_ids
+            for triple in eol_with_csv_handler.iter_trait_data_for_eol_page_id(page_id)
+        ]
+        triples = [triple for batch in batches for triple in batch]
+        assert sorted(triples, key=repr) == sorted(expected_triples, key=repr)
+
+        predicate_filters = {"http://eol.org/schema/terms/Present"}
+        batches = eol_with_csv_handler.iter_trait_data_batches(
+            page_ids, filter_for_predicates=predicate_filters
+        )
+        assert {t.predicate for batch in batches for t in batch} == predicate_filters
+
+    def test_pipelined_trait_data_batches(self, eol_with_csv_handler):
+        page_ids = ["311544", 1143547, 470798]
+        batches = eol_with_csv_handler.iter_trait_data_batches_pipelined(
+            page_ids, batch_size=4, page_ids_per_fetch=1, fetch_workers=2
+        )
+
+        expected_triples = [
+            triple
+            for batch in eol_with_csv_handler.iter_trait_data_batches(page_ids)
+            for triple in batch
+        ]
+        triples = [triple for batch in batches for triple in batch]
+        assert sorted(triples, key=repr) == sorted(expected_triples, key=repr)
+
+        written_triples = []
+        pipeline = eol_with_csv_handler.create_trait_data_pipeline(
+            filter_for_predicates={"http://eol.org/schema/terms/Present"},
+            sink=written_triples.extend,
+        )
+        pipeline.run([page_ids])
+        assert written_triples
+        assert {t.predicate for t in written_triples} == {
+            "http://eol.org/schema/terms/Present"
+        }
+
+    def test_eol_page_ids_with_traits(self, eol_with_csv_handler):
+        habitat = "http://rs.tdwg.org/dwc/terms/habitat"
+        terrestrial = "http://purl.obolibrary.org/obo/ENVO_01000024"
+        present = "http://eol.org/schema/terms/Present"
+        data = eol_with_csv_handler.data_handler.get_data()
+
+        def expected_page_ids(selection):
+            return sorted(set(data.loc[selection, "page_id"].tolist()))
+
+        page_ids = eol_with_csv_handler.get_eol_page_ids_with_trait(
+            habitat, terrestrial
+        )
+        assert len(page_ids) == 10
+        assert page_ids == expected_page_ids(
+            (data["predicate"] == habitat) & (data["value_uri"] == terrestrial)
+        )
+
+        page_ids = eol_with_csv_handler.get_eol_page_ids_with_all_traits(
+            [(habitat, terrestrial), present]
+        )
+        assert page_ids
+        assert page_ids == sorted(
+            set(expected_page_ids(data["predicate"] == present))
+            & set(
+                expected_page_ids(
+                    (data["predicate"] == habitat) & (data["value_uri"] == terrestrial)
+                )
+            )
+        )
+
+    def test_eol_page_ids_with_traits_require_an_index(self, eol_with_api_handler):
+        with pytest.raises(ValueError):
+            eol_with_api_handler.get_eol_page_ids_with_trait(
+                "http://eol.org/schema/terms/Present"
+            )
+
+    def test_trait_data_for_scientific_name(self, eol_with_csv_handler):
+        assert eol_with_csv_handler.get_eol_page_ids_for_scientific_name(
+            "Fagus sylvatica"
+        ) == [1143547]
+        assert eol_with_csv_handler.find_scientific_names("Tamias") == {
+            "Tamias dorsalis": [311544]
+        }
+
+        triples = eol_with_csv_handler.get_trait_data_for_scientific_name(
+            "<i>Tamias dorsalis</i> Baird 1855"
+        )
+        assert triples == eol_with_csv_handler.get_trait_data_for_eol_page_id(311544)
+        assert eol_with_csv_handler.get_trait_data_for_scientific_name("Unknown") == []
+
+    def test_trait_data_for_multiple_page_ids(self, eol_with_csv_handler):
+        page_ids = ["311544", 1143547, 470798, 1]
+        predicate_filters = {"http://eol.org/schema/terms/Present"}
+
+        for filter_for_predicates in [None, predicate_filters]:
+            trait_data = eol_with_csv_handler.get_trait_data_for_eol_page_ids(
+                page_ids, filter_for_predicates=filter_for_predicates
+            )
+
+            assert list(trait_data) == page_ids
+            assert trait_data[1] == []
+            for page_id in page_ids:
+                assert sorted(trait_data[page_id], key=repr) == sorted(
+                    eol_with_csv_handler.get_trait_data_for_eol_page_id(
+                        page_id, filter_for_predicates=filter_for_predicates
+                    ),
+                    key=repr,
+                )
+
+    def test_trait_data_retrieval_for_taxon_subtree(
+        self, eol_trait_csv_file_path, pages_csv_file_path
+    ):
+        """
+        Feature: Retrieval of the trait data of a complete clade
+            Scenario: The user wants the traits of all species of a genus.
+                GIVEN the EOL page ID of a genus is given as parameter
+                THEN the function returns the trait data of the genus and all taxa
+                     below it.
+        """
+        handler = EolTraitCsvHandler(eol_trait_csv_file_path, pages_csv_file_path)
+        eol = EncyclopediaOfLifeProcessing(handler, EolTraitCsvNormalizer())
+
+        species_traits = eol.get_trait_data_for_eol_page_id("311544")
+        genus_traits = eol.get_trait_data_for_taxon_subtree("2")
+
+        assert {triple.subject for triple in genus_traits} == {"311544", "45258442"}
+        assert set(species_traits) <= set(genus_traits)
+        assert eol.get_trait_data_for_taxon_subtree("2", max_depth=0) == []
+
     def test_throw_meaningful_exception_when_api_key_is_not_valid(
         self, eol_with_invalid_credentials
     ):
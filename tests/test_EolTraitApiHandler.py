@@ -1,3 +1,4 @@
+import io
 import json
 from copy import copy
 from dataclasses import dataclass
@@ -5,7 +6,11 @@ from unittest.mock import Mock
 
 import pytest
 
-from eol.handlers import EolTraitApiHandler
+from eol.handlers import (
+    EolTraitApiHandler,
+    compose_count_cypher_query,
+    iterate_cypher_response_rows,
+)
 
 from .commons import internet_connection_available
 
@@ -41,32 +46,267 @@ class TestEolTraitApiHandlerWebCalls:
 
 
 class TestEolTraitApiHandlerUnittests:
-    def test_paginate_cypher_api(self, eol_trait_api_handler):
+    def test_paginate_cypher_api(self, parameterized_api_handler):
+        parameterized_api_handler.read_api_with_body = Mock()
+        parameterized_api_handler.read_api_with_body.side_effect = (
+            generate_mock_responses(number_of_responses=3)
+        )
+
+        list(
+            parameterized_api_handler.paginate_cypher_api(
+                "MATCH (trait:Trait) RETURN trait LIMIT 1;"
+            )
+        )
+
+        expected_bodies = [
+            {
+                "query": "MATCH (trait:Trait) RETURN trait SKIP $skip LIMIT $limit",
+                "params": {"skip": skip, "limit": 1},
+            }
+            for skip in range(3)
+        ]
+
+        for body in expected_bodies:
+            parameterized_api_handler.read_api_with_body.assert_any_call(
+                parameterized_api_handler.cypher_api_url, body
+            )
+
+    def test_paginate_cypher_api_yields_row_dicts(self, eol_trait_api_handler):
         eol_trait_api_handler.read_api_with_parameters = Mock()
         eol_trait_api_handler.read_api_with_parameters.side_effect = (
             generate_mock_responses(number_of_responses=3)
         )
 
+        pages = [
+            list(page)
+            for page in eol_trait_api_handler.paginate_cypher_api(
+                "MATCH (trait:Trait) RETURN trait LIMIT 1;"
+            )
+        ]
+
+        expected_page = [{"p.page_id": 12345, "t.scientific_name": "Fagus testus"}]
+        assert pages == [expected_page, expected_page]
+
+    @pytest.mark.parametrize(
+        ["sizing", "pages_of_rows", "expected_limit"],
+        [
+            ("short_page", [[[1], [2]], [[3]]], 2),
+            ("has_more", [[[1], [2], [3]], [[3]]], 3),
+            ("count", [[[3]], [[1], [2]], [[3]]], 2),
+        ],
+    )
+    @pytest.mark.parametrize("prefetch", [False, True])
+    def test_paginate_cypher_api_stops_without_empty_page(
+        self, parameterized_api_handler, sizing, pages_of_rows, expected_limit, prefetch
+    ):
+        columns = ["row_count"] if sizing == "count" else ["p.page_id"]
+        responses = [
+            create_mock_response(rows, columns=columns if i == 0 else ["p.page_id"])
+            for i, rows in enumerate(pages_of_rows)
+        ]
+        parameterized_api_handler.read_api_with_body = Mock()
+        parameterized_api_handler.read_api_with_body.side_effect = responses
+
+        pages = [
+            [row["p.page_id"] for row in page]
+            for page in parameterized_api_handler.paginate_cypher_api(
+                "MATCH (p:Page) RETURN p.page_id ORDER BY p.page_id LIMIT 2",
+                sizing=sizing,
+                prefetch=prefetch,
+            )
+        ]
+
+        assert pages == [[1, 2], [3]]
+        bodies = get_request_bodies(parameterized_api_handler)
+        assert len(bodies) == len(responses)
+        assert bodies[-1]["params"] == {"skip": 2, "limit": expected_limit}
+
+    def test_paginate_cypher_api_with_unknown_sizing(self, eol_trait_api_handler):
+        with pytest.raises(ValueError):
+            list(
+                eol_trait_api_handler.paginate_cypher_api(
+                    "MATCH (p:Page) RETURN p LIMIT 2", sizing="unknown"
+                )
+            )
+
+    def test_compose_count_cypher_query(self):
+        assert compose_count_cypher_query(
+            "MATCH (p:Page) WHERE p.page_id = 1 RETURN p.page_id ORDER BY p.page_id"
+        ) == ("MATCH (p:Page) WHERE p.page_id = 1 RETURN count(*) AS row_count")
+
+    def test_iterate_batches(self, eol_trait_api_handler):
+        eol_trait_api_handler.read_api_with_parameters = Mock()
+        eol_trait_api_handler.read_api_with_parameters.side_effect = [
+            create_mock_response(
+                [[12345, "Fagus"], [12346, "Quercus"], [12347, "Acer"]]
+            )
+        ]
+
+        batches = list(
+            eol_trait_api_handler.iterate_batches(
+                key="page_id", values=[12345, 12346, 12347], batch_size=2
+            )
+        )
+
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert list(batches[0].columns) == eol_trait_api_handler.return_variables
+        assert batches[1]["t.scientific_name"].tolist() == ["Acer"]
+        assert eol_trait_api_handler.read_api_with_parameters.call_count == 1
+
+    def test_fetch_and_parse_raw_batches(self, eol_trait_api_handler):
+        eol_trait_api_handler.read_api_with_parameters = Mock()
+        eol_trait_api_handler.read_api_with_parameters.side_effect = [
+            create_mock_response([[12345, "Fagus"], [12346, "Quercus"]])
+        ]
+
+        raw_batches = list(
+            eol_trait_api_handler.fetch_raw_batches("page_id", [12345, 12346])
+        )
+        assert raw_batches == [
+            [
+                {"p.page_id": 12345, "t.scientific_name": "Fagus"},
+                {"p.page_id": 12346, "t.scientific_name": "Quercus"},
+            ]
+        ]
+
+        batches = list(eol_trait_api_handler.parse_raw_batch(raw_batches[0], 1))
+        assert [batch["p.page_id"].tolist() for batch in batches] == [[12345], [12346]]
+        assert list(batches[0].columns) == eol_trait_api_handler.return_variables
+
+    def test_get_data_by_page_ids(self, parameterized_api_handler):
+        parameterized_api_handler.read_api_with_body = Mock()
+        parameterized_api_handler.read_api_with_body.side_effect = [
+            create_mock_response([[1, "Fagus"], [2, "Quercus"]]),
+            create_mock_response([[2, "Quercus"]]),
+            create_mock_response([[3, "Acer"]]),
+        ]
+
+        data = parameterized_api_handler.get_data_by_page_ids(
+            ["1", 2, 3, 4], page_ids_per_query=3, query_limit=2
+        )
+
+        assert {page_id: len(rows) for page_id, rows in data.items()} == {
+            1: 1,
+            2: 2,
+            3: 1,
+            4: 0,
+        }
+        bodies = get_request_bodies(parameterized_api_handler)
+        assert "UNWIND $page_ids AS page_id" in bodies[0]["query"]
+        assert bodies[0]["params"] == {"page_ids": [1, 2, 3], "skip": 0, "limit": 2}
+        assert bodies[1]["params"] == {"page_ids": [1, 2, 3], "skip": 2, "limit": 2}
+        assert bodies[2]["params"] == {"page_ids": [4], "skip": 0, "limit": 2}
+        # All requests share the same query text
+        assert len({body["query"] for body in bodies}) == 1
+
+    @pytest.mark.parametrize(
+        ["max_depth", "expected_path_length"], [(None, "*0.."), (2, "*0..2")]
+    )
+    def test_iterate_subtree_data_by_page_id(
+        self, parameterized_api_handler, max_depth, expected_path_length
+    ):
+        parameterized_api_handler.read_api_with_body = Mock()
+        parameterized_api_handler.read_api_with_body.side_effect = [
+            create_mock_response([[2, "R1"]], columns=["p.page_id", "t.eol_pk"])
+        ]
+
+        data = list(
+            parameterized_api_handler.iterate_subtree_data_by_page_id(
+                "2", max_depth=max_depth
+            )
+        )
+        assert len(data) == 1
+
+        body = get_request_bodies(parameterized_api_handler)[0]
+        assert f"(root:Page)<-[:parent{expected_path_length}]-(p:Page)" in body["query"]
+        assert "WHERE root.page_id = $page_id" in body["query"]
+        assert body["params"] == {"page_id": 2, "after": None, "limit": 10_000}
+
+    def test_subtree_pages_continue_after_the_last_record(
+        self, parameterized_api_handler
+    ):
+        parameterized_api_handler.read_api_with_body = Mock()
+        parameterized_api_handler.read_api_with_body.side_effect = [
+            create_mock_response(
+                [[1, "R1"], [2, "R2"]], columns=["p.page_id", "t.eol_pk"]
+            ),
+            create_mock_response([[2, "R3"]], columns=["p.page_id", "t.eol_pk"]),
+        ]
+
+        data = list(
+            parameterized_api_handler.iterate_subtree_data_by_page_id(
+                "1", query_limit=2
+            )
+        )
+
+        assert [row["t.eol_pk"] for row in data] == ["R1", "R2", "R3"]
+        bodies = get_request_bodies(parameterized_api_handler)
+        assert [body["params"]["after"] for body in bodies] == [None, "R2"]
+        assert "SKIP" not in bodies[1]["query"]
+
+    def test_parameters_are_inlined_by_default(self, eol_trait_api_handler):
+        eol_trait_api_handler.read_api_with_parameters = Mock()
+        eol_trait_api_handler.read_api_with_parameters.side_effect = [
+            create_mock_response([])
+        ]
+
         list(
-            eol_trait_api_handler.paginate_cypher_api(
-                "MATCH (trait:Trait) RETURN trait LIMIT 100;"
+            eol_trait_api_handler.iterate_data_by_key(
+                "pred.uri", 'http://example.org/"quoted"'
             )
         )
 
-        expected_queries = [
-            eol_trait_api_handler.compose_cypher_url(
-                "MATCH (trait:Trait) RETURN trait SKIP 0 LIMIT 100"
+        url = eol_trait_api_handler.read_api_with_parameters.call_args.args[0]
+        assert url.startswith(f"{eol_trait_api_handler.cypher_api_url}?query=")
+        assert 'WHERE pred.uri = "http://example.org/\\"quoted\\""' in url
+        assert url.endswith("SKIP 0 LIMIT 100")
+
+    def test_rejected_parameters_are_inlined(self, eol_api_credentials):
+        handler = EolTraitApiHandler(eol_api_credentials, parameterized_queries=True)
+        handler.read_api_with_body = Mock()
+        handler.read_api_with_body.side_effect = [
+            MockResponse(
+                status_code=400,
+                text='{"errors": [{"code": "ParameterMissing", '
+                '"message": "Expected parameter(s): skip, limit"}]}',
+            )
+        ]
+        handler.read_api_with_parameters = Mock()
+        handler.read_api_with_parameters.side_effect = [
+            create_mock_response([]),
+            create_mock_response([]),
+        ]
+
+        list(handler.iterate_data_by_key("pred.uri", "http://example.org/a"))
+        list(handler.iterate_data_by_key("pred.uri", "http://example.org/b"))
+
+        assert not handler.parameterized_queries
+        assert handler.read_api_with_body.call_count == 1
+        assert handler.read_api_with_parameters.call_count == 2
+        url = handler.read_api_with_parameters.call_args_list[0].args[0]
+        assert 'WHERE pred.uri = "http://example.org/a"' in url
+
+    @pytest.mark.parametrize(
+        ["response_body", "expected_rows"],
+        [
+            ('{"columns": ["a", "b"], "data": []}', []),
+            (
+                '{"columns": ["a", "b"], "data": [[1, "x"], [2.5, null]]}',
+                [{"a": 1, "b": "x"}, {"a": 2.5, "b": None}],
             ),
-            eol_trait_api_handler.compose_cypher_url(
-                "MATCH (trait:Trait) RETURN trait SKIP 100 LIMIT 100"
+            (  # Scenario - Nested values
+                '{"columns": ["t"], "data": [[{"eol_pk": "R1", "ids": [1, 2]}]]}',
+                [{"t": {"eol_pk": "R1", "ids": [1, 2]}}],
             ),
-            eol_trait_api_handler.compose_cypher_url(
-                "MATCH (trait:Trait) RETURN trait SKIP 200 LIMIT 100"
+            (  # Scenario - Columns are sent after the data
+                '{"data": [[1, "x"]], "columns": ["a", "b"]}',
+                [{"a": 1, "b": "x"}],
             ),
-        ]
-
-        for query in expected_queries:
-            eol_trait_api_handler.read_api_with_parameters.assert_any_call(query)
+        ],
+    )
+    def test_iterate_cypher_response_rows(self, response_body, expected_rows):
+        stream = io.BytesIO(response_body.encode("utf-8"))
+        assert list(iterate_cypher_response_rows(stream)) == expected_rows
 
 
 @pytest.fixture(scope="module")
@@ -74,6 +314,13 @@ def eol_trait_api_handler(eol_api_credentials):
     return EolTraitApiHandler(api_credentials=eol_api_credentials)
 
 
+@pytest.fixture(scope="module")
+def parameterized_api_handler(eol_api_credentials):
+    return EolTraitApiHandler(
+        api_credentials=eol_api_credentials, parameterized_queries=True
+    )
+
+
 @pytest.fixture
 def cypher_query_string_for_habitat_data():
     return """MATCH (t:Trait)<-[:trait]-(p:Page),
@@ -94,6 +341,22 @@ class MockResponse:
     status_code: int
     text: str
 
+    @property
+    def raw(self):
+        return io.BytesIO(self.text.encode("utf-8"))
+
+    def close(self):
+        pass
+
+
+def get_request_bodies(handler):
+    return [call.args[1] for call in handler.read_api_with_body.call_args_list]
+
+
+def create_mock_response(rows, columns=("p.page_id", "t.scientific_name")):
+    response_data = {"columns": list(columns), "data": rows}
+    return MockResponse(text=json.dumps(response_data), status_code=200)
+
 
 def generate_mock_responses(number_of_responses=100):
     mock_data = {
@@ -20,6 +20,31 @@ class TestEolTraitCsvHandler:
         )
         assert data["object_page_id"] is None
 
+    def test_iterate_batches(self, eol_traits_csv_handler):
+        batches = list(
+            eol_traits_csv_handler.iterate_batches(
+                key="page_id", values=[311544, 1143547, 1], batch_size=5
+            )
+        )
+
+        assert [len(batch) for batch in batches] == [5, 5, 3]
+        page_ids = {page_id for batch in batches for page_id in batch["page_id"]}
+        assert page_ids == {311544, 1143547}
+
+    def test_iterate_subtree_data_by_page_id(self, resource_directory):
+        handler = EolTraitCsvHandler(
+            resource_directory / "test_eol_traits.csv",
+            pages_csv_file_path=resource_directory / "test_pages.csv",
+        )
+        data = list(handler.iterate_subtree_data_by_page_id(2))
+
+        assert len(data) == 9
+        assert {d["page_id"] for d in data} == {311544, 45258442}
+
+    def test_subtree_requires_pages_csv_file(self, eol_traits_csv_handler):
+        with pytest.raises(ValueError):
+            next(eol_traits_csv_handler.iterate_subtree_data_by_page_id(2))
+
     @pytest.fixture
     def eol_traits_csv_handler(self, resource_directory):
         csv_file_path_string = resource_directory / "test_eol_traits.csv"
@@ -0,0 +1,108 @@
+from unittest.mock import Mock
+
+import pytest
+
+from eol import EncyclopediaOfLifeProcessing
+from eol.handlers import EolTraitApiHandler, EolTraitCsvHandler, EolTraitHybridHandler
+from eol.normalization import EolTraitCsvNormalizer
+
+LOCAL_PAGE_ID = 311544
+MISSING_PAGE_ID = 99999999
+HABITAT = "http://rs.tdwg.org/dwc/terms/habitat"
+EXTANT = "http://eol.org/schema/terms/extant"
+
+
+class TestEolTraitHybridHandler:
+    def test_local_pages_are_read_from_the_csv_file(self, hybrid_handler):
+        records = list(hybrid_handler.iterate_data_by_key("page_id", LOCAL_PAGE_ID))
+
+        assert len(records) == 8
+        assert all(record["page_id"] == LOCAL_PAGE_ID for record in records)
+        assert set(records[0]) == set(EolTraitHybridHandler.columns)
+        hybrid_handler.api_handler.fetch_raw_batches.assert_not_called()
+
+    def test_missing_pages_are_read_from_the_api(self, hybrid_handler):
+        hybrid_handler.api_handler.fetch_raw_batches.return_value = iter(
+            [[create_api_record(MISSING_PAGE_ID, "R1-PK1")]]
+        )
+
+        records = list(hybrid_handler.iterate_data_by_key("page_id", MISSING_PAGE_ID))
+
+        hybrid_handler.api_handler.fetch_raw_batches.assert_called_once_with(
+            "page_id", [MISSING_PAGE_ID]
+        )
+        assert len(records) == 1
+        assert records[0]["eol_pk"] == "R1-PK1"
+        assert records[0]["page_id"] == MISSING_PAGE_ID
+        assert records[0]["predicate"] == HABITAT
+        assert records[0]["citation"] == "A page citation"
+        assert records[0]["units"] is None
+
+    def test_stale_pages_are_merged_by_eol_pk(self, hybrid_handler):
+        hybrid_handler.is_page_stale = lambda page_id: page_id == LOCAL_PAGE_ID
+        hybrid_handler.api_handler.fetch_raw_batches.return_value = iter(
+            [
+                [
+                    create_api_record(LOCAL_PAGE_ID, "R788-PK214692871"),
+                    create_api_record(LOCAL_PAGE_ID, "R1-PK2"),
+                ]
+            ]
+        )
+
+        records = list(hybrid_handler.iterate_data_by_key("page_id", LOCAL_PAGE_ID))
+
+        eol_pks = [record["eol_pk"] for record in records]
+        assert len(eol_pks) == 9
+        assert len(set(eol_pks)) == 9
+        updated_record = next(
+            record for record in records if record["eol_pk"] == "R788-PK214692871"
+        )
+        assert updated_record["predicate"] == HABITAT
+
+    def test_other_keys_are_read_from_the_csv_file(self, hybrid_handler):
+        records = list(hybrid_handler.iterate_data_by_key("value_uri", EXTANT))
+
+        assert records
+        assert all(record["value_uri"] == EXTANT for record in records)
+        hybrid_handler.api_handler.fetch_raw_batches.assert_not_called()
+
+    def test_trait_data_of_both_sources(self, hybrid_handler):
+        hybrid_handler.api_handler.fetch_raw_batches.return_value = iter(
+            [[create_api_record(MISSING_PAGE_ID, "R1-PK1")]]
+        )
+        eol = EncyclopediaOfLifeProcessing(hybrid_handler, EolTraitCsvNormalizer())
+
+        trait_data = eol.get_trait_data_for_eol_page_ids(
+            [LOCAL_PAGE_ID, MISSING_PAGE_ID]
+        )
+
+        assert trait_data[LOCAL_PAGE_ID]
+        assert {triple.predicate for triple in trait_data[MISSING_PAGE_ID]} == {HABITAT}
+        assert all(
+            triple.subject == str(MISSING_PAGE_ID)
+            for triple in trait_data[MISSING_PAGE_ID]
+        )
+
+    @pytest.fixture
+    def hybrid_handler(self, eol_trait_csv_file_path):
+        api_handler = EolTraitApiHandler("JWT token")
+        api_handler.fetch_raw_batches = Mock(return_value=iter([]))
+        return EolTraitHybridHandler(
+            EolTraitCsvHandler(eol_trait_csv_file_path), api_handler
+        )
+
+
+def create_api_record(page_id, eol_pk):
+    record = dict.fromkeys(EolTraitApiHandler.return_variables)
+    record.update(
+        {
+            "p.page_id": page_id,
+            "p.citation": "A page citation",
+            "t.eol_pk": eol_pk,
+            "r.resource_id": 1,
+            "pred.uri": HABITAT,
+            "obj.uri": "http://purl.obolibrary.org/obo/ENVO_01000174",
+            "t.source": "https://eol.org",
+        }
+    )
+    return record
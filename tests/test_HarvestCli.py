@@ -0,0 +1,250 @@
+import csv
+import io
+import json
+from unittest.mock import Mock
+
+import pytest
+
+import eol.cli
+from eol.cli import Checkpoint, ProgressReporter, main, parse_arguments
+from eol.handlers import EolTraitCsvHandler
+from eol.normalization import EolTraitCsvNormalizer
+from eol.triple_store import compile_triple_store
+
+
+class TestHarvestCli:
+    """
+    Feature: The eol-harvest command harvests the trait data of many pages.
+    """
+
+    def test_harvest_to_json_lines(self, tmp_path, page_ids_file_path, csv_arguments):
+        output_file_path = tmp_path / "traits.jsonl"
+        exit_code = main(
+            [str(page_ids_file_path), *csv_arguments, "--output", str(output_file_path)]
+        )
+
+        triples = read_json_lines(output_file_path)
+        assert exit_code == 0
+        assert {triple["subject"] for triple in triples} == {"311544", "1143547"}
+        assert {"predicate", "object", "eol_record_id"} <= set(triples[0])
+
+    def test_harvest_to_csv(self, tmp_path, page_ids_file_path, csv_arguments):
+        output_file_path = tmp_path / "traits.csv"
+        main(
+            [
+                str(page_ids_file_path),
+                *csv_arguments,
+                "--output",
+                str(output_file_path),
+                "--format",
+                "csv",
+                "--predicate",
+                "http://eol.org/schema/terms/Present",
+                "--workers",
+                "1",
+            ]
+        )
+
+        with open(output_file_path, newline="") as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        assert rows
+        assert {row["predicate"] for row in rows} == {
+            "http://eol.org/schema/terms/Present"
+        }
+
+    def test_harvest_from_triple_store(
+        self, tmp_path, page_ids_file_path, eol_trait_csv_file_path
+    ):
+        store_file_path = tmp_path / "traits.sqlite"
+        compile_triple_store(
+            EolTraitCsvHandler(eol_trait_csv_file_path),
+            EolTraitCsvNormalizer(),
+            store_file_path,
+        ).close()
+        csv_output_file_path = tmp_path / "csv_traits.jsonl"
+        store_output_file_path = tmp_path / "store_traits.jsonl"
+
+        for handler_arguments, output_file_path in [
+            (["--handler", "csv"], csv_output_file_path),
+            (
+                ["--handler", "store", "--triple-store", str(store_file_path)],
+                store_output_file_path,
+            ),
+        ]:
+            main(
+                [
+                    str(page_ids_file_path),
+                    *handler_arguments,
+                    "--trait-csv",
+                    str(eol_trait_csv_file_path),
+                    "--workers",
+                    "1",
+                    "--quiet",
+                    "--output",
+                    str(output_file_path),
+                ]
+            )
+
+        assert read_json_lines(store_output_file_path) == read_json_lines(
+            csv_output_file_path
+        )
+
+    def test_harvest_resumes_from_checkpoint(
+        self, tmp_path, page_ids_file_path, csv_arguments
+    ):
+        output_file_path = tmp_path / "traits.jsonl"
+        checkpoint_directory = tmp_path / "checkpoint"
+        arguments = [
+            str(page_ids_file_path),
+            *csv_arguments,
+            "--output",
+            str(output_file_path),
+            "--checkpoint-dir",
+            str(checkpoint_directory),
+            "--batch-size",
+            "1",
+        ]
+
+        checkpoint = Checkpoint(checkpoint_directory)
+        checkpoint.add([311544])
+        checkpoint.close()
+        output_file_path.write_text('{"subject": "311544"}\n')
+
+        main(arguments)
+        triples = read_json_lines(output_file_path)
+        assert [t["subject"] for t in triples].count("311544") == 1
+        assert {t["subject"] for t in triples} == {"311544", "1143547"}
+
+        assert Checkpoint(checkpoint_directory).completed_page_ids == {
+            311544,
+            1143547,
+        }
+
+    def test_failing_pages_are_skipped(
+        self, tmp_path, page_ids_file_path, csv_arguments, monkeypatch
+    ):
+        create_processing = eol.cli.create_processing
+
+        def create_failing_processing(arguments):
+            processing = create_processing(arguments)
+            get_trait_data_for_eol_page_id = processing.get_trait_data_for_eol_page_id
+
+            def get_trait_data_unless_failing(page_id, **kwargs):
+                if int(page_id) == 1143547:
+                    raise ConnectionError("The EOL API is not reachable")
+                return get_trait_data_for_eol_page_id(page_id, **kwargs)
+
+            processing.get_trait_data_for_eol_page_ids = Mock(
+                side_effect=ConnectionError("The EOL API is not reachable")
+            )
+            processing.get_trait_data_for_eol_page_id = get_trait_data_unless_failing
+            return processing
+
+        monkeypatch.setattr(eol.cli, "create_processing", create_failing_processing)
+        output_file_path = tmp_path / "traits.jsonl"
+        checkpoint_directory = tmp_path / "checkpoint"
+
+        exit_code = main(
+            [
+                str(page_ids_file_path),
+                *csv_arguments,
+                "--output",
+                str(output_file_path),
+                "--checkpoint-dir",
+                str(checkpoint_directory),
+            ]
+        )
+
+        assert exit_code == 1
+        assert {t["subject"] for t in read_json_lines(output_file_path)} == {"311544"}
+        assert Checkpoint(checkpoint_directory).completed_page_ids == {311544}
+
+    def test_gbif_ids_are_converted(self, tmp_path, csv_arguments):
+        identifier_map_file_path = tmp_path / "provider_ids.csv"
+        identifier_map_file_path.write_text(
+            "node_id,resource_pk,resource_id,page_id,preferred_canonical_for_page\n"
+            "1,2437394,767,311544,Tamias dorsalis\n"
+        )
+        gbif_ids_file_path = tmp_path / "gbif_ids.txt"
+        gbif_ids_file_path.write_text("2437394\n123456789\n")
+        output_file_path = tmp_path / "traits.jsonl"
+
+        main(
+            [
+                str(gbif_ids_file_path),
+                *csv_arguments,
+                "--id-type",
+                "gbif",
+                "--identifier-map",
+                str(identifier_map_file_path),
+                "--output",
+                str(output_file_path),
+            ]
+        )
+
+        triples = read_json_lines(output_file_path)
+        assert {triple["subject"] for triple in triples} == {"311544"}
+
+    def test_harvest_sorted(self, tmp_path, page_ids_file_path, csv_arguments):
+        output_file_path = tmp_path / "traits.jsonl"
+        main(
+            [
+                str(page_ids_file_path),
+                *csv_arguments,
+                "--output",
+                str(output_file_path),
+                "--sort",
+                "--memory-budget",
+                "1",
+                "--spill-dir",
+                str(tmp_path),
+                "--batch-size",
+                "1",
+            ]
+        )
+
+        triples = read_json_lines(output_file_path)
+        keys = [(triple["subject"], triple["predicate"]) for triple in triples]
+        assert keys == sorted(keys)
+        assert len({json.dumps(triple) for triple in triples}) == len(triples)
+        assert {path.name for path in tmp_path.iterdir()} == {
+            "page_ids.txt",
+            "traits.jsonl",
+        }
+
+    @pytest.mark.parametrize(
+        "arguments",
+        [
+            ["--sort", "--checkpoint-dir", "checkpoint", "--api-token", "token"],
+            ["--handler", "csv"],
+            ["--handler", "store", "--trait-csv", "traits.csv"],
+            ["--handler", "store", "--triple-store", "traits.sqlite"],
+            ["--id-type", "gbif", "--api-token", "token"],
+            ["--workers", "0", "--api-token", "token"],
+        ],
+    )
+    def test_invalid_arguments(self, page_ids_file_path, arguments):
+        with pytest.raises(SystemExit):
+            parse_arguments([str(page_ids_file_path), *arguments])
+
+    def test_progress_report(self):
+        output = io.StringIO()
+        progress = ProgressReporter(total_pages=10, interval_seconds=0, output=output)
+        progress.update(pages=2, failed_pages=1, triples=30)
+
+        assert output.getvalue().startswith("2/10 pages (1 failed), 30 triples")
+
+    @pytest.fixture
+    def page_ids_file_path(self, tmp_path):
+        page_ids_file_path = tmp_path / "page_ids.txt"
+        page_ids_file_path.write_text("# Some pages\n311544\n1143547\n\n311544\n")
+        return page_ids_file_path
+
+    @pytest.fixture
+    def csv_arguments(self, eol_trait_csv_file_path):
+        return ["--handler", "csv", "--trait-csv", eol_trait_csv_file_path, "--quiet"]
+
+
+def read_json_lines(file_path):
+    with open(file_path) as json_lines_file:
+        return [json.loads(line) for line in json_lines_file]
@@ -1,8 +1,12 @@
 import pathlib
 
+import numpy as np
+import pandas as pd
 import pytest
 
 from eol import DataProvider, IdentifierConverter
+from eol.conversions import IndexedIdentifierConverter, create_identifier_converter
+from eol.identifier_index import compile_identifier_map_index
 
 
 class TestIdentifierConverter:
@@ -11,8 +15,16 @@ class TestIdentifierConverter:
         current_directory = pathlib.Path(__file__).parent
         return current_directory / "data/test_provider_ids.csv"
 
-    @pytest.fixture
-    def id_converter(self, provider_data_csv_file):
+    @pytest.fixture(params=["csv", "index"])
+    def id_converter(
+        self, request, provider_data_csv_file, provider_data_index_directory
+    ):
+        if request.param == "index":
+            return IndexedIdentifierConverter(
+                provider_data_index_directory,
+                relevant_data_providers=[DataProvider.Gbif],
+            )
+
         return IdentifierConverter(
             provider_csv_file_path=provider_data_csv_file,
             relevant_data_providers=[DataProvider.Gbif],
@@ -73,3 +85,96 @@ class TestIdentifierConverter:
             provider_id, data_provider=DataProvider.WoRMS
         )
         assert eol_id == expected_eol_page_id
+
+    @pytest.mark.parametrize(
+        "gbif_ids",
+        [
+            np.array([1057764, 1, 10577931]),
+            np.array([1057764.0, np.nan, 10577931.0]),
+            pd.Series(["1057764", None, "10577931"]),
+            ["1057764", "1", "10577931"],
+        ],
+    )
+    def test_bulk_conversion_to_eol_page_ids(self, id_converter, gbif_ids):
+        """Feature: Arrays of provider IDs are converted into a nullable integer
+        array of EOL page IDs with the same order.
+        """
+        eol_page_ids = id_converter.to_eol_page_ids(gbif_ids, DataProvider.Gbif)
+
+        assert eol_page_ids.dtype == "Int64"
+        assert eol_page_ids.tolist() == [21828356, pd.NA, 52717353]
+
+    def test_bulk_conversion_respects_data_provider(self, id_converter):
+        id_converter.relevant_data_providers = [DataProvider.Gbif, DataProvider.WoRMS]
+
+        gbif_eol_ids = id_converter.to_eol_page_ids(["1057764"], DataProvider.Gbif)
+        worms_eol_ids = id_converter.to_eol_page_ids(["1057764"], DataProvider.WoRMS)
+
+        assert gbif_eol_ids.tolist() == [21828356]
+        assert worms_eol_ids.tolist() == [1234567]
+
+    def test_bulk_conversion_from_eol_page_ids(self, id_converter):
+        gbif_ids = id_converter.from_eol_page_ids(
+            np.array([52717353, 46559130, 21828356]), DataProvider.Gbif
+        )
+        assert gbif_ids.tolist() == ["10577931", pd.NA, "1057764"]
+
+    @pytest.mark.parametrize(
+        "gbif_ids",
+        [np.array([1057764.0, 2.5]), ["1057764", "2.5"], pd.Series(["1057764", "x"])],
+    )
+    def test_bulk_conversion_of_fractional_ids_to_eol_page_ids(
+        self, id_converter, gbif_ids
+    ):
+        """Feature: Identifiers which are no whole numbers have no EOL page ID."""
+        eol_page_ids = id_converter.to_eol_page_ids(gbif_ids, DataProvider.Gbif)
+
+        assert eol_page_ids.tolist() == [21828356, pd.NA]
+
+    @pytest.mark.parametrize(
+        "eol_page_ids",
+        [np.array([21828356.0, 2.5]), [21828356, 2.5], ["21828356", "2.5"]],
+    )
+    def test_bulk_conversion_of_fractional_ids_from_eol_page_ids(
+        self, id_converter, eol_page_ids
+    ):
+        gbif_ids = id_converter.from_eol_page_ids(eol_page_ids, DataProvider.Gbif)
+
+        assert gbif_ids.tolist() == ["1057764", pd.NA]
+
+    def test_create_converter_for_index_or_csv_file(
+        self, provider_data_csv_file, provider_data_index_directory
+    ):
+        """Feature: A compiled identifier map index is detected and opened instead
+        of reading the CSV file.
+        """
+        index_converter = create_identifier_converter(provider_data_index_directory)
+        csv_converter = create_identifier_converter(provider_data_csv_file)
+
+        assert isinstance(index_converter, IndexedIdentifierConverter)
+        assert not isinstance(csv_converter, IndexedIdentifierConverter)
+
+    def test_index_covers_all_data_providers(self, provider_data_index_directory):
+        """Feature: Switching the relevant data providers of an index-backed
+        converter does not require re-reading data.
+        """
+        id_converter = IndexedIdentifierConverter(
+            provider_data_index_directory, DataProvider.Gbif
+        )
+        assert id_converter.from_eol_page_id("1234567") is None
+
+        id_converter.relevant_data_providers = [DataProvider.WoRMS]
+        assert id_converter.from_eol_page_id("1234567") == "1057764"
+        assert set(id_converter.data_frame["resource_id"]) == {459}
+
+
+@pytest.fixture(scope="module")
+def provider_data_index_directory(tmp_path_factory):
+    current_directory = pathlib.Path(__file__).parent
+    index_directory = tmp_path_factory.mktemp("identifier_map_index")
+    compile_identifier_map_index(
+        current_directory / "data/test_provider_ids.csv",
+        index_directory,
+        chunk_size=100,
+    )
+    return index_directory
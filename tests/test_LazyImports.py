@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+import pytest
+
+from eol.lazy import LazyModule, lazy_import
+
+HEAVY_DEPENDENCIES = ["ijson", "numpy", "pandas", "requests"]
+
+
+class TestLazyImports:
+    @pytest.mark.parametrize(
+        "statement",
+        [
+            "import eol",
+            "from eol.triple_generator import Triple",
+            "from eol.handlers import EolTraitApiHandler, EolTraitCsvHandler",
+            "from eol.conversions import IdentifierConverter",
+        ],
+    )
+    def test_heavy_dependencies_are_not_imported(self, statement):
+        script = (
+            f"import sys\n{statement}\n"
+            f"print(','.join(m for m in {HEAVY_DEPENDENCIES} if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == ""
+
+    def test_module_is_imported_on_first_use(self):
+        module = LazyModule("json")
+        assert module.dumps([1]) == "[1]"
+        assert "loads" in module.__dict__
+
+    def test_imported_modules_are_returned_directly(self):
+        assert lazy_import("sys") is sys
+        assert isinstance(lazy_import("not.yet.imported.module"), LazyModule)
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from eol.handlers import EolTraitCsvHandler
+from eol.metrics import MetricsRegistry, enable_metrics, metrics_registry
+
+
+class TestMetricsRegistry:
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        registry.increment("eol_api_requests_total")
+        registry.observe("eol_api_request_seconds", 0.2)
+        with registry.time("eol_csv_load_seconds"):
+            pass
+
+        assert registry.as_dict() == {"counters": {}, "histograms": {}}
+
+    def test_counters_and_histograms(self, registry):
+        registry.increment("eol_api_requests_total")
+        registry.increment("eol_api_requests_total", 2)
+        registry.observe("eol_api_request_seconds", 0.003)
+        registry.observe("eol_api_request_seconds", 120)
+
+        metrics = registry.as_dict()
+        assert metrics["counters"] == {"eol_api_requests_total": 3}
+
+        histogram = metrics["histograms"]["eol_api_request_seconds"]
+        assert histogram["count"] == 2
+        assert histogram["sum"] == pytest.approx(120.003)
+        assert histogram["buckets"]["0.001"] == 0
+        assert histogram["buckets"]["0.005"] == 1
+        assert histogram["buckets"]["60"] == 1
+        assert histogram["buckets"]["+Inf"] == 2
+
+    def test_timed_decorator(self, registry):
+        @registry.timed("eol_normalize_seconds")
+        def normalize(value):
+            return value
+
+        assert normalize(5) == 5
+        assert registry.histograms["eol_normalize_seconds"].count == 1
+
+    def test_prometheus_text_export(self, registry, tmp_path):
+        registry.increment("eol_triples_generated_total", 7)
+        registry.observe("eol_normalize_seconds", 0.5)
+
+        file_path = tmp_path / "eol.prom"
+        registry.write_prometheus_text_file(file_path)
+        lines = file_path.read_text().splitlines()
+
+        assert "# TYPE eol_triples_generated_total counter" in lines
+        assert "eol_triples_generated_total 7" in lines
+        assert "# TYPE eol_normalize_seconds histogram" in lines
+        assert 'eol_normalize_seconds_bucket{le="0.1"} 0' in lines
+        assert 'eol_normalize_seconds_bucket{le="0.5"} 1' in lines
+        assert 'eol_normalize_seconds_bucket{le="+Inf"} 1' in lines
+        assert "eol_normalize_seconds_count 1" in lines
+
+    def test_json_export(self, registry, tmp_path):
+        registry.increment("eol_api_rows_total", 100)
+
+        file_path = tmp_path / "eol.json"
+        registry.write_json_file(file_path)
+
+        assert json.loads(file_path.read_text())["counters"] == {
+            "eol_api_rows_total": 100
+        }
+
+    def test_harvest_hooks_report_to_module_registry(
+        self, enabled_module_registry, eol_with_csv_handler
+    ):
+        eol_with_csv_handler.get_trait_data_for_eol_page_id("311544")
+        eol_with_csv_handler.get_trait_data_for_eol_page_id("311544")
+
+        counters = enabled_module_registry.counters
+        assert counters["eol_csv_data_cache_misses_total"] == 1
+        assert counters["eol_csv_data_cache_hits_total"] == 1
+        assert counters["eol_csv_rows_loaded_total"] == 22
+        assert counters["eol_triples_generated_total"] > 0
+        assert "eol_normalize_seconds" in enabled_module_registry.histograms
+        assert "eol_deduplicate_triples_seconds" in enabled_module_registry.histograms
+
+    def test_hooks_do_not_record_when_disabled(self, resource_directory):
+        metrics_registry.reset()
+        handler = EolTraitCsvHandler(resource_directory / "test_eol_traits.csv")
+        handler.get_data()
+
+        assert metrics_registry.as_dict() == {"counters": {}, "histograms": {}}
+
+    @pytest.fixture
+    def registry(self):
+        return MetricsRegistry(enabled=True)
+
+    @pytest.fixture
+    def enabled_module_registry(self):
+        metrics_registry.reset()
+        yield enable_metrics()
+        metrics_registry.enabled = False
+        metrics_registry.reset()
@@ -1,3 +1,4 @@
+import pandas as pd
 import pytest
 
 from eol.normalization import Normalizer
@@ -36,6 +37,45 @@ class TestNormalizer:
         with pytest.raises(ValueError):
             normalizer.normalize(non_normalized_data)
 
+    def test_normalize_batch(self, normalizer, non_normalized_data):
+        normalizer.normalized_keys["duplicate_mapping"] = "normalized-key"
+        batch = pd.DataFrame(
+            [
+                {**non_normalized_data, "duplicate_mapping": None},
+                {
+                    **non_normalized_data,
+                    "non-normalized-key": None,
+                    "duplicate_mapping": 6789,
+                },
+                {**non_normalized_data, "duplicate_mapping": 12345},
+            ]
+        )
+
+        normalized_batch = normalizer.normalize_batch(batch)
+
+        assert normalized_batch.to_dict("records")[0] == {
+            "normalized-key": 12345,
+            "another-key": "foo",
+            "normalized-key-1": "bar",
+            "already-normalized-key": "foobar",
+        }
+        assert normalized_batch["normalized-key"].tolist() == [12345, 6789, 12345]
+        assert "non-normalized-key" in batch.columns
+
+    def test_batch_raises_exception_when_multimapping_leads_to_value_collision(
+        self, normalizer, non_normalized_data
+    ):
+        normalizer.normalized_keys["duplicate_mapping"] = "normalized-key"
+        batch = pd.DataFrame(
+            [
+                {**non_normalized_data, "duplicate_mapping": None},
+                {**non_normalized_data, "duplicate_mapping": 6789},
+            ]
+        )
+
+        with pytest.raises(ValueError):
+            normalizer.normalize_batch(batch)
+
     @pytest.fixture
     def normalizer(self):
         return DummyNormalizer()
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from eol.external_sort import (
+    OutOfCoreTripleDeduplicator,
+    deduplicate_triples_out_of_core,
+)
+from eol.triple_generator import Triple, deduplicate_triples
+
+
+class TestOutOfCoreTripleDeduplicator:
+    @pytest.mark.parametrize("memory_budget_bytes", [2**30, 2000])
+    def test_equals_in_memory_deduplication(self, triples, memory_budget_bytes):
+        unique_triples = list(
+            deduplicate_triples_out_of_core(
+                triples, memory_budget_bytes=memory_budget_bytes
+            )
+        )
+
+        expected_triples = deduplicate_triples(triples)
+        assert len(unique_triples) == len(expected_triples)
+        assert set(unique_triples) == set(expected_triples)
+        assert [sort_key(t) for t in unique_triples] == [
+            sort_key(t) for t in expected_triples
+        ]
+
+    def test_spill_files_are_removed(self, tmp_path, triples):
+        with OutOfCoreTripleDeduplicator(2000, spill_directory=tmp_path) as spill:
+            spill.add(triples[:100])
+            spill.add(triples[100:])
+            assert any(tmp_path.iterdir())
+            assert len(list(spill.iterate_sorted())) == 200
+
+            with pytest.raises(ValueError):
+                spill.add(triples)
+
+        assert not any(tmp_path.iterdir())
+
+    def test_triples_differing_only_in_record_id_are_partitioned(self, tmp_path):
+        triples = [
+            Triple(subject="1", predicate="p", object="o", eol_record_id=f"R{i}")
+            for i in range(100)
+        ]
+
+        with OutOfCoreTripleDeduplicator(2000, spill_directory=tmp_path) as spill:
+            spill.add(triples)
+            partition_paths = spill._close_partition_files()
+
+            assert sum(path.stat().st_size > 0 for path in partition_paths) > 1
+
+    @pytest.mark.parametrize(
+        ["memory_budget_bytes", "number_of_partitions"], [(0, 64), (1000, 1)]
+    )
+    def test_invalid_arguments(self, memory_budget_bytes, number_of_partitions):
+        with pytest.raises(ValueError):
+            OutOfCoreTripleDeduplicator(
+                memory_budget_bytes, number_of_partitions=number_of_partitions
+            )
+
+    @pytest.fixture
+    def triples(self):
+        unique_triples = [
+            Triple(
+                subject=str(i % 20),
+                predicate=f"http://eol.org/schema/terms/{i % 7}",
+                object=i,
+                eol_record_id=f"R{i}",
+            )
+            for i in range(200)
+        ]
+        triples = unique_triples * 3
+        random.Random(42).shuffle(triples)
+        return triples
+
+
+def sort_key(triple):
+    return triple.subject, triple.predicate
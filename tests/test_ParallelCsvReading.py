@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from eol.data import find_csv_chunk_boundaries, read_csv_file_in_parallel
+from eol.handlers import EolTraitCsvHandler, _replace_nan_by_none
+
+
+class TestParallelCsvReading:
+    def test_boundaries_are_record_starts(self, quoted_csv_file_path):
+        content = quoted_csv_file_path.read_bytes()
+        boundaries = find_csv_chunk_boundaries(quoted_csv_file_path, chunk_size=30)
+
+        assert boundaries[0] == content.index(b"\n") + 1
+        assert boundaries[-1] == len(content)
+        assert boundaries == sorted(set(boundaries))
+        for boundary in boundaries[1:-1]:
+            assert content[boundary - 1 : boundary] == b"\n"
+            # Line breaks within quotes do not start a record
+            assert content[:boundary].count(b'"') % 2 == 0
+
+    def test_small_files_are_not_split(self, quoted_csv_file_path):
+        boundaries = find_csv_chunk_boundaries(quoted_csv_file_path, chunk_size=10**6)
+        assert len(boundaries) == 2
+
+    @pytest.mark.parametrize("chunk_size", [1, 30, 10**6])
+    def test_parallel_reading_equals_sequential_reading(
+        self, quoted_csv_file_path, chunk_size
+    ):
+        data = read_csv_file_in_parallel(
+            quoted_csv_file_path,
+            workers=2,
+            chunk_size=chunk_size,
+            usecols=["id", "text"],
+            dtype={"id": "int64"},
+        )
+        expected_data = pd.read_csv(
+            quoted_csv_file_path, usecols=["id", "text"], dtype={"id": "int64"}
+        )
+        pd.testing.assert_frame_equal(data, expected_data)
+
+    def test_csv_handler_data_is_read_in_parallel(self, eol_trait_csv_file_path):
+        handler = EolTraitCsvHandler(eol_trait_csv_file_path, workers=1)
+        data = read_csv_file_in_parallel(
+            eol_trait_csv_file_path,
+            workers=2,
+            chunk_size=1000,
+            chunk_converter=_replace_nan_by_none,
+            usecols=handler.required_columns,
+            dtype=handler.column_types,
+        )
+
+        assert data.to_dict("records") == handler.get_data().to_dict("records")
+
+    @pytest.fixture
+    def quoted_csv_file_path(self, tmp_path):
+        rows = [
+            '1,"a text, with a comma",x',
+            '2,"a text\nwith a line break",y',
+            '3,"a ""quoted"" text\nwith\nline breaks",z',
+            "4,plain,w",
+        ]
+        csv_file_path = tmp_path / "quoted.csv"
+        csv_file_path.write_text("id,text,other\n" + "\n".join(rows * 5) + "\n")
+        return csv_file_path
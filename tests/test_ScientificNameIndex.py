@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from eol.name_index import ScientificNameIndex, normalize_scientific_name
+
+
+class TestScientificNameIndex:
+    @pytest.mark.parametrize(
+        ["scientific_name", "expected_name"],
+        [
+            (
+                "<i>Metharpinia longirostris</i> Schellenberg 1931",
+                "Metharpinia longirostris",
+            ),
+            (
+                "<i>Abietinella operculata</i> (Jäderholm 1903)",
+                "Abietinella operculata",
+            ),
+            ("Biflustra okadai Almeida, Souza & Vieira 2017", "Biflustra okadai"),
+            ("Fagus sylvatica L.", "Fagus sylvatica"),
+            ("Atraktoprionidae", "Atraktoprionidae"),
+            ("<i>Quercus robur</i> subsp. <i>robur</i>", "Quercus robur subsp. robur"),
+            ("Aus bus de Candolle", "Aus bus"),
+            ("Mentha &times; piperita", "Mentha × piperita"),
+            ("Daphnia (Ctenodaphnia) magna Straus, 1820", "Daphnia magna"),
+            ("<i>Daphnia (Ctenodaphnia)</i> Scourfield, 1942", "Daphnia"),
+            ("Acer cf. campestre", "Acer campestre"),
+            ("Tamias aff. dorsalis Baird", "Tamias dorsalis"),
+            ("", ""),
+        ],
+    )
+    def test_normalize_scientific_name(self, scientific_name, expected_name):
+        assert normalize_scientific_name(scientific_name) == expected_name
+
+    @pytest.mark.parametrize(
+        ["scientific_name", "expected_page_ids"],
+        [
+            ("Fagus sylvatica", [1, 2]),
+            ("<i>fagus sylvatica</i> Linnaeus", [1, 2]),
+            ("Fagus", []),
+            ("Tamias dorsalis", [3]),
+            ("Daphnia magna", [7]),
+            ("Daphnia", []),
+        ],
+    )
+    def test_get_page_ids(self, name_index, scientific_name, expected_page_ids):
+        assert name_index.get_page_ids(scientific_name).tolist() == expected_page_ids
+
+    def test_find_names(self, name_index):
+        assert name_index.find_names("tamias ") == {
+            "Tamias dorsalis": [3],
+            "Tamias minimus": [4],
+        }
+        assert list(name_index.find_names("Tamias")) == [
+            "Tamias dorsalis",
+            "Tamias minimus",
+            "Tamiasciurus hudsonicus",
+        ]
+        assert name_index.find_names("Tamias", limit=1) == {"Tamias dorsalis": [3]}
+        assert name_index.find_names("Quercus") == {}
+
+    def test_number_of_names(self, name_index):
+        assert len(name_index) == 5
+
+    @pytest.fixture
+    def name_index(self):
+        data = pd.DataFrame(
+            [
+                (1, "Fagus sylvatica L."),
+                (2, "<i>Fagus sylvatica</i>"),
+                (1, "<i>Fagus sylvatica</i>"),
+                (3, "<i>Tamias dorsalis</i> Baird 1855"),
+                (4, "Tamias minimus"),
+                (5, "Tamiasciurus hudsonicus"),
+                (6, None),
+                (7, "Daphnia (Ctenodaphnia) magna Straus, 1820"),
+            ],
+            columns=["page_id", "scientific_name"],
+        )
+        return ScientificNameIndex.from_trait_data(data)
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from eol.pipeline import Stage, StagedPipeline
+
+
+class TestStagedPipeline:
+    def test_items_pass_all_stages(self):
+        pipeline = StagedPipeline(
+            [
+                Stage("split", lambda item: [item, item]),
+                Stage("square", lambda item: [item**2]),
+                Stage("drop_odd", lambda item: [item] if item % 2 == 0 else []),
+            ]
+        )
+
+        assert list(pipeline.process(range(5))) == [0, 0, 4, 4, 16, 16]
+
+    def test_stage_workers_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fetch(item):
+            # Only passes if both workers wait at the same time
+            barrier.wait()
+            return [item]
+
+        pipeline = StagedPipeline([Stage("fetch", fetch, workers=2)])
+        assert sorted(pipeline.process([1, 2])) == [1, 2]
+
+    def test_queues_are_bounded(self):
+        consumed_items = []
+
+        def source():
+            for item in range(100):
+                consumed_items.append(item)
+                yield item
+
+        pipeline = StagedPipeline([Stage("pass", lambda item: [item])], queue_size=1)
+        results = pipeline.process(source())
+        assert next(results) == 0
+        time.sleep(0.2)
+
+        # Two queues and the worker hold at most one item each
+        assert len(consumed_items) <= 5
+        results.close()
+
+    def test_errors_are_raised(self):
+        def fail_on_three(item):
+            if item == 3:
+                raise KeyError(item)
+            return [item]
+
+        pipeline = StagedPipeline([Stage("fail", fail_on_three, workers=2)])
+        with pytest.raises(KeyError):
+            list(pipeline.process(range(10)))
+
+    def test_run_counts_the_results_of_the_sink(self):
+        written_items = []
+        pipeline = StagedPipeline(
+            [
+                Stage("double", lambda item: [2 * item], workers=3),
+                Stage("sink", lambda item: [written_items.append(item)]),
+            ]
+        )
+
+        assert pipeline.run(range(10)) == 10
+        assert sorted(written_items) == [2 * item for item in range(10)]
+
+    @pytest.mark.parametrize(
+        ["stages", "queue_size"],
+        [([], 4), ([Stage("pass", list)], 0)],
+    )
+    def test_invalid_pipelines(self, stages, queue_size):
+        with pytest.raises(ValueError):
+            StagedPipeline(stages, queue_size=queue_size)
+
+    def test_stages_need_a_worker(self):
+        with pytest.raises(ValueError):
+            Stage("pass", list, workers=0)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from eol.hierarchy import TaxonHierarchy
+
+
+class TestTaxonHierarchy:
+    def test_get_child_page_ids(self, taxon_hierarchy):
+        child_page_ids = taxon_hierarchy.get_child_page_ids(np.array([2, 3, 311544]))
+        assert sorted(child_page_ids) == [311544, 1143547, 45258442]
+
+    @pytest.mark.parametrize(
+        ["page_id", "max_depth", "expected_page_ids"],
+        [
+            ("1", None, {1, 2, 3, 311544, 45258442, 1143547}),
+            (1, 1, {1, 2, 3}),
+            (2, None, {2, 311544, 45258442}),
+            (311544, None, {311544}),
+            (1234, None, {1234}),
+        ],
+    )
+    def test_get_descendant_page_ids(
+        self, taxon_hierarchy, page_id, max_depth, expected_page_ids
+    ):
+        """Feature: The subtree contains the given page and all pages below it."""
+        page_ids = taxon_hierarchy.get_descendant_page_ids(page_id, max_depth)
+        assert set(page_ids) == expected_page_ids
+        assert len(page_ids) == len(expected_page_ids)
+
+    def test_cycles_terminate(self):
+        taxon_hierarchy = TaxonHierarchy(np.array([1, 2]), np.array([2, 1]))
+        assert set(taxon_hierarchy.get_descendant_page_ids(1)) == {1, 2}
+
+    @pytest.fixture
+    def taxon_hierarchy(self, pages_csv_file_path):
+        return TaxonHierarchy.from_csv_file(pages_csv_file_path)
@@ -0,0 +1,161 @@
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+
+import eol.conversions
+from eol.concurrency import LazyValue, ObjectPool
+from eol.conversions import IdentifierConverter
+from eol.data import DataProvider
+from eol.handlers import EolTraitApiHandler, EolTraitCsvHandler
+
+NUMBER_OF_THREADS = 8
+
+
+class TestThreadSafety:
+    def test_csv_data_is_loaded_once(self, eol_trait_csv_file_path):
+        handler = EolTraitCsvHandler(eol_trait_csv_file_path)
+        load_data = count_calls(handler._create_data)
+        handler._create_data = load_data
+
+        results = call_concurrently(handler.get_data)
+
+        assert load_data.calls == 1
+        assert all(data is results[0] for data in results)
+
+    def test_indexes_are_built_once_and_read_only(self, eol_trait_csv_file_path):
+        handler = EolTraitCsvHandler(eol_trait_csv_file_path)
+
+        trait_indexes = call_concurrently(handler.get_trait_index)
+        name_indexes = call_concurrently(handler.get_name_index)
+        assert all(index is trait_indexes[0] for index in trait_indexes)
+        assert all(index is name_indexes[0] for index in name_indexes)
+
+        page_ids = handler.get_trait_index().get_page_ids(
+            "http://rs.tdwg.org/dwc/terms/habitat"
+        )
+        assert len(page_ids) > 0
+        with pytest.raises(ValueError):
+            page_ids[0] = 1
+
+    def test_identifier_map_is_read_once(self, monkeypatch, provider_ids_csv_file_path):
+        read_csv_file = count_calls(eol.conversions.read_csv_file)
+        monkeypatch.setattr(eol.conversions, "read_csv_file", read_csv_file)
+        converter = IdentifierConverter(provider_ids_csv_file_path, [DataProvider.Gbif])
+
+        results = call_concurrently(
+            lambda: converter.to_eol_page_id("1057764", DataProvider.Gbif)
+        )
+
+        assert read_csv_file.calls == 1
+        assert results == ["21828356"] * NUMBER_OF_THREADS
+
+    def test_api_handler_reuses_sessions(self):
+        handler = EolTraitApiHandler("JWT token")
+
+        with handler.sessions.acquire() as session:
+            with handler.sessions.acquire() as other_session:
+                assert other_session is not session
+        with handler.sessions.acquire() as reused_session:
+            assert reused_session in (session, other_session)
+        assert session.headers["Authorization"] == "JWT token"
+
+        handler.close()
+        with handler.sessions.acquire() as new_session:
+            assert new_session not in (session, other_session)
+
+    def test_api_handler_lends_sessions_until_the_response_is_read(self):
+        sessions = []
+
+        def create_session():
+            session = Mock()
+            session.post.side_effect = lambda *args, **kwargs: Mock(
+                status_code=200, raw=Stream(b'{"columns": ["a"], "data": [[1]]}')
+            )
+            sessions.append(session)
+            return session
+
+        handler = EolTraitApiHandler("JWT token")
+        handler.sessions = ObjectPool(create_session, max_idle=2)
+
+        pages = handler.paginate_cypher_api("MATCH (p:Page) RETURN p LIMIT 2")
+        page = next(pages)
+        with handler.sessions.acquire() as other_session:
+            assert other_session is not sessions[0]
+
+        assert list(page) == [{"a": 1}]
+        assert list(pages) == []
+        with handler.sessions.acquire() as reused_session:
+            assert reused_session is sessions[0]
+
+    def test_object_pool_keeps_at_most_max_idle_objects(self):
+        all_borrowed = threading.Barrier(NUMBER_OF_THREADS)
+        pool = ObjectPool(Mock, max_idle=2)
+
+        def borrow():
+            with pool.acquire() as pooled_object:
+                all_borrowed.wait()
+                return pooled_object
+
+        pooled_objects = call_concurrently(borrow)
+
+        assert len({id(pooled_object) for pooled_object in pooled_objects}) == (
+            NUMBER_OF_THREADS
+        )
+        closed_objects = [o for o in pooled_objects if o.close.called]
+        assert len(closed_objects) == NUMBER_OF_THREADS - 2
+
+    def test_lazy_value_is_created_again_after_a_failure(self):
+        attempts = []
+
+        def create():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError("The file is not available yet!")
+            return "value"
+
+        value = LazyValue(create)
+        with pytest.raises(OSError):
+            value.get()
+        assert not value.is_created
+
+        assert value.get() == "value"
+        assert value.is_created
+        assert len(attempts) == 2
+
+        value.reset()
+        assert not value.is_created
+
+
+def call_concurrently(function):
+    """Calls the function from several threads at (nearly) the same time."""
+    barrier = threading.Barrier(NUMBER_OF_THREADS)
+
+    def call():
+        barrier.wait()
+        return function()
+
+    with ThreadPoolExecutor(max_workers=NUMBER_OF_THREADS) as executor:
+        futures = [executor.submit(call) for _ in range(NUMBER_OF_THREADS)]
+        return [future.result() for future in futures]
+
+
+def count_calls(function):
+    """Wraps the function, counting its calls. Each call is slowed down, hence
+    concurrent calls overlap.
+    """
+
+    def counting_function(*args, **kwargs):
+        counting_function.calls += 1
+        time.sleep(0.05)
+        return function(*args, **kwargs)
+
+    counting_function.calls = 0
+    return counting_function
+
+
+class Stream(io.BytesIO):
+    """A response body, which accepts the `decode_content` flag of urllib3."""
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eol.trait_index import TraitIndex
+
+HABITAT = "http://rs.tdwg.org/dwc/terms/habitat"
+PRESENT = "http://eol.org/schema/terms/Present"
+FOREST = "http://purl.obolibrary.org/obo/ENVO_01000174"
+DESERT = "http://purl.obolibrary.org/obo/ENVO_01000179"
+USA = "http://www.geonames.org/6252001"
+
+
+class TestTraitIndex:
+    @pytest.mark.parametrize(
+        ["predicate", "value_uri", "expected_page_ids"],
+        [
+            (HABITAT, None, [1, 2, 3]),
+            (HABITAT, FOREST, [1, 3]),
+            (HABITAT, DESERT, [2]),
+            (PRESENT, USA, [1, 4]),
+            (PRESENT, FOREST, []),
+            ("http://unknown.org/predicate", None, []),
+        ],
+    )
+    def test_get_page_ids(self, trait_index, predicate, value_uri, expected_page_ids):
+        page_ids = trait_index.get_page_ids(predicate, value_uri)
+        assert page_ids.tolist() == expected_page_ids
+        assert page_ids.dtype == np.int64
+
+    @pytest.mark.parametrize(
+        ["traits", "expected_page_ids"],
+        [
+            ([(HABITAT, FOREST), (PRESENT, USA)], [1]),
+            ([HABITAT, PRESENT], [1, 3]),
+            ([(HABITAT, DESERT), PRESENT], []),
+            ([(HABITAT, FOREST)], [1, 3]),
+        ],
+    )
+    def test_find_page_ids(self, trait_index, traits, expected_page_ids):
+        assert trait_index.find_page_ids(traits).tolist() == expected_page_ids
+
+    def test_traits_are_required(self, trait_index):
+        with pytest.raises(ValueError):
+            trait_index.find_page_ids([])
+
+    @pytest.fixture
+    def trait_index(self):
+        data = pd.DataFrame(
+            [
+                (3, HABITAT, FOREST),
+                (1, HABITAT, FOREST),
+                (1, HABITAT, FOREST),
+                (2, HABITAT, DESERT),
+                (1, PRESENT, USA),
+                (4, PRESENT, USA),
+                (3, PRESENT, None),
+                (5, None, None),
+            ],
+            columns=["page_id", "predicate", "value_uri"],
+        )
+        return TraitIndex.from_trait_data(data)
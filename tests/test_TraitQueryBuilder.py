@@ -0,0 +1,103 @@
+import pytest
+
+from eol.cypher import CypherQuery, TraitQueryBuilder, format_cypher_literal
+
+RETURN_VARIABLES = ["p.page_id", "t.eol_pk"]
+
+
+class TestTraitQueryBuilder:
+    def test_page_ids_are_parameters(self, query_builder):
+        query = query_builder.by_page_ids([1, "2"], limit=1000)
+        other_query = query_builder.by_page_ids([3], limit=1000)
+
+        assert query.text == other_query.text
+        assert query.text.startswith("UNWIND $page_ids AS page_id")
+        assert query.text.endswith("RETURN p.page_id, t.eol_pk\n    ORDER BY t.eol_pk")
+        assert query.parameters == {"page_ids": [1, 2]}
+        assert query.limit == 1000
+
+    def test_page(self, query_builder):
+        query = query_builder.by_subtree(2, max_depth=3, limit=10)
+
+        page = query.page(skip=20)
+
+        assert "(root:Page)<-[:parent*0..3]-(p:Page)" in page.text
+        assert page.text.endswith("SKIP $skip LIMIT $limit")
+        assert page.parameters == {
+            "page_id": 2,
+            "after": None,
+            "skip": 20,
+            "limit": 10,
+        }
+        assert query.parameters == {"page_id": 2, "after": None}
+        assert query.page(skip=0, limit=11).parameters["limit"] == 11
+
+    def test_page_after(self, query_builder):
+        query = query_builder.by_subtree(2, max_depth=None, limit=10)
+
+        first_page = query.page_after(None)
+        next_page = query.page_after("R1-PK2", limit=11)
+
+        assert "AND ($after IS NULL OR t.eol_pk > $after)" in query.text
+        assert first_page.text == next_page.text
+        assert first_page.text.endswith("ORDER BY t.eol_pk LIMIT $limit")
+        assert first_page.parameters == {"page_id": 2, "after": None, "limit": 10}
+        assert next_page.parameters == {"page_id": 2, "after": "R1-PK2", "limit": 11}
+        assert "(null IS NULL OR t.eol_pk > null)" in first_page.inline_parameters()
+        with pytest.raises(ValueError):
+            query_builder.by_page_ids([1], limit=10).page_after(None)
+
+    @pytest.mark.parametrize(
+        ["value", "expected_value"],
+        [("311544", 311544), (311544, 311544), ("http://eol.org", "http://eol.org")],
+    )
+    def test_by_key(self, query_builder, value, expected_value):
+        query = query_builder.by_key("p.page_id", value)
+
+        assert "WHERE p.page_id = $value" in query.text
+        assert query.parameters == {"value": expected_value}
+        assert query.limit == 100
+
+    @pytest.mark.parametrize("key", ["p.page_id = 1 OR true", "p.page_id}", ""])
+    def test_by_key_rejects_invalid_keys(self, query_builder, key):
+        with pytest.raises(ValueError):
+            query_builder.by_key(key, 1)
+
+    def test_from_string(self):
+        query = CypherQuery.from_string("MATCH (t:Trait) RETURN t LIMIT 100;")
+
+        assert query == CypherQuery("MATCH (t:Trait) RETURN t", limit=100)
+        with pytest.raises(ValueError):
+            CypherQuery("MATCH (t:Trait) RETURN t").page(skip=0)
+
+    def test_count(self, query_builder):
+        query = query_builder.by_page_ids([1], limit=10).count()
+
+        assert query.text.endswith("RETURN count(*) AS row_count")
+        assert query.parameters == {"page_ids": [1]}
+        assert query.limit is None
+
+    def test_inline_parameters(self, query_builder):
+        query = query_builder.by_page_ids([1, 2], limit=10).page(skip=0)
+
+        assert query.inline_parameters().startswith("UNWIND [1, 2] AS page_id")
+        assert query.inline_parameters().endswith("SKIP 0 LIMIT 10")
+        with pytest.raises(ValueError):
+            CypherQuery("RETURN $missing").inline_parameters()
+
+    @pytest.mark.parametrize(
+        ["value", "expected_literal"],
+        [
+            (None, "null"),
+            (True, "true"),
+            (2.5, "2.5"),
+            ('say "hi"', '"say \\"hi\\""'),
+            (["a", 1], '["a", 1]'),
+        ],
+    )
+    def test_format_cypher_literal(self, value, expected_literal):
+        assert format_cypher_literal(value) == expected_literal
+
+    @pytest.fixture
+    def query_builder(self):
+        return TraitQueryBuilder(RETURN_VARIABLES, "t.eol_pk")
@@ -0,0 +1,118 @@
+import pytest
+
+from eol import EncyclopediaOfLifeProcessing
+from eol.delta import TraitSnapshot
+from eol.handlers import EolTraitCsvHandler
+from eol.normalization import EolTraitCsvNormalizer
+from eol.triple_generator import Triple
+
+
+class TestTraitSnapshot:
+    def test_store_and_read_records(self, tmp_path):
+        triples = [
+            Triple("311544", "http://eol.org/schema/terms/AETinRange", 407.56, "R1"),
+            Triple("311544", "http://eol.org/schema/terms/Present", "uri", "R1"),
+        ]
+        with TraitSnapshot(tmp_path / "snapshot.sqlite") as snapshot:
+            snapshot.store([("R1", "311544", "abc", triples)])
+
+        with TraitSnapshot(tmp_path / "snapshot.sqlite") as snapshot:
+            assert snapshot.get_content_hashes() == {"R1": "abc"}
+            assert snapshot.get_content_hashes(["311544"]) == {"R1": "abc"}
+            assert snapshot.get_content_hashes(["1143547"]) == {}
+            assert snapshot.get_triples(["R1"]) == {"R1": triples}
+
+            snapshot.delete(["R1"])
+            assert snapshot.get_content_hashes() == {}
+
+
+class TestDeltaHarvest:
+    """
+    Feature: Only the changes of the trait data since the previous harvest are
+        returned.
+    """
+
+    def test_first_harvest_adds_everything(self, tmp_path, eol_trait_csv_file_path):
+        eol = create_eol_with_csv_file(eol_trait_csv_file_path)
+        delta = eol.get_trait_data_delta(tmp_path / "snapshot.sqlite")
+
+        assert len(delta.added_record_ids) == 22
+        assert not delta.removed
+        assert trait_is_in(
+            "311544", "http://eol.org/schema/terms/AETinRange", delta.added
+        )
+
+    def test_unchanged_data_produces_empty_delta(
+        self, tmp_path, eol_trait_csv_file_path
+    ):
+        eol = create_eol_with_csv_file(eol_trait_csv_file_path)
+        eol.get_trait_data_delta(tmp_path / "snapshot.sqlite")
+
+        delta = eol.get_trait_data_delta(tmp_path / "snapshot.sqlite")
+        assert delta.is_empty()
+        assert not delta.changed_record_ids
+
+    def test_changed_and_removed_records(
+        self, tmp_path, eol_trait_csv_file_path, changed_csv_file_path
+    ):
+        snapshot_file_path = tmp_path / "snapshot.sqlite"
+        create_eol_with_csv_file(eol_trait_csv_file_path).get_trait_data_delta(
+            snapshot_file_path
+        )
+
+        eol = create_eol_with_csv_file(changed_csv_file_path)
+        delta = eol.get_trait_data_delta(snapshot_file_path)
+
+        assert delta.changed_record_ids == {"R261-PK213792796"}
+        assert delta.removed_record_ids == {"R786-PK74495430"}
+        assert not delta.added_record_ids
+
+        assert [t.object for t in delta.added] == [500.0]
+        assert sorted(t.eol_record_id for t in delta.removed) == [
+            "R261-PK213792796",
+            "R786-PK74495430",
+        ]
+
+    def test_delta_restricted_to_page_ids(
+        self, tmp_path, eol_trait_csv_file_path, changed_csv_file_path
+    ):
+        snapshot_file_path = tmp_path / "snapshot.sqlite"
+        create_eol_with_csv_file(eol_trait_csv_file_path).get_trait_data_delta(
+            snapshot_file_path
+        )
+
+        eol = create_eol_with_csv_file(changed_csv_file_path)
+        delta = eol.get_trait_data_delta(snapshot_file_path, eol_page_ids=["1143547"])
+        assert delta.is_empty()
+
+        delta = eol.get_trait_data_delta(snapshot_file_path, eol_page_ids=[311544])
+        assert delta.changed_record_ids == {"R261-PK213792796"}
+        assert delta.removed_record_ids == {"R786-PK74495430"}
+
+    @pytest.fixture
+    def changed_csv_file_path(self, tmp_path, eol_trait_csv_file_path):
+        """Changes the measurement of one record and removes another one."""
+        with open(eol_trait_csv_file_path) as csv_file:
+            lines = csv_file.readlines()
+
+        changed_lines = []
+        for line in lines:
+            if line.startswith("R786-PK74495430"):
+                continue
+            if line.startswith("R261-PK213792796"):
+                line = line.replace("407.56", "500")
+            changed_lines.append(line)
+
+        changed_csv_file_path = tmp_path / "changed_traits.csv"
+        changed_csv_file_path.write_text("".join(changed_lines))
+        return changed_csv_file_path
+
+
+def create_eol_with_csv_file(csv_file_path) -> EncyclopediaOfLifeProcessing:
+    return EncyclopediaOfLifeProcessing(
+        EolTraitCsvHandler(csv_file_path), EolTraitCsvNormalizer()
+    )
+
+
+def trait_is_in(subject: str, predicate: str, triples) -> bool:
+    return any(t.subject == subject and t.predicate == predicate for t in triples)
@@ -0,0 +1,258 @@
+import pytest
+
+from eol import EncyclopediaOfLifeProcessing
+from eol.cache import (
+    MemoizationCache,
+    RedisCacheBackend,
+    SqliteCacheBackend,
+    TripleCache,
+)
+from eol.handlers import EolTraitCsvHandler
+from eol.metrics import disable_metrics, enable_metrics, metrics_registry
+from eol.normalization import EolTraitCsvNormalizer
+from eol.triple_generator import Triple
+
+
+class TestCacheBackends:
+    def test_store_and_delete(self, backend):
+        assert backend.get("a") is None
+
+        backend.set("a", b"1")
+        assert backend.get("a") == b"1"
+
+        backend.delete("a")
+        assert backend.get("a") is None
+
+    def test_least_recently_used_entry_is_evicted(self, backend):
+        backend.set("a", b"1")
+        backend.set("b", b"2")
+        backend.get("a")
+        backend.set("c", b"3")
+
+        assert backend.get("a") == b"1"
+        assert backend.get("b") is None
+        assert backend.get("c") == b"3"
+
+    def test_clear(self, backend):
+        backend.set("a", b"1")
+        backend.clear()
+        assert backend.get("a") is None
+
+    @pytest.fixture(params=["sqlite", "redis"])
+    def backend(self, request, tmp_path, monkeypatch):
+        # Makes the recency timestamps strictly increasing
+        timestamps = iter(range(1, 1000))
+        monkeypatch.setattr("eol.cache.time.time", lambda: next(timestamps))
+
+        if request.param == "sqlite":
+            backend = SqliteCacheBackend(tmp_path / "cache.sqlite", max_entries=2)
+            yield backend
+            backend.close()
+        else:
+            yield RedisCacheBackend(FakeRedisClient(), max_entries=2)
+
+
+class TestTripleCache:
+    def test_cached_triples_are_returned(self, triple_cache):
+        triples = [
+            Triple("311544", "http://eol.org/schema/terms/AETinRange", 407.56, "R1")
+        ]
+        triple_cache.set(311544, "v1", triples)
+
+        assert triple_cache.get("311544", "v1") == triples
+        assert triple_cache.get(311544, "v2") is None
+
+        triple_cache.invalidate(311544, "v1")
+        assert triple_cache.get(311544, "v1") is None
+
+    def test_processing_uses_the_cache(self, triple_cache, eol_trait_csv_file_path):
+        eol = EncyclopediaOfLifeProcessing(
+            EolTraitCsvHandler(eol_trait_csv_file_path),
+            EolTraitCsvNormalizer(),
+            triple_cache=triple_cache,
+        )
+        expected_triples = EncyclopediaOfLifeProcessing(
+            EolTraitCsvHandler(eol_trait_csv_file_path), EolTraitCsvNormalizer()
+        ).get_trait_data_for_eol_page_id("311544")
+
+        enable_metrics()
+        try:
+            assert eol.get_trait_data_for_eol_page_id("311544") == expected_triples
+            assert eol.get_trait_data_for_eol_page_id("311544") == expected_triples
+            counters = metrics_registry.as_dict()["counters"]
+            assert counters["eol_triple_cache_hits_total"] == 1
+            assert counters["eol_triple_cache_misses_total"] == 1
+        finally:
+            disable_metrics()
+            metrics_registry.reset()
+
+        predicate_filters = {"http://eol.org/schema/terms/Present"}
+        eol.get_trait_data_for_eol_page_id("1143547")
+        filtered_triples = eol.get_trait_data_for_eol_page_id(
+            "1143547", filter_for_predicates=predicate_filters
+        )
+        assert filtered_triples
+        assert {t.predicate for t in filtered_triples} == predicate_filters
+
+    def test_multiple_pages_use_the_cache(self, triple_cache, eol_trait_csv_file_path):
+        memoization_cache = MemoizationCache()
+        eol = EncyclopediaOfLifeProcessing(
+            EolTraitCsvHandler(eol_trait_csv_file_path),
+            EolTraitCsvNormalizer(),
+            triple_cache=triple_cache,
+            memoization_cache=memoization_cache,
+        )
+        expected_triples = eol.get_trait_data_for_eol_page_id("311544")
+        version = eol.data_handler.get_source_version()
+        triple_cache.set(1143547, version, [TRIPLE])
+
+        trait_data = eol.get_trait_data_for_eol_page_ids(["311544", 1143547, 470798])
+
+        assert trait_data["311544"] == expected_triples
+        assert trait_data[1143547] == [TRIPLE]
+        assert trait_data[470798] == triple_cache.get(470798, version)
+        assert memoization_cache.get(470798) == trait_data[470798]
+        assert memoization_cache.statistics.hits == 2
+
+    def test_changed_source_is_not_served_from_cache(
+        self, triple_cache, eol_trait_csv_file_path
+    ):
+        handler = EolTraitCsvHandler(eol_trait_csv_file_path)
+        version = handler.get_source_version()
+        assert version == handler.get_source_version()
+
+        triple_cache.set(311544, version, [])
+        eol = EncyclopediaOfLifeProcessing(
+            handler, EolTraitCsvNormalizer(), triple_cache=triple_cache
+        )
+        assert eol.get_trait_data_for_eol_page_id("311544") == []
+
+        triple_cache.set(311544, "outdated version", [])
+        triple_cache.invalidate(311544, version)
+        assert eol.get_trait_data_for_eol_page_id("311544")
+
+    @pytest.fixture
+    def triple_cache(self, tmp_path):
+        backend = SqliteCacheBackend(tmp_path / "cache.sqlite")
+        yield TripleCache(backend)
+        backend.close()
+
+
+class TestMemoizationCache:
+    def test_entries_are_keyed_by_page_and_filter(self):
+        cache = MemoizationCache()
+        cache.set("311544", None, [TRIPLE])
+        cache.set(311544, {TRIPLE.predicate}, [])
+
+        assert cache.get(311544) == [TRIPLE]
+        assert cache.get(311544, set()) == [TRIPLE]
+        assert cache.get("311544", {TRIPLE.predicate}) == []
+        assert cache.get(1143547) is None
+        assert (cache.statistics.hits, cache.statistics.misses) == (3, 1)
+
+    def test_returned_lists_are_copies(self):
+        cache = MemoizationCache()
+        cache.set(311544, None, [TRIPLE])
+        cache.get(311544).clear()
+        assert cache.get(311544) == [TRIPLE]
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = MemoizationCache(max_entries=2)
+        cache.set(1, None, [])
+        cache.set(2, None, [])
+        cache.get(1)
+        cache.set(3, None, [])
+
+        assert cache.get(2) is None
+        assert cache.get(1) == []
+        assert len(cache) == 2
+        assert cache.statistics.evictions == 1
+
+    def test_memory_budget(self):
+        cache = MemoizationCache(max_bytes=1000)
+        cache.set(1, None, [TRIPLE])
+        cache.set(2, None, [TRIPLE])
+        assert 0 < cache.size_in_bytes <= 1000
+        assert cache.get(1) is None
+
+        cache.set(3, None, [TRIPLE] * 100)
+        assert cache.get(3) is None
+
+    def test_expired_entries_are_not_served(self):
+        now = [0.0]
+        cache = MemoizationCache(ttl_seconds=10, clock=lambda: now[0])
+        cache.set(1, None, [TRIPLE])
+        now[0] = 5.0
+        assert cache.get(1) == [TRIPLE]
+
+        now[0] = 11.0
+        assert cache.get(1) is None
+        assert cache.statistics.expirations == 1
+        assert len(cache) == 0
+
+    def test_invalidation(self):
+        cache = MemoizationCache()
+        cache.set(1, None, [])
+        cache.set(1, {TRIPLE.predicate}, [])
+        cache.set(2, None, [])
+
+        cache.invalidate("1")
+        assert len(cache) == 1
+
+        cache.invalidate()
+        assert len(cache) == 0
+        assert cache.size_in_bytes == 0
+
+    def test_processing_memoizes_results(self, eol_trait_csv_file_path, monkeypatch):
+        eol = EncyclopediaOfLifeProcessing(
+            EolTraitCsvHandler(eol_trait_csv_file_path),
+            EolTraitCsvNormalizer(),
+            memoization_cache=MemoizationCache(),
+        )
+        triples = eol.get_trait_data_for_eol_page_id("311544")
+        assert triples
+
+        def fail(*args, **kwargs):
+            raise AssertionError("The data handler must not be used")
+
+        monkeypatch.setattr(eol.data_handler, "iterate_data_by_key", fail)
+        assert eol.get_trait_data_for_eol_page_id(311544) == triples
+
+        eol.invalidate_trait_data(311544)
+        with pytest.raises(AssertionError):
+            eol.get_trait_data_for_eol_page_id(311544)
+
+
+TRIPLE = Triple("311544", "http://eol.org/schema/terms/AETinRange", 407.56, "R1")
+
+
+class FakeRedisClient:
+    """Implements the subset of the redis-py client used by the RedisCacheBackend."""
+
+    def __init__(self):
+        self.values = {}
+        self.sorted_sets = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+        self.sorted_sets.pop(key, None)
+
+    def zadd(self, key, mapping):
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    def zcard(self, key):
+        return len(self.sorted_sets.get(key, {}))
+
+    def zrange(self, key, start, stop):
+        members = sorted(self.sorted_sets.get(key, {}).items(), key=lambda m: m[1])
+        stop = len(members) if stop == -1 else stop + 1
+        return [member.encode("utf-8") for member, _ in members[start:stop]]
+
+    def zrem(self, key, member):
+        self.sorted_sets.get(key, {}).pop(member, None)
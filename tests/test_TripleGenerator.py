@@ -1,6 +1,7 @@
+import pandas as pd
 import pytest
 
-from eol.triple_generator import Triple, TripleGenerator
+from eol.triple_generator import Triple, TripleGenerator, iterate_unique_triples
 
 
 class TestTripleGenerator:
@@ -101,6 +102,52 @@ class TestTripleGenerator:
         triples = triple_generator.create_triples(triple_data)
         assert triples == expected_triples
 
+    def test_iterate_unique_triples(self):
+        triple = Triple("45258442", "http://eol.org/schema/terms/Present", "x", "R1")
+        duplicate = Triple("45258442", "http://eol.org/schema/terms/Present", "x", "R1")
+        other_record = Triple(
+            "45258442", "http://eol.org/schema/terms/Present", "x", "R2"
+        )
+
+        unique_triples = list(
+            iterate_unique_triples([triple, duplicate, other_record, triple])
+        )
+        assert unique_triples == [triple, other_record]
+
+    def test_create_triples_from_batch(self, triple_generator):
+        """The triples generated from a batch equal the triples of each record."""
+        base_data = {
+            "eol_record_id": "R533-PK221522710",
+            "page_id": 45258442,
+            "predicate": "http://rs.tdwg.org/dwc/terms/habitat",
+        }
+        records = [
+            {
+                "value_uri": "http://purl.obolibrary.org/obo/ENVO_01000024",
+                "literal": "http://purl.obolibrary.org/obo/ENVO_01000024",
+                "source": "http://www.marinespecies.org/aphia.php?p=taxdetails",
+            },
+            {"literal": "bar", "citation": "Smith, J. (2022)"},
+            {"normal_measurement": "9.5", "units_uri": "http://unit"},
+            {"normal_measurement": 9, "units_uri": None},
+            {"value_uri": "http://value", "normal_measurement": 3, "units_uri": "u"},
+        ]
+        records = [
+            {**base_data, **record, "eol_record_id": f"R{i}"}
+            for i, record in enumerate(records)
+        ]
+
+        triples = triple_generator.create_triples_from_batch(pd.DataFrame(records))
+
+        expected_triples = [
+            triple
+            for record in records
+            for triple in triple_generator.create_triples(record)
+        ]
+        # The order of the triples within a record is arbitrary
+        assert sorted(triples, key=repr) == sorted(expected_triples, key=repr)
+        assert [triple.object for triple in triples if triple.unit] == [9.5, 3.0]
+
     @pytest.fixture
     def triple_generator(self):
         return TripleGenerator()
@@ -0,0 +1,111 @@
+import sqlite3
+
+import pytest
+
+from eol import EncyclopediaOfLifeProcessing
+from eol.handlers import EolTraitCsvHandler
+from eol.normalization import EolTraitCsvNormalizer
+from eol.triple_store import TripleStore, _iterate_page_batches, compile_triple_store
+
+PAGE_IDS = ["311544", "1143547"]
+PRESENT = "http://eol.org/schema/terms/Present"
+
+
+class TestTripleStore:
+    def test_store_holds_the_generated_triples(
+        self, triple_store, eol_with_csv_handler
+    ):
+        for page_id in PAGE_IDS:
+            assert triple_store.get(page_id) == (
+                eol_with_csv_handler.get_trait_data_for_eol_page_id(page_id)
+            )
+        assert (
+            len(triple_store)
+            == eol_with_csv_handler.data_handler.get_data()["page_id"].nunique()
+        )
+
+    def test_missing_pages_have_no_triples(self, triple_store):
+        assert triple_store.get(99999999) == []
+        assert 99999999 not in triple_store
+        assert 311544 in triple_store
+
+    def test_batches_do_not_split_pages(self, eol_with_csv_handler):
+        data = eol_with_csv_handler.data_handler.get_data()
+
+        batches = list(_iterate_page_batches(data, batch_size=10))
+
+        assert len(batches) > 1
+        assert sum(len(batch) for batch in batches) == len(data)
+        page_ids = [set(batch["page_id"]) for batch in batches]
+        assert all(
+            not page_ids[i] & page_ids[j]
+            for i in range(len(page_ids))
+            for j in range(i + 1, len(page_ids))
+        )
+
+    def test_processing_serves_trait_data_from_the_store(
+        self, triple_store, eol_with_csv_handler, eol_trait_csv_file_path
+    ):
+        data_handler = EolTraitCsvHandler(eol_trait_csv_file_path)
+        eol = EncyclopediaOfLifeProcessing(
+            data_handler, EolTraitCsvNormalizer(), triple_store=triple_store
+        )
+
+        assert eol.get_trait_data_for_eol_page_ids(
+            PAGE_IDS, filter_for_predicates={PRESENT}
+        ) == eol_with_csv_handler.get_trait_data_for_eol_page_ids(
+            PAGE_IDS, filter_for_predicates={PRESENT}
+        )
+        assert list(eol.iter_trait_data_for_eol_page_id("311544")) == (
+            eol_with_csv_handler.get_trait_data_for_eol_page_id("311544")
+        )
+        # The data handler is only read by requests the store cannot serve
+        assert not data_handler._data.is_created
+        assert list(eol.iter_trait_data_batches(PAGE_IDS))
+        assert data_handler._data.is_created
+
+    def test_source_version(self, triple_store, eol_with_csv_handler):
+        assert triple_store.source_version == (
+            eol_with_csv_handler.data_handler.get_source_version()
+        )
+
+    def test_unknown_files_are_rejected(self, tmp_path):
+        other_file_path = tmp_path / "other.sqlite"
+        sqlite3.connect(str(other_file_path)).close()
+
+        with pytest.raises(ValueError):
+            TripleStore(other_file_path)
+
+    def test_unknown_compression_is_rejected(self, tmp_path, eol_trait_csv_file_path):
+        with pytest.raises(ValueError):
+            compile_triple_store(
+                EolTraitCsvHandler(eol_trait_csv_file_path),
+                EolTraitCsvNormalizer(),
+                tmp_path / "traits.sqlite",
+                compression="lz4",
+            )
+
+    def test_zstd_compression(self, tmp_path, eol_with_csv_handler):
+        pytest.importorskip("zstandard")
+
+        triple_store = compile_triple_store(
+            eol_with_csv_handler.data_handler,
+            EolTraitCsvNormalizer(),
+            tmp_path / "traits.sqlite",
+            compression="zstd",
+        )
+
+        assert triple_store.get("311544") == (
+            eol_with_csv_handler.get_trait_data_for_eol_page_id("311544")
+        )
+
+    @pytest.fixture
+    def triple_store(self, tmp_path, eol_with_csv_handler):
+        triple_store = compile_triple_store(
+            eol_with_csv_handler.data_handler,
+            EolTraitCsvNormalizer(),
+            tmp_path / "traits.sqlite",
+            batch_size=10,
+        )
+        yield triple_store
+        triple_store.close()
@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+from eol import EncyclopediaOfLifeProcessing
+from eol.handlers import EolTraitCsvHandler
+from eol.normalization import EolTraitCsvNormalizer
+from eol.warm_up import DONE, FAILED, PENDING, RUNNING, WarmUp
+
+
+class TestWarmUp:
+    def test_progress_and_readiness(self):
+        release = threading.Event()
+        warm_up = WarmUp({"fast": lambda: None, "slow": release.wait})
+        assert warm_up.states == {"fast": PENDING, "slow": PENDING}
+        assert warm_up.progress == 0.0
+
+        warm_up.start()
+        assert not warm_up.wait(timeout=0.2)
+        assert warm_up.states == {"fast": DONE, "slow": RUNNING}
+        assert warm_up.progress == 0.5
+        assert not warm_up.is_ready
+
+        release.set()
+        assert warm_up.wait()
+        assert warm_up.is_ready
+
+    def test_errors_are_raised_by_wait(self):
+        def fail():
+            raise FileNotFoundError("traits.csv")
+
+        warm_up = WarmUp({"trait_data": fail, "identifier_map": lambda: None})
+        warm_up.start()
+
+        with pytest.raises(FileNotFoundError):
+            warm_up.wait()
+        assert warm_up.states["trait_data"] == FAILED
+        assert warm_up.has_failed
+        assert warm_up.is_finished
+        assert not warm_up.is_ready
+
+    def test_can_only_be_started_once(self):
+        warm_up = WarmUp({"task": lambda: None}).start()
+        with pytest.raises(ValueError):
+            warm_up.start()
+
+    def test_preload_loads_all_data(
+        self, eol_trait_csv_file_path, pages_csv_file_path, provider_ids_csv_file_path
+    ):
+        handler = EolTraitCsvHandler(
+            eol_trait_csv_file_path, pages_csv_file_path=pages_csv_file_path
+        )
+        eol = EncyclopediaOfLifeProcessing(
+            handler, EolTraitCsvNormalizer(), provider_ids_csv_file_path
+        )
+        assert not eol.is_ready
+
+        warm_up = eol.preload()
+
+        assert eol.is_ready
+        assert set(warm_up.states) == {
+            "trait_data",
+            "trait_index",
+            "name_index",
+            "taxon_hierarchy",
+            "identifier_map",
+        }
+        assert handler._data.is_created
+        assert handler._trait_index.is_created
+        assert eol.identifier_converter._csv_dataframe is not None
+        assert eol.warm_up() is warm_up
+
+    def test_background_warm_up(self, eol_with_csv_handler):
+        warm_up = eol_with_csv_handler.warm_up(background=True)
+
+        # Requests do not have to wait for the warm-up to finish
+        triples = eol_with_csv_handler.get_trait_data_for_eol_page_id("311544")
+        assert triples[0].subject == "311544"
+
+        assert warm_up.wait()
+        assert eol_with_csv_handler.is_ready
+
+    def test_failed_warm_up_is_restarted(self, tmp_path):
+        handler = EolTraitCsvHandler(tmp_path / "traits.csv")
+        eol = EncyclopediaOfLifeProcessing(handler, EolTraitCsvNormalizer())
+
+        with pytest.raises(FileNotFoundError):
+            eol.preload()
+        assert not eol.is_ready
+
+        failed_warm_up = eol.warm_up()
+        with pytest.raises(FileNotFoundError):
+            failed_warm_up.wait()
+        assert eol.warm_up() is not failed_warm_up
+
+    def test_warm_up_is_restarted_only_when_finished(self, eol_with_csv_handler):
+        release = threading.Event()
+
+        def fail():
+            raise FileNotFoundError("traits.csv")
+
+        eol_with_csv_handler._get_preload_tasks = lambda: {
+            "trait_data": fail,
+            "identifier_map": release.wait,
+        }
+        warm_up = eol_with_csv_handler.warm_up()
+        with pytest.raises(FileNotFoundError):
+            warm_up.wait(timeout=0.2)
+
+        # The other task is still running
+        assert warm_up.has_failed
+        assert eol_with_csv_handler.warm_up() is warm_up
+
+        release.set()
+        with pytest.raises(FileNotFoundError):
+            warm_up.wait()
+        assert eol_with_csv_handler.warm_up() is not warm_up